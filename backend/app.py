@@ -1,36 +1,114 @@
 import os
 import json
-import sqlite3
-from datetime import datetime
-import numpy as np
-from flask import Flask, request, jsonify
+import logging
+import queue
+import time
+import contextvars
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 import google.generativeai as genai
-import traceback # traceback 모듈 임포트
+from concurrent.futures import ThreadPoolExecutor
+from plan_cache import PlanCache
+from result_cache import ResultCache, get_data_version, make_etag, result_cache_key
+from llm_client import LLMClient
+from metrics import current_endpoint, metrics
+from migrations import migrate_database
+from db import ConnectionPool
+from pivot import pivot_series
+from query_plan import compile_plan, compile_scan, normalize_plan, plan_params, scan_columns
+from raw_data import RawDataQuery, stream_csv, stream_ndjson
+from ingest import INGEST_DEFER_MIN_BYTES, detect_format, ingest_lines, text_stream
+from downsample import DOWNSAMPLE_DEFAULT_METHOD, DOWNSAMPLE_METHODS, DOWNSAMPLE_MIN_POINTS, downsample_indices
+from summarize import SUMMARY_TOKEN_BUDGET, build_report_data
+from dashboards import LayoutConflictError, apply_operations, load_layout, replace_layout
+from scheduler import PRECOMPUTE_INTERVAL_SECONDS, PrecomputeScheduler, load_precomputed
+from chart_format import (CHART_FORMAT_COMPACT, CHART_FORMAT_DEFAULT, CHART_FORMATS, choose_encoding, compress,
+                          encode_columns, fast_dumps)
+
+# --- 로깅 설정 ---
+# DASHBOARD_LOG_LEVEL=DEBUG로 실행하면 Gemini 원시 응답, 생성된 SQL 등 요청별 상세 로그를 남깁니다.
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+logging.basicConfig(level=os.getenv('DASHBOARD_LOG_LEVEL', 'INFO').upper(), format=LOG_FORMAT)
+logger = logging.getLogger('dashboard')
 
 # --- Flask 앱 및 데이터베이스 설정 ---
 app = Flask(__name__)
-DB_PATH = 'database.db'
+DB_PATH = os.getenv('DASHBOARD_DB_PATH', 'database.db')
+
+# 시작 시 아직 적용되지 않은 스키마 마이그레이션을 적용합니다.
+migrate_database(DB_PATH)
+
+# 대시보드 일괄 렌더링 / 보고서 생성 시 동시에 처리할 위젯 수
+RENDER_MAX_WORKERS = 4
+REPORT_MAX_WORKERS = 4
+
+# 연결 풀 크기: 요청 하나가 동시에 빌리는 연결은 요청 범위 연결(g.db)과 그 요청의 작업 스레드(렌더링/보고서)가
+# 각각 빌리는 연결입니다. 이런 요청 DB_POOL_CONCURRENT_REQUESTS개와 미리 계산 스케줄러 하나가 기다리지 않도록 잡습니다.
+DB_POOL_CONCURRENT_REQUESTS = 4
+DB_POOL_SIZE = int(os.getenv('DASHBOARD_DB_POOL_SIZE',
+                             DB_POOL_CONCURRENT_REQUESTS * (1 + max(RENDER_MAX_WORKERS, REPORT_MAX_WORKERS)) + 1))
+
+# 요청마다 새 연결을 여는 대신 WAL 모드로 설정된 연결을 풀에서 재사용합니다.
+db_pool = ConnectionPool(DB_PATH, max_size=DB_POOL_SIZE)
 
 def get_db_connection():
-    """데이터베이스 연결 객체를 반환합니다."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """요청 범위의 데이터베이스 연결 객체를 반환합니다. 앱 컨텍스트가 끝나면 풀에 반납됩니다."""
+    if 'db' not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+@app.before_request
+def start_request_metrics():
+    current_endpoint.set(request.endpoint or 'unknown')
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    record_request(request.endpoint, request.method, response.status_code, g.pop('request_started', None))
+    return response
+
+def record_request(endpoint, method, status_code, started):
+    """요청 수와 처리 시간을 엔드포인트별로 기록합니다. (Flask/Quart 공용)"""
+    endpoint = endpoint or 'unknown'
+    metrics.inc('requests_total', endpoint=endpoint, method=method, status=status_code)
+    if started is not None:
+        metrics.observe('request_duration_seconds', time.perf_counter() - started, endpoint=endpoint)
 
 # --- Gemini API 설정 ---
 gemini_model = None
 try:
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
-        print("경고: GOOGLE_API_KEY 환경 변수가 설정되지 않았습니다. Gemini API 관련 기능이 작동하지 않습니다.")
+        logger.warning("GOOGLE_API_KEY 환경 변수가 설정되지 않았습니다. Gemini API 관련 기능이 작동하지 않습니다.")
     else:
         genai.configure(api_key=api_key)
         gemini_model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        print("Gemini API가 성공적으로 초기화되었습니다. 사용 모델: gemini-2.5-flash-lite")
+        logger.info("Gemini API가 성공적으로 초기화되었습니다. 사용 모델: gemini-2.5-flash-lite")
 except Exception as e:
-    print(f"Gemini API 설정 중 오류 발생: {e}")
+    logger.error("Gemini API 설정 중 오류 발생: %s", e)
     gemini_model = None
 
+GEMINI_NOT_READY_MESSAGE = "Gemini API가 초기화되지 않았거나 GOOGLE_API_KEY가 유효하지 않습니다."
+
+
+class GeminiNotReadyError(RuntimeError):
+    """Gemini 클라이언트가 없어(API 키 미설정 등) 호출할 수 없을 때 발생합니다.
+
+    설정 문제이므로 요청 처리 중에는 traceback 없이 한 줄로만 기록합니다.
+    """
+
+    def __init__(self):
+        super().__init__(GEMINI_NOT_READY_MESSAGE)
+
+
+# 모든 Gemini 호출은 동시성 제한, 속도 제한, 마감 시간, 재시도를 담당하는 공용 클라이언트를 거칩니다.
+llm_client = LLMClient(gemini_model) if gemini_model else None
+
 # --- Gemini 프롬프트 템플릿 ---
 # GEMINI_CHART_PROMPT_TEMPLATE를 두 부분으로 나누어 직접 조합
 GEMINI_CHART_PROMPT_TEMPLATE_PART1 = """
@@ -43,6 +121,7 @@ Here are specific rules for common chart requests based on the 'CODE' column:
     - The 'x_axis' MUST be 'DT_ID'.
     - The 'y_axis' MUST be 'DATA'.
     - You MUST include a filter: "filters": {"CODE": "월별 검출 유형"} (or "일별 검출 유형" accordingly).
+    - You MUST include "time_grain": "month" for "월별 검출 유형" or "time_grain": "day" for "일별 검출 유형", and "aggregate": "sum".
 - If the user asks for "개인정보 접근 사용자 유형":
     - The 'chart_type' MUST be 'pie' or 'donut'.
     - The 'x_axis' MUST be 'NAME' (representing the user names for grouping).
@@ -59,8 +138,11 @@ General rules for other chart requests:
 The chart type must be one of 'line', 'bar', 'pie', 'donut'.
 For 3D data (when DT_ID is relevant), the dimension is '3D', otherwise '2D'.
 If 'dimension' is '3D', you MUST also include a 'group_by' key, which must be one of the available columns.
+For 3D data, if the user asks for an average, maximum, minimum or count, include an 'aggregate' key ('sum', 'avg', 'max', 'min' or 'count'). Otherwise, omit it ('sum' is used).
+For 2D 'line' or 'bar' charts with 'x_axis' 'DT_ID', if the user asks for daily or monthly totals (e.g., "일별", "월별"), include a 'time_grain' key ('day' or 'month') and optionally an 'aggregate' key as above. Otherwise, omit 'time_grain'.
 Ensure to include 'x_axis' and 'y_axis' keys in the JSON output.
 If the user's request implies filtering (e.g., "월간 이용 내역", "ID가 monthly_usage인 데이터"), include a 'filters' key (e.g., "filters": {"ID": "monthly_usage"}). The keys within the 'filters' object (e.g., "ID") MUST be enclosed in double quotes. Otherwise, omit the 'filters' key.
+A filter value may be a single value, a list of values (matches any of them), or a range object using 'gte', 'gt', 'lte', 'lt' (e.g., "filters": {"CODE": "일별 검출 유형", "DT_ID": {"gte": "2023-07-01", "lte": "2023-07-31"}}). Filter keys MUST be available columns.
 
 User Request: "
 """
@@ -77,142 +159,123 @@ If the user has additional requests, focus on them in your analysis.
 
 - Chart Name: {chart_name}
 - User's Additional Request: {user_prompt}
-- Data (CSV format):
+- Data Summary (computed from all {total_rows} rows):
+{data_summary}
+- Sample Rows (CSV format, {sample_rows} of {total_rows} rows):
 {data_csv}
 
 Analysis Report:
 """
 
-# --- API Endpoints ---
+# 보고서 프롬프트에 넣는 데이터(통계 요약 + 표본 행)의 토큰 예산
+REPORT_TOKEN_BUDGET = int(os.getenv('DASHBOARD_REPORT_TOKEN_BUDGET', SUMMARY_TOKEN_BUDGET))
 
-@app.route('/api/chart', methods=['POST'])
-def generate_chart():
-    """사용자 프롬프트를 기반으로 차트 데이터를 생성합니다."""
-    if not gemini_model:
-        return jsonify({"error": "Gemini API가 초기화되지 않았거나 GOOGLE_API_KEY가 유효하지 않습니다."}), 500
+# --- 쿼리 플랜 캐시 ---
+# 같은 프롬프트(대시보드 재로딩 등)에 대해서는 Gemini를 다시 호출하지 않습니다.
+plan_cache = PlanCache(db_pool, GEMINI_CHART_PROMPT_TEMPLATE_PART1)
 
-    prompt = request.json.get('prompt', '')
-    if not prompt:
-        return jsonify({"error": "프롬프트가 필요합니다."}), 400
+# --- 차트 결과 캐시 ---
+# 같은 쿼리에 대한 직렬화된 응답을 데이터 버전이 바뀔 때까지 재사용합니다.
+result_cache = ResultCache()
 
-    try:
-        # Dr. Python: 템플릿 내용 출력 추가 (이스케이프된 중괄호가 아닌 리터럴 중괄호로 변경)
-        print(f"Dr. Python Debug: GEMINI_CHART_PROMPT_TEMPLATE_PART1 content: {GEMINI_CHART_PROMPT_TEMPLATE_PART1}")
 
-        # 직접 문자열 조합
-        full_prompt = f"{GEMINI_CHART_PROMPT_TEMPLATE_PART1}{prompt}{GEMINI_CHART_PROMPT_TEMPLATE_PART2}"
+def cached_chart_params(prompt):
+    """플랜 캐시에 있는 프롬프트의 params를 반환합니다. 없으면 None.
 
-        print(f"Dr. Python Debug: 최종 full_prompt: {full_prompt}")
+    검증을 통과하지 못하는 항목(검증 없이 저장되던 예전 항목)은 지우고 None을 반환해 Gemini에 다시 묻게 합니다.
+    """
+    params = plan_cache.get(prompt)
+    if params is None:
+        return None
+    try:
+        normalize_plan(params)
+    except ValueError as e:
+        logger.warning("잘못된 캐시 플랜을 지웁니다: prompt=%r error=%s", prompt, e)
+        plan_cache.delete(prompt)
+        return None
+    return params
 
-        response = gemini_model.generate_content(full_prompt)
 
-        # Dr. Python: Gemini 응답 객체 및 텍스트 상세 디버깅
-        print(f"Dr. Python Debug: Type of response object: {type(response)}")
-        print(f"Dr. Python Debug: Dir of response object: {dir(response)}")
-        print(f"Dr. Python Debug: Type of response.text: {type(response.text)}")
-        print(f"Dr. Python Debug: Gemini 원시 응답 (response.text): {response.text}")
+def get_chart_params(prompt):
+    """프롬프트에 대한 차트 쿼리 플랜(params)을 반환합니다. 캐시에 있으면 Gemini 호출을 생략합니다."""
+    params = cached_chart_params(prompt)
+    if params is not None:
+        logger.debug("쿼리 플랜 캐시 적중: params=%s", params)
+        return params
 
-        # Add this print to see the raw text before stripping/replacing
-        print(f"Dr. Python Debug: Content of response.text before strip/replace: {response.text}")
+    if not llm_client:
+        raise GeminiNotReadyError()
 
-        json_text = response.text.strip().replace('```json', '').replace('```', '')
+    with metrics.time_stage('llm_plan'):
+        response = llm_client.generate(build_chart_prompt(prompt))
+    return parse_chart_plan(prompt, response.text)
 
-        print(f"Dr. Python Debug: 가공된 JSON 텍스트 (json_text): {json_text}")
 
-        params = json.loads(json_text)
+def build_chart_prompt(prompt):
+    """사용자 프롬프트로 차트 쿼리 플랜을 요청하는 Gemini 프롬프트를 만듭니다."""
+    # 직접 문자열 조합
+    return f"{GEMINI_CHART_PROMPT_TEMPLATE_PART1}{prompt}{GEMINI_CHART_PROMPT_TEMPLATE_PART2}"
 
-        print(f"Dr. Python Debug: Gemini로부터 받은 파싱된 params: {params}")
 
-    except Exception as e:
-        print(f"Dr. Python Debug: Exception caught in Gemini interaction block: {type(e).__name__}: {e}")
-        traceback.print_exc() # 상세 트레이스백 출력
-        return jsonify({"error": f"Gemini 분석 중 오류 발생: {e}"}), 500
+def parse_chart_plan(prompt, response_text):
+    """Gemini 응답 텍스트에서 쿼리 플랜(params)을 꺼내 검증하고, 정규화한 플랜을 플랜 캐시에 저장합니다.
 
-    if 'x_axis' not in params or 'y_axis' not in params:
-        return jsonify({"error": "Gemini 응답에 'x_axis' 또는 'y_axis' 정보가 누락되었습니다. 프롬프트를 더 명확하게 작성해주세요."}), 500
+    검증에 실패하면 ValueError가 발생하며 캐시에는 아무것도 남지 않으므로, 다음 요청은 Gemini에 다시 묻습니다.
+    """
+    logger.debug("Gemini 원시 응답: %s", response_text)
 
-    conn = get_db_connection()
+    with metrics.time_stage('plan_parse'):
+        json_text = response_text.strip().replace('```json', '').replace('```', '')
+        params = plan_params(normalize_plan(json.loads(json_text)))
 
-    chart_type = params['chart_type']
-    x_axis_col = params['x_axis']
-    y_axis_col = params['y_axis']
+    plan_cache.put(prompt, params)
+    return params
 
-    sql_query = ""
-    query_params = []
 
-    if chart_type in ['pie', 'donut']:
-        # For pie/donut charts, we need to group by x_axis and count occurrences
-        # If y_axis is explicitly DT_DATA, we select DT_DATA directly
-        if y_axis_col == 'DT_DATA': # This condition is now less likely to be met for "개인정보 접근 사용자 유형"
-            select_clause = f"{x_axis_col}, {y_axis_col}"
-        else: # Default to COUNT(*) for other pie/donut charts, including "개인정보 접근 사용자 유형"
-            select_clause = f"{x_axis_col}, COUNT(*) as count_value"
-
-        sql_query = f"SELECT {select_clause} FROM POPULATOR"
-
-        if 'filters' in params and params['filters']:
-            filter_key_raw = list(params['filters'].keys())[0]
-            filter_value = list(params['filters'].values())[0]
-            filter_key_cleaned = filter_key_raw.strip('"')
-            sql_query += f" WHERE {filter_key_cleaned} = ?"
-            query_params.append(filter_value)
-
-        # Only group by if we are counting, not if we are using DT_DATA directly
-        if y_axis_col != 'DT_DATA': # This condition is now more likely to be met for "개인정보 접근 사용자 유형"
-            sql_query += f" GROUP BY {x_axis_col}"
-
-    else: # line, bar charts
-        select_columns = [x_axis_col, y_axis_col]
-        if params.get('dimension') == '3D':
-            if 'group_by' not in params:
-                return jsonify({"error": "Gemini 응답에 'group_by' 정보가 누락되었습니다. 3D 차트 프롬프트를 더 명확하게 작성해주세요."}), 500
-            select_columns.append(params['group_by'])
-
-        select_clause = ", ".join(select_columns)
-        sql_query = f"SELECT {select_clause} FROM POPULATOR"
-
-        if 'filters' in params and params['filters']: # Check if 'filters' key exists and is not empty
-            print(f"Dr. Python Debug: 'filters' key found in params: {params['filters']}")
-
-            # Ensure filters is a dictionary
-            if not isinstance(params['filters'], dict):
-                print(f"Dr.Python Debug: 'filters' is not a dictionary: {type(params['filters'])}")
-                return jsonify({"error": "Gemini 응답의 'filters' 형식이 올바르지 않습니다. 딕셔너리여야 합니다."}), 500
-
-            if not params['filters']: # Check if filters dictionary is empty
-                print("Dr. Python Debug: params['filters'] is empty, skipping WHERE clause.")
-            else:
-                filter_key_raw = list(params['filters'].keys())[0] # Get the raw key
-                filter_value = list(params['filters'].values())[0]
+def parse_downsample_options(body):
+    """요청 본문의 max_points/downsample 값을 검증해 (max_points, method)로 반환합니다."""
+    max_points = body.get('max_points')
+    method = body.get('downsample', DOWNSAMPLE_DEFAULT_METHOD)
+    if max_points is not None:
+        if isinstance(max_points, bool) or not isinstance(max_points, int) or max_points < DOWNSAMPLE_MIN_POINTS:
+            raise ValueError(f"'max_points'는 {DOWNSAMPLE_MIN_POINTS} 이상의 정수여야 합니다.")
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"'downsample'은 {', '.join(DOWNSAMPLE_METHODS)} 중 하나여야 합니다.")
+    return max_points, method
 
-                print(f"Dr. Python Debug: filter_key_raw: '{filter_key_raw}', filter_value: '{filter_value}'")
 
-                # Dr. Python: filter_key에서 따옴표 제거
-                filter_key_cleaned = filter_key_raw.strip('"')
-                print(f"Dr. Python Debug: filter_key_cleaned: '{filter_key_cleaned}'")
+def parse_format_options(body):
+    """요청 본문의 format/include_table 값을 검증해 (format, include_table)로 반환합니다."""
+    chart_format = body.get('format', CHART_FORMAT_DEFAULT)
+    include_table = body.get('include_table', True)
+    if chart_format not in CHART_FORMATS:
+        raise ValueError(f"'format'은 {', '.join(CHART_FORMATS)} 중 하나여야 합니다.")
+    if not isinstance(include_table, bool):
+        raise ValueError("'include_table'은 true 또는 false여야 합니다.")
+    return chart_format, include_table
 
-                sql_query += f" WHERE {filter_key_cleaned} = ?" # Use the cleaned key in the SQL query
-                query_params.append(filter_value)
-        else:
-            print("Dr. Python Debug: 'filters' key not found or is empty in params.")
 
-    print(f"Dr. Python Debug: Final SQL Query: {sql_query}")
-    print(f"Dr. Python Debug: Query Parameters: {query_params}")
+def build_chart_response(params, rows, max_points=None, downsample=DOWNSAMPLE_DEFAULT_METHOD, include_table=True):
+    """쿼리 결과 행으로 ApexCharts 옵션, 시리즈, 테이블 데이터를 만듭니다. params는 compile_plan이 정규화한 플랜입니다.
 
-    try:
-        rows = conn.execute(sql_query, tuple(query_params)).fetchall()
-    except Exception as e:
-        print(f"Dr. Python Debug: Error during conn.execute: {type(e).__name__}: {e}")
-        traceback.print_exc() # 상세 트레이스백 출력
-        return jsonify({"error": f"데이터베이스 쿼리 실행 중 오류 발생: {e}"}), 500
+    max_points가 주어지면 DT_ID 축의 2D 라인/바 차트를 그 점 수 이하로 다운샘플링하고,
+    원본 행은 tableData에 싣지 않습니다 (전체 데이터는 POST /api/chart/data로 페이지 단위 조회).
+    include_table이 False면 tableData를 아예 만들지 않습니다.
+    """
+    chart_type = params['chart_type']
+    x_axis_col = params['x_axis']
+    y_axis_col = params['y_axis']
 
     categories = []
     series = []
     table_data = { "headers": [], "items": [] }
 
-    if rows:
+    if rows and include_table:
         table_data["headers"] = list(rows[0].keys())
-        table_data["items"] = [dict(row) for row in rows]
+        if max_points is None:
+            table_data["items"] = [dict(row) for row in rows]
+        else:
+            table_data["total"] = len(rows)
 
     if chart_type in ['pie', 'donut']:
         labels = [row[x_axis_col] for row in rows]
@@ -232,15 +295,8 @@ def generate_chart():
             }]
         }
     elif params.get('dimension') == '3D':
-        categories = sorted(list(set([row[x_axis_col] for row in rows])))
-        groups = sorted(list(set([row[params['group_by']] for row in rows])))
-
-        for group in groups:
-            data = []
-            for category in categories:
-                value = next((row[y_axis_col] for row in rows if row[x_axis_col] == category and row[params['group_by']] == group), 0)
-                data.append(value)
-            series.append({"name": group, "data": data})
+        # 같은 (카테고리, 그룹) 셀에 여러 행이 있으면 params['aggregate'] 방식으로 집계
+        categories, series = pivot_series(rows, x_axis_col, y_axis_col, params['group_by'], params['aggregate'])
 
         chart_options = {
             "chart": {"type": chart_type},
@@ -249,6 +305,16 @@ def generate_chart():
     else: # 2D line, bar charts
         categories = [row[x_axis_col] for row in rows]
         series_data = [row[y_axis_col] for row in rows]
+
+        if max_points is not None and x_axis_col == 'DT_ID' and len(rows) > max_points:
+            try:
+                picked = downsample_indices(categories, series_data, max_points, downsample)
+            except (TypeError, ValueError) as e:
+                logger.debug("다운샘플링 생략 (수치가 아닌 데이터): %s", e)
+            else:
+                categories = [categories[i] for i in picked]
+                series_data = [series_data[i] for i in picked]
+
         series = [{"name": y_axis_col, "data": series_data}]
 
         chart_options = {
@@ -256,116 +322,672 @@ def generate_chart():
             "xaxis": {"categories": categories}
         }
 
-    conn.close()
-
-    response_data = {
+    chart = {
         "chartOptions": chart_options,
         "series": series,
-        "tableData": table_data
     }
-    return jsonify(response_data)
+    if include_table:
+        chart["tableData"] = table_data
+    return chart
+
+
+def build_compact_response(params, rows, max_points=None, downsample=DOWNSAMPLE_DEFAULT_METHOD, include_table=True):
+    """compact 형식의 차트 응답을 만듭니다. 차트 부분은 기본 형식과 같고, 테이블은 열 단위(table)로 보냅니다.
+
+    max_points가 주어지면 기본 형식처럼 원본 행 없이 headers와 total만 보냅니다.
+    """
+    chart = build_chart_response(params, rows, max_points, downsample, include_table=False)
+    chart["format"] = CHART_FORMAT_COMPACT
+    if include_table:
+        if max_points is None:
+            chart["table"] = encode_columns(rows)
+        else:
+            chart["table"] = {"headers": list(rows[0].keys()) if rows else [], "total": len(rows)}
+    return chart
+
+
+def serialize_chart_response(plan, rows, max_points=None, downsample=DOWNSAMPLE_DEFAULT_METHOD,
+                             chart_format=CHART_FORMAT_DEFAULT, include_table=True, encoding=None):
+    """차트 응답을 만들어 JSON 바이트로 직렬화합니다. 두 단계의 소요 시간을 따로 기록합니다.
+
+    compact 형식은 orjson(설치된 경우)으로 직렬화하고, encoding('br'/'gzip')이 주어지면 압축합니다.
+    """
+    if chart_format == CHART_FORMAT_COMPACT:
+        with metrics.time_stage('build_series'):
+            chart = build_compact_response(plan, rows, max_points, downsample, include_table)
+        with metrics.time_stage('serialize'):
+            return compress(fast_dumps(chart), encoding)
+
+    with metrics.time_stage('build_series'):
+        chart = build_chart_response(plan, rows, max_points, downsample, include_table)
+    with metrics.time_stage('serialize'):
+        return app.json.dumps(chart).encode('utf-8')
+
+
+def chart_encoding(chart_format, accept_encodings):
+    """응답 본문 압축 방식. compact 형식에서만 Accept-Encoding에 따라 압축합니다."""
+    return choose_encoding(accept_encodings) if chart_format == CHART_FORMAT_COMPACT else None
+
+
+# --- API Endpoints ---
+
+@app.route('/api/chart', methods=['POST'])
+def generate_chart():
+    """사용자 프롬프트를 기반으로 차트 데이터를 생성합니다."""
+    prompt = request.json.get('prompt', '')
+    if not prompt:
+        return jsonify({"error": "프롬프트가 필요합니다."}), 400
+
+    try:
+        max_points, downsample = parse_downsample_options(request.json)
+        chart_format, include_table = parse_format_options(request.json)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        params = get_chart_params(prompt)
+    except GeminiNotReadyError as e:
+        logger.error("Gemini 분석 불가: %s", e)
+        return jsonify({"error": f"Gemini 분석 중 오류 발생: {e}"}), 500
+    except Exception as e:
+        logger.exception("Gemini 분석 실패: prompt=%r", prompt)
+        return jsonify({"error": f"Gemini 분석 중 오류 발생: {e}"}), 500
+
+    try:
+        sql_query, query_params, plan = compile_plan(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 500
+
+    logger.debug("차트 쿼리: sql=%s params=%s", sql_query, query_params)
+
+    # 데이터 버전과 쿼리가 같으면 응답도 같으므로, 클라이언트가 가진 ETag와 같으면 304로 끝냅니다.
+    conn = get_db_connection()
+    encoding = chart_encoding(chart_format, request.accept_encodings)
+    cache_key = result_cache_key(sql_query, query_params, plan, max_points, downsample,
+                                 chart_format, include_table, encoding)
+    data_version = get_data_version(conn)
+    etag = make_etag(data_version, cache_key)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = result_cache.get(cache_key, data_version)
+        if body is None:
+            try:
+                with metrics.time_stage('sql'):
+                    rows = conn.execute(sql_query, tuple(query_params)).fetchall()
+            except Exception as e:
+                logger.exception("차트 쿼리 실행 실패: sql=%s", sql_query)
+                return jsonify({"error": f"데이터베이스 쿼리 실행 중 오류 발생: {e}"}), 500
+            body = serialize_chart_response(plan, rows, max_points, downsample,
+                                            chart_format, include_table, encoding)
+            result_cache.put(cache_key, data_version, body)
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # 항상 If-None-Match로 재검증
+    if chart_format == CHART_FORMAT_COMPACT:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+# 차트 원본 데이터 페이지 크기 제한
+CHART_DATA_DEFAULT_LIMIT = 100
+CHART_DATA_MAX_LIMIT = 1000
+
+
+@app.route('/api/chart/data', methods=['POST'])
+def get_chart_data():
+    """차트 프롬프트가 조회하는 원본 행을 offset/limit 페이지 단위로 반환합니다."""
+    prompt = request.json.get('prompt', '')
+    if not prompt:
+        return jsonify({"error": "프롬프트가 필요합니다."}), 400
+
+    offset = request.json.get('offset', 0)
+    limit = request.json.get('limit', CHART_DATA_DEFAULT_LIMIT)
+    if not isinstance(offset, int) or offset < 0 or not isinstance(limit, int) or not 0 < limit <= CHART_DATA_MAX_LIMIT:
+        return jsonify({"error": f"'offset'은 0 이상, 'limit'은 1~{CHART_DATA_MAX_LIMIT} 사이의 정수여야 합니다."}), 400
+
+    try:
+        params = get_chart_params(prompt)
+        sql_query, query_params, _ = compile_plan(params)
+    except Exception as e:
+        return jsonify({"error": f"Gemini 분석 중 오류 발생: {e}"}), 500
+
+    conn = get_db_connection()
+    try:
+        with metrics.time_stage('sql'):
+            total = conn.execute(f"SELECT COUNT(*) FROM ({sql_query})", tuple(query_params)).fetchone()[0]
+            cursor = conn.execute(f"SELECT * FROM ({sql_query}) LIMIT ? OFFSET ?", (*query_params, limit, offset))
+            headers = [column[0] for column in cursor.description]
+            items = [dict(row) for row in cursor.fetchall()]
+    except Exception as e:
+        return jsonify({"error": f"데이터베이스 쿼리 실행 중 오류 발생: {e}"}), 500
+
+    return jsonify({"headers": headers, "items": items, "total": total, "offset": offset, "limit": limit})
+
+
+@app.route('/api/data', methods=['GET'])
+def get_raw_data():
+    """POPULATOR 원본 행을 키셋 페이지네이션(JSON) 또는 스트리밍(NDJSON/CSV)으로 반환합니다.
+
+    NDJSON/CSV는 DB 커서에서 조금씩 읽어 바로 내보내므로, 조건에 맞는 행이 아무리 많아도
+    메모리 사용량이 일정합니다.
+    """
+    try:
+        query = RawDataQuery(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+
+    if query.format == 'json':
+        sql_query, query_params = query.to_sql(extra_row=True)
+        rows = conn.execute(sql_query, tuple(query_params)).fetchall()
+        has_more = len(rows) > query.limit
+        rows = rows[:query.limit]
+        return jsonify({
+            "columns": list(query.columns),
+            "items": [query.project(row) for row in rows],
+            "next_cursor": query.cursor_for(rows[-1]) if has_more else None,
+        })
+
+    sql_query, query_params = query.to_sql()
+    cursor = conn.execute(sql_query, tuple(query_params))
+    if query.format == 'ndjson':
+        return Response(stream_with_context(stream_ndjson(query, cursor)), mimetype='application/x-ndjson')
+    return Response(stream_with_context(stream_csv(query, cursor)), mimetype='text/csv',
+                    headers={"Content-Disposition": "attachment; filename=populator.csv"})
+
+
+# 요청 Content-Type으로 적재 형식을 추정할 때 사용
+INGEST_MIMETYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+
+@app.route('/api/ingest', methods=['POST'])
+def ingest_data():
+    """CSV/NDJSON 본문(또는 multipart 'file' 필드)을 POPULATOR에 대량 적재합니다.
+
+    본문은 고정 크기 청크로 읽으며 청크마다 커밋하므로 파일 크기와 관계없이 메모리 사용량이 일정합니다.
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({"error": "'file' 필드가 필요합니다."}), 400
+        stream, filename = upload.stream, upload.filename or ''
+    else:
+        stream, filename = request.stream, ''
+
+    fmt = request.args.get('format') or detect_format(filename) or INGEST_MIMETYPES.get(request.mimetype)
+    if fmt is None:
+        return jsonify({"error": "적재 형식을 알 수 없습니다. 'format' 쿼리 인자(csv 또는 ndjson)를 지정해주세요."}), 400
+
+    defer_option = request.args.get('defer_indexes')
+    if defer_option is None:
+        defer_indexes = (request.content_length or 0) >= INGEST_DEFER_MIN_BYTES
+    else:
+        defer_indexes = defer_option.lower() in ('1', 'true', 'yes')
+
+    try:
+        result = ingest_lines(DB_PATH, text_stream(stream), fmt, defer_indexes=defer_indexes)
+    except ValueError as e:
+        return jsonify({"error": str(e), "rows": getattr(e, 'rows', 0)}), 400
+    except Exception as e:
+        logger.exception("데이터 적재 실패: format=%s", fmt)
+        return jsonify({"error": f"데이터 적재 중 오류 발생: {e}"}), 500
+
+    logger.info("데이터 적재: rows=%d rows_per_second=%s deferred_indexes=%s",
+                result['rows'], result['rows_per_second'], result['deferred_indexes'])
+    precompute_scheduler.trigger()  # 바뀐 데이터로 대시보드 결과를 다시 미리 계산
+    return jsonify(result)
 
 
 @app.route('/api/dashboards/<dashboard_id>', methods=['GET', 'POST'])
 def handle_dashboard(dashboard_id):
-    """대시보드 레이아웃을 조회하거나 저장합니다."""
+    """대시보드 레이아웃을 조회하거나 저장합니다.
+
+    POST는 레이아웃 전체를 덮어씁니다 (버전 검사 없음). 위젯 단위 저장은 PATCH /api/dashboards/<id>/widgets를 사용합니다.
+    """
     conn = get_db_connection()
     if request.method == 'POST':
         layout_data = request.json.get('layout')
-        conn.execute("UPDATE DASHBOARDS SET layout = ? WHERE id = ?", (json.dumps(layout_data), dashboard_id))
-        conn.commit()
-        conn.close()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM DASHBOARDS WHERE id = ?", (dashboard_id,)).fetchone() is not None:
+                replace_layout(conn, dashboard_id, layout_data)
+            conn.execute("COMMIT")
+        except ValueError as e:
+            conn.execute("ROLLBACK")
+            return jsonify({"error": str(e)}), 400
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        precompute_scheduler.trigger()  # 새로 추가된 위젯 프롬프트를 미리 계산
         return jsonify({"status": "success"})
     else:  # GET
-        dashboard = conn.execute("SELECT layout FROM DASHBOARDS WHERE id = ?", (dashboard_id,)).fetchone()
-        conn.close()
-        if dashboard and dashboard['layout']:
-            return jsonify({"layout": json.loads(dashboard['layout'])})
-        return jsonify({"layout": []})
+        return jsonify({"layout": load_layout(conn, dashboard_id) or []})
+
+
+@app.route('/api/dashboards/<dashboard_id>/widgets', methods=['PATCH'])
+def patch_dashboard_widgets(dashboard_id):
+    """위젯 단위 변경(add/update/remove)을 한 트랜잭션으로 적용합니다.
+
+    update/remove의 version이 저장된 버전과 다르면(다른 탭/사용자가 먼저 수정) 아무것도 적용하지 않고
+    409와 함께 충돌한 위젯의 현재 상태를 반환합니다.
+    """
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    conn = get_db_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        widgets = apply_operations(conn, dashboard_id, operations)
+        conn.execute("COMMIT")
+    except ValueError as e:
+        conn.execute("ROLLBACK")
+        return jsonify({"error": str(e)}), 400
+    except LayoutConflictError as e:
+        conn.execute("ROLLBACK")
+        return jsonify({"error": str(e), "conflicts": e.conflicts}), 409
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if widgets is None:
+        return jsonify({"error": "Dashboard not found"}), 404
+    precompute_scheduler.trigger()
+    return jsonify({"widgets": widgets})
+
+
+@app.route('/api/dashboards/<dashboard_id>/render', methods=['POST'])
+def render_dashboard(dashboard_id):
+    """저장된 레이아웃의 모든 위젯 차트 데이터를 한 번의 요청으로 생성합니다.
+
+    위젯 프롬프트는 제한된 수의 스레드로 동시에 해석하고, 같은 필터와 x축으로 POPULATOR를 읽는 위젯은
+    하나의 연결에서 스캔을 한 번만 실행해 결과를 나눠 씁니다 (merge_queries 참고).
+    """
+    try:
+        max_points, downsample = parse_downsample_options(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db_connection()
+    layout = load_layout(conn, dashboard_id)
+    if layout is None:
+        return jsonify({"error": "Dashboard not found"}), 404
+
+    # 1. 중복을 제거한 위젯 프롬프트를 동시에 해석
+    prompts = sorted({item.get('initialPrompt') for item in layout if item.get('initialPrompt')})
+    plans = {}
+    if prompts:
+        with ThreadPoolExecutor(max_workers=min(RENDER_MAX_WORKERS, len(prompts))) as executor:
+            futures = {prompt: executor.submit(contextvars.copy_context().run, get_chart_params, prompt)
+                       for prompt in prompts}
+        for prompt, future in futures.items():
+            try:
+                plans[prompt] = future.result()
+            except Exception as e:
+                logger.warning("위젯 프롬프트 해석 실패: prompt=%r error=%s", prompt, e)
+                plans[prompt] = e
+
+    # 2. 필터가 같은 스캔과 같은 SQL은 한 번만 실행
+    planned, query_keys = merge_queries(compile_widgets(layout, plans))
+    query_results = {}
+    for query_key in query_keys:
+        try:
+            with metrics.time_stage('sql'):
+                query_results[query_key] = conn.execute(*query_key).fetchall()
+        except Exception as e:
+            query_results[query_key] = e
+
+    widgets = fill_widgets(planned, query_results, max_points, downsample)
+    return jsonify({"widgets": widgets, "queryCount": len(query_results)})
+
+
+def compile_widgets(layout, plans):
+    """레이아웃 위젯마다 (위젯 응답 딕셔너리, CompiledQuery 또는 None) 쌍을 만듭니다.
+
+    plans는 프롬프트 → 쿼리 플랜(또는 플랜 해석 중 발생한 예외)이며, 실패한 위젯은 error가 채워집니다.
+    """
+    compiled = []
+    for item in layout:
+        widget = {"i": item.get('i')}
+        query = None
+        prompt = item.get('initialPrompt')
+        if not prompt:
+            widget["error"] = "차트를 생성할 프롬프트가 없습니다."
+        elif isinstance(plans[prompt], Exception):
+            widget["error"] = f"Gemini 분석 중 오류 발생: {plans[prompt]}"
+        else:
+            try:
+                query = compile_plan(plans[prompt])
+            except ValueError as e:
+                widget["error"] = str(e)
+        compiled.append((widget, query))
+    return compiled
+
+
+def merge_queries(compiled):
+    """compile_widgets() 결과에서 실제로 실행할 쿼리를 정해 (위젯별 계획 목록, 실행할 (SQL, 매개변수) 목록)을 반환합니다.
+
+    위젯별 계획은 (위젯 응답, (쿼리 키, 골라낼 컬럼 또는 None, 플랜) 또는 None)입니다.
+    - 집계 없이 원본 행을 읽는 위젯(라인/바, DT_DATA 파이)은 필터와 x_axis가 같으면 필요한 컬럼을 모두 읽는
+      POPULATOR 스캔 하나로 합치고, 위젯마다 자기 컬럼만 골라냅니다. (행 순서는 위젯 쿼리와 같은 x_axis 순)
+    - 롤업이나 GROUP BY로 집계하는 위젯은 결과가 이미 작으므로 SQL과 매개변수가 같을 때만 합칩니다.
+    """
+    scans = {}  # (필터, x_axis) → 스캔에서 읽을 컬럼
+    for _, query in compiled:
+        columns = scan_columns(query.plan) if query else None
+        if columns:
+            merged = scans.setdefault((tuple(query.plan["filters"]), columns[0]), [])
+            merged.extend(column for column in columns if column not in merged)
+    scan_keys = {group: compile_scan(group[0], columns) for group, columns in scans.items()}
+
+    planned = []
+    for widget, query in compiled:
+        if query is None:
+            planned.append((widget, None))
+            continue
+        columns = scan_columns(query.plan)
+        if columns:
+            group = (tuple(query.plan["filters"]), columns[0])
+            source = (scan_keys[group], None if columns == scans[group] else columns, query.plan)
+        else:
+            source = ((query.sql, tuple(query.params)), None, query.plan)
+        planned.append((widget, source))
+    return planned, list(dict.fromkeys(source[0] for _, source in planned if source))
+
+
+def fill_widgets(planned, query_results, max_points, downsample):
+    """merge_queries()의 위젯별 계획과 쿼리 키 → 결과 행(또는 예외)으로 위젯 응답을 완성해 목록으로 반환합니다."""
+    widgets = []
+    for widget, source in planned:
+        widgets.append(widget)
+        if source is None:
+            continue
+        query_key, columns, plan = source
+        rows = query_results[query_key]
+        if isinstance(rows, Exception):
+            widget["error"] = f"데이터베이스 쿼리 실행 중 오류 발생: {rows}"
+            continue
+        with metrics.time_stage('build_series'):
+            if columns is not None:
+                rows = [{column: row[column] for column in columns} for row in rows]
+            widget.update(build_chart_response(plan, rows, max_points, downsample))
+    return widgets
+
+
+def prepare_report_prompt(chart_prompt):
+    """차트 프롬프트의 데이터를 조회해 보고서용 Gemini 프롬프트를 만듭니다. 데이터가 없으면 None."""
+    # 1. Get chart parameters from Gemini (or the plan cache)
+    params = get_chart_params(chart_prompt)
+
+    # 2. Get data from database based on params (차트와 같은 쿼리, 롤업 포함)
+    sql_query, query_params, plan = compile_plan(params)
+
+    # 스트리밍 보고서의 작업 스레드에서도 호출되므로 요청 범위 연결 대신 풀에서 직접 빌립니다.
+    with db_pool.connection() as conn, metrics.time_stage('sql'):
+        rows_for_chart = conn.execute(sql_query, tuple(query_params)).fetchall()
+
+    return format_report_prompt(chart_prompt, rows_for_chart, plan)
+
+
+def format_report_prompt(chart_prompt, rows_for_chart, plan):
+    """조회한 차트 데이터로 보고서용 Gemini 프롬프트를 만듭니다. 데이터가 없으면 None.
+
+    전체 행 대신 통계 요약(추세, 평균, 최고/최저, 이상치)과 REPORT_TOKEN_BUDGET 안에 들어가는 표본 행만 넣습니다.
+    """
+    if not rows_for_chart:
+        return None
+
+    # 3. Format data for the analysis prompt
+    with metrics.time_stage('summarize'):
+        report_data = build_report_data(rows_for_chart, plan, REPORT_TOKEN_BUDGET)
+
+    return GEMINI_REPORT_PROMPT_TEMPLATE.format(
+        chart_name=chart_prompt,
+        user_prompt="전반적인 분석을 해줘.", # Can be customized later
+        data_summary=report_data.summary,
+        data_csv=report_data.sample_csv,
+        sample_rows=report_data.sample_rows,
+        total_rows=report_data.total_rows,
+    )
 
 
 @app.route('/api/report', methods=['POST'])
 def create_report():
     """대시보드 데이터를 기반으로 분석 보고서를 생성합니다."""
-    if not gemini_model:
-        return jsonify({"error": "Gemini API가 초기화되지 않았거나 GOOGLE_API_KEY가 유효하지 않습니다."}), 500
+    if not llm_client:
+        return jsonify({"error": GEMINI_NOT_READY_MESSAGE}), 500
 
     chart_prompt = request.json.get('prompt', '')
     if not chart_prompt:
         return jsonify({"error": "프롬프트가 필요합니다."}), 400
 
     try:
-        # 1. Get chart parameters from Gemini
-        full_chart_prompt = f"{GEMINI_CHART_PROMPT_TEMPLATE_PART1}{chart_prompt}{GEMINI_CHART_PROMPT_TEMPLATE_PART2}"
-        chart_response = gemini_model.generate_content(full_chart_prompt)
-        json_text = chart_response.text.strip().replace('```json', '').replace('```', '')
-        params = json.loads(json_text)
-
-        if 'x_axis' not in params or 'y_axis' not in params:
-            raise Exception("Gemini response missing 'x_axis' or 'y_axis'.")
-
-        # 2. Get data from database based on params
-        conn = get_db_connection()
-        chart_type = params['chart_type']
-        x_axis_col = params['x_axis']
-        y_axis_col = params['y_axis']
-
-        sql_query = ""
-        query_params = []
-
-        if chart_type in ['pie', 'donut']:
-            select_clause = f"{x_axis_col}, COUNT(*) as count_value"
-            sql_query = f"SELECT {select_clause} FROM POPULATOR"
-            if 'filters' in params and params['filters']:
-                filter_key_raw = list(params['filters'].keys())[0]
-                filter_value = list(params['filters'].values())[0]
-                filter_key_cleaned = filter_key_raw.strip('"')
-                sql_query += f" WHERE {filter_key_cleaned} = ?"
-                query_params.append(filter_value)
-            sql_query += f" GROUP BY {x_axis_col}"
-        else: # line, bar charts
-            select_columns = [x_axis_col, y_axis_col]
-            if params.get('dimension') == '3D':
-                if 'group_by' not in params:
-                    raise Exception("Gemini response missing 'group_by' for 3D chart.")
-                select_columns.append(params['group_by'])
-            select_clause = ", ".join(select_columns)
-            sql_query = f"SELECT {select_clause} FROM POPULATOR"
-            if 'filters' in params and params['filters']:
-                filter_key_raw = list(params['filters'].keys())[0]
-                filter_value = list(params['filters'].values())[0]
-                filter_key_cleaned = filter_key_raw.strip('"')
-                sql_query += f" WHERE {filter_key_cleaned} = ?"
-                query_params.append(filter_value)
-
-        rows_for_chart = conn.execute(sql_query, tuple(query_params)).fetchall()
-        conn.close()
-
-        if not rows_for_chart:
+        full_report_prompt = prepare_report_prompt(chart_prompt)
+        if full_report_prompt is None:
             return jsonify({"analysis": "분석할 데이터를 찾을 수 없습니다."})
 
-        # 3. Format data and get analysis from Gemini
-        header = rows_for_chart[0].keys()
-        data_csv = ",".join(map(str, header)) + "\n"
-        for row in rows_for_chart:
-            data_csv += ",".join(map(str, row)) + "\n"
-
-        full_report_prompt = GEMINI_REPORT_PROMPT_TEMPLATE.format(
-            chart_name=chart_prompt,
-            user_prompt="전반적인 분석을 해줘.", # Can be customized later
-            data_csv=data_csv
-        )
-        report_response = gemini_model.generate_content(full_report_prompt)
+        with metrics.time_stage('llm_report'):
+            report_response = llm_client.generate(full_report_prompt)
         analysis_text = report_response.text
 
         return jsonify({"analysis": analysis_text})
 
     except Exception as e:
-        print(f"Dr. Python Debug: Error generating report for chart '{chart_prompt}': {e}")
-        traceback.print_exc()
+        logger.exception("보고서 생성 실패: chart_prompt=%r", chart_prompt)
         return jsonify({"error": f"보고서 생성 중 오류 발생: {e}"}), 500
 
 
+def format_sse(event, data):
+    """Server-Sent Events 메시지 한 건을 만듭니다."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def split_precomputed_reports(widgets, entries):
+    """미리 계산된 최신 분석이 있는 위젯은 바로 보낼 SSE 메시지로, 나머지는 Gemini로 분석할 위젯 목록으로 나눕니다.
+
+    entries는 scheduler.load_precomputed()가 반환한 {프롬프트: {종류: 항목}}입니다.
+    """
+    messages, pending = [], []
+    for widget in widgets:
+        report = entries.get(widget['initialPrompt'], {}).get('report')
+        if report is None or not report['fresh']:
+            pending.append(widget)
+            continue
+        messages.append(format_sse("chunk", {"i": widget.get('i'), "text": report['result']}))
+        messages.append(format_sse("section_end", {"i": widget.get('i'), "computedAt": report['computedAt']}))
+    return messages, pending
+
+
+@app.route('/api/dashboards/<dashboard_id>/report', methods=['GET'])
+def stream_dashboard_report(dashboard_id):
+    """대시보드의 모든 차트 분석을 동시에 생성하고, 완성되는 대로 SSE로 스트리밍합니다.
+
+    각 차트 분석은 Gemini 스트리밍 응답의 조각(`chunk`) 단위로 전달되므로, 첫 문단은
+    LLM 호출 한 번의 지연 안에 도착합니다. 현재 데이터로 미리 계산된 분석이 있는 차트는 Gemini를 호출하지 않고 바로 보냅니다.
+    """
+    if not llm_client:
+        return jsonify({"error": GEMINI_NOT_READY_MESSAGE}), 500
+
+    conn = get_db_connection()
+    layout = load_layout(conn, dashboard_id)
+    if layout is None:
+        return jsonify({"error": "Dashboard not found"}), 404
+    widgets = [item for item in layout if item.get('initialPrompt')]
+    _, entries = load_precomputed(conn, dashboard_id)
+    precomputed_messages, pending = split_precomputed_reports(widgets, entries)
+
+    events = queue.Queue()
+
+    def analyze_widget(widget):
+        widget_id = widget.get('i')
+        chart_prompt = widget['initialPrompt']
+        try:
+            full_report_prompt = prepare_report_prompt(chart_prompt)
+            if full_report_prompt is None:
+                events.put(("chunk", {"i": widget_id, "text": "분석할 데이터를 찾을 수 없습니다."}))
+            else:
+                with metrics.time_stage('llm_report'):
+                    for text in llm_client.stream(full_report_prompt):
+                        events.put(("chunk", {"i": widget_id, "text": text}))
+            events.put(("section_end", {"i": widget_id}))
+        except Exception as e:
+            logger.warning("보고서 생성 실패: chart_prompt=%r error=%s", chart_prompt, e)
+            events.put(("error", {"i": widget_id, "error": f"보고서 생성 중 오류 발생: {e}"}))
+
+    def generate():
+        yield format_sse("sections", [{"i": w.get('i'), "prompt": w['initialPrompt']} for w in widgets])
+        yield from precomputed_messages
+        if pending:
+            executor = ThreadPoolExecutor(max_workers=min(REPORT_MAX_WORKERS, len(pending)))
+            try:
+                for widget in pending:
+                    executor.submit(contextvars.copy_context().run, analyze_widget, widget)
+                remaining = len(pending)
+                while remaining:
+                    event, data = events.get()
+                    if event in ("section_end", "error"):
+                        remaining -= 1
+                    yield format_sse(event, data)
+            finally:
+                executor.shutdown(wait=False)
+        yield format_sse("done", {})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# --- 대시보드 미리 계산 ---
+# 저장된 위젯의 차트 응답과 분석 보고서를 백그라운드 스레드가 미리 만들어 둡니다 (scheduler.py).
+# 스레드는 서버 진입점(python app.py, asgi_app의 before_serving)에서만 시작하므로, 모듈을 불러오기만 하는
+# 벤치마크나 테스트에서는 돌지 않습니다. DASHBOARD_PRECOMPUTE_INTERVAL=0이면 서버에서도 띄우지 않습니다.
+PRECOMPUTE_INTERVAL = float(os.getenv('DASHBOARD_PRECOMPUTE_INTERVAL', PRECOMPUTE_INTERVAL_SECONDS))
+# 미리 계산한 차트는 위젯 크기를 모르므로 고정된 점 수로 다운샘플링하고, 테이블 데이터는 싣지 않습니다.
+PRECOMPUTE_MAX_POINTS = 500
+
+
+def precompute_chart(prompt):
+    """위젯 프롬프트의 차트 응답(기본 형식 JSON 문자열)을 만듭니다."""
+    sql_query, query_params, plan = compile_plan(get_chart_params(prompt))
+    with db_pool.connection() as conn, metrics.time_stage('sql'):
+        rows = conn.execute(sql_query, tuple(query_params)).fetchall()
+    return serialize_chart_response(plan, rows, PRECOMPUTE_MAX_POINTS, include_table=False).decode('utf-8')
+
+
+def precompute_report(prompt):
+    """위젯 프롬프트의 분석 보고서(Markdown)를 만듭니다."""
+    if not llm_client:
+        raise GeminiNotReadyError()
+    full_report_prompt = prepare_report_prompt(prompt)
+    if full_report_prompt is None:
+        return "분석할 데이터를 찾을 수 없습니다."
+    with metrics.time_stage('llm_report'):
+        return llm_client.generate(full_report_prompt).text
+
+
+precompute_scheduler = PrecomputeScheduler(db_pool, {'chart': precompute_chart, 'report': precompute_report},
+                                           interval=PRECOMPUTE_INTERVAL)
+
+
+def start_precompute_scheduler():
+    """미리 계산 스레드를 시작합니다. 서버 진입점에서만 호출합니다."""
+    if PRECOMPUTE_INTERVAL > 0:
+        precompute_scheduler.start()
+
+
+@app.route('/api/dashboards/<dashboard_id>/precomputed', methods=['GET'])
+def get_precomputed_dashboard(dashboard_id):
+    """대시보드 위젯마다 미리 계산된 차트 응답과 분석 보고서를 계산 시각, 최신 여부와 함께 반환합니다.
+
+    결과가 없거나 오래된 위젯이 있으면 스케줄러에 다시 계산을 요청하고, 가진 결과는 그대로 돌려줍니다.
+    """
+    conn = get_db_connection()
+    layout = load_layout(conn, dashboard_id)
+    if layout is None:
+        return jsonify({"error": "Dashboard not found"}), 404
+    data_version, entries = load_precomputed(conn, dashboard_id)
+
+    widgets = []
+    for item in layout:
+        prompt = item.get('initialPrompt')
+        stored = entries.get(prompt, {})
+        widgets.append({"i": item.get('i'), "prompt": prompt,
+                        "chart": stored.get('chart'), "report": stored.get('report')})
+    if any(widget["prompt"] and not (widget["chart"] and widget["chart"]["fresh"]) for widget in widgets):
+        precompute_scheduler.trigger()
+    return jsonify({"widgets": widgets, "dataVersion": data_version})
+
+
+@app.route('/api/precompute', methods=['GET', 'POST'])
+def handle_precompute():
+    """미리 계산 스케줄러의 실행 통계를 조회하거나, 곧바로 다시 확인하도록 요청합니다."""
+    if request.method == 'POST':
+        precompute_scheduler.trigger()
+        return jsonify({"status": "scheduled"}), 202
+    return jsonify(precompute_scheduler.stats())
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """요청 단계별 지연 시간 히스토그램, 토큰 사용량, 캐시/LLM/연결 풀 통계를 Prometheus 텍스트 형식으로 반환합니다."""
+    return Response(metrics.render(component_metrics()), mimetype='text/plain; version=0.0.4')
+
+
+def component_metrics():
+    """캐시, LLM 클라이언트, 연결 풀이 각자 집계하는 통계를 (이름, 타입, 설명, 값) 목록으로 만듭니다."""
+    plan_stats = plan_cache.stats()
+    result_stats = result_cache.stats()
+    pool_stats = db_pool.stats()
+    precompute_stats = precompute_scheduler.stats()
+    extra = [
+        ('plan_cache_hits_total', 'counter', "쿼리 플랜 캐시 적중 수 (메모리 + DB)", plan_stats['hits'] + plan_stats['db_hits']),
+        ('plan_cache_misses_total', 'counter', "쿼리 플랜 캐시 실패 수", plan_stats['misses']),
+        ('result_cache_hits_total', 'counter', "차트 결과 캐시 적중 수", result_stats['hits']),
+        ('result_cache_misses_total', 'counter', "차트 결과 캐시 실패 수", result_stats['misses']),
+        ('result_cache_bytes', 'gauge', "차트 결과 캐시에 저장된 응답 크기 합계", result_stats['bytes']),
+        ('db_pool_connections', 'gauge', "연결 풀이 연 SQLite 연결 수", pool_stats['size']),
+        ('db_pool_idle_connections', 'gauge', "연결 풀의 유휴 연결 수", pool_stats['idle']),
+        ('db_pool_waiting', 'gauge', "연결 풀에서 연결을 기다리는 스레드 수", pool_stats['waiting']),
+        ('precompute_runs_total', 'counter', "대시보드 미리 계산 실행 수", precompute_stats['runs']),
+        ('precompute_computed_total', 'counter', "미리 계산한 차트/보고서 수", precompute_stats['computed']),
+        ('precompute_errors_total', 'counter', "미리 계산에 실패한 차트/보고서 수", precompute_stats['errors']),
+    ]
+    if llm_client:
+        llm_stats = llm_client.stats()
+        extra += [
+            ('llm_calls_total', 'counter', "Gemini 호출 수 (재시도 포함)", llm_stats['calls']),
+            ('llm_retries_total', 'counter', "Gemini 호출 재시도 수", llm_stats['retries']),
+            ('llm_deduplicated_total', 'counter', "진행 중인 호출을 공유한 요청 수", llm_stats['deduplicated']),
+            ('llm_in_flight', 'gauge', "진행 중인 Gemini 호출 수", llm_stats['in_flight']),
+        ]
+    return extra
+
+
+@app.route('/api/plan-cache', methods=['GET', 'DELETE'])
+def handle_plan_cache():
+    """쿼리 플랜 캐시의 적중/실패 통계를 조회하거나 캐시를 비웁니다."""
+    if request.method == 'DELETE':
+        plan_cache.clear()
+        return jsonify({"status": "success"})
+    return jsonify(plan_cache.stats())
+
+
+@app.route('/api/result-cache', methods=['GET', 'DELETE'])
+def handle_result_cache():
+    """차트 결과 캐시의 적중/실패 통계를 조회하거나 캐시를 비웁니다."""
+    if request.method == 'DELETE':
+        result_cache.clear()
+        return jsonify({"status": "success"})
+    return jsonify(result_cache.stats())
+
+
 if __name__ == '__main__':
+    # debug=True의 리로더는 파일 감시용 부모 프로세스와 실제로 요청을 받는 자식 프로세스로 나뉘므로 자식에서만 시작합니다.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_precompute_scheduler()
     # 개발 환경에서만 debug=True 사용
     app.run(debug=True, port=5000)
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import time
+
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart, Response, g, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+import app as wsgi
+from async_db import AsyncConnectionPool
+from chart_format import CHART_FORMAT_COMPACT
+from dashboards import DASHBOARD_EXISTS_QUERY, WIDGETS_QUERY, rows_to_layout
+from metrics import current_endpoint, metrics
+from query_plan import compile_plan
+from result_cache import DATA_VERSION_QUERY, make_etag, result_cache_key
+from scheduler import PRECOMPUTED_QUERY, precomputed_entries
+
+# --- 운영용 ASGI 앱 ---
+# Gemini 응답을 기다리는 엔드포인트(차트 생성, 보고서, 대시보드 일괄 렌더링/보고서 스트리밍)는
+# Quart 비동기 핸들러로 처리해, 응답을 기다리는 동안 워커 스레드를 점유하지 않습니다.
+# 나머지 엔드포인트는 app.py의 Flask 앱에 그대로 위임하며, 캐시와 LLM 클라이언트도 Flask 앱과 공유합니다.
+# 응답 직렬화, 피벗, 다운샘플링, 보고서 요약처럼 CPU를 쓰는 app.py 함수는 asyncio.to_thread로 실행해
+# 그동안 이벤트 루프가 다른 요청을 처리하게 합니다 (컨텍스트 변수가 복사되므로 단계별 지표 레이블도 유지됨).
+# 실행: python serve.py (Hypercorn, 다중 워커 프로세스)
+
+# Flask로 위임하는 요청의 본문 상한 (WSGI 어댑터가 본문 전체를 메모리에 읽음).
+# 이보다 큰 파일은 ingest.py CLI로 적재합니다.
+ASGI_WSGI_MAX_BODY_BYTES = 256 * 1024 * 1024
+
+logger = logging.getLogger('dashboard.asgi')
+
+quart_app = Quart(__name__)
+adb_pool = AsyncConnectionPool(wsgi.DB_PATH)
+flask_fallback = AsyncioWSGIMiddleware(wsgi.app, max_body_size=ASGI_WSGI_MAX_BODY_BYTES)
+
+
+@quart_app.before_serving
+async def start_precompute():
+    wsgi.start_precompute_scheduler()
+
+
+@quart_app.after_serving
+async def stop_precompute():
+    await asyncio.to_thread(wsgi.precompute_scheduler.stop)  # 계산 중인 항목이 끝날 때까지 기다림
+
+
+@quart_app.after_serving
+async def close_db_pool():
+    await adb_pool.close_all()
+
+
+@quart_app.before_request
+async def start_request_metrics():
+    current_endpoint.set(request.endpoint or 'unknown')
+    g.request_started = time.perf_counter()
+
+
+@quart_app.after_request
+async def record_request_metrics(response):
+    wsgi.record_request(request.endpoint, request.method, response.status_code, g.pop('request_started', None))
+    return response
+
+
+async def fetch_rows(sql_query, query_params):
+    with metrics.time_stage('sql'):
+        return await adb_pool.fetchall(sql_query, query_params)
+
+
+def llm_not_ready_response():
+    return jsonify({"error": wsgi.GEMINI_NOT_READY_MESSAGE}), 500
+
+
+async def get_chart_params(prompt):
+    """app.get_chart_params()의 비동기 버전. Gemini 응답은 await로 기다립니다."""
+    # 플랜 캐시는 SQLite 조회/저장을 포함하므로 짧게 스레드에서 실행합니다.
+    params = await asyncio.to_thread(wsgi.cached_chart_params, prompt)
+    if params is not None:
+        logger.debug("쿼리 플랜 캐시 적중: params=%s", params)
+        return params
+
+    if not wsgi.llm_client:
+        raise wsgi.GeminiNotReadyError()
+
+    with metrics.time_stage('llm_plan'):
+        response = await wsgi.llm_client.agenerate(wsgi.build_chart_prompt(prompt))
+    return await asyncio.to_thread(wsgi.parse_chart_plan, prompt, response.text)
+
+
+async def prepare_report_prompt(chart_prompt):
+    """app.prepare_report_prompt()의 비동기 버전."""
+    params = await get_chart_params(chart_prompt)
+    sql_query, query_params, plan = compile_plan(params)
+    rows_for_chart = await fetch_rows(sql_query, query_params)
+    return await asyncio.to_thread(wsgi.format_report_prompt, chart_prompt, rows_for_chart, plan)
+
+
+async def load_layout(dashboard_id):
+    """대시보드 레이아웃 목록을 반환합니다. 대시보드가 없으면 None. (dashboards.load_layout의 비동기 버전)"""
+    rows = await adb_pool.fetchall(WIDGETS_QUERY, (dashboard_id,))
+    if not rows and await adb_pool.fetchone(DASHBOARD_EXISTS_QUERY, (dashboard_id,)) is None:
+        return None
+    return rows_to_layout(rows)
+
+
+@quart_app.route('/api/chart', methods=['POST'])
+async def generate_chart():
+    """사용자 프롬프트를 기반으로 차트 데이터를 생성합니다. (app.generate_chart와 같은 응답)"""
+    body = await request.get_json()
+    prompt = body.get('prompt', '')
+    if not prompt:
+        return jsonify({"error": "프롬프트가 필요합니다."}), 400
+
+    try:
+        max_points, downsample = wsgi.parse_downsample_options(body)
+        chart_format, include_table = wsgi.parse_format_options(body)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        params = await get_chart_params(prompt)
+    except wsgi.GeminiNotReadyError as e:
+        logger.error("Gemini 분석 불가: %s", e)
+        return jsonify({"error": f"Gemini 분석 중 오류 발생: {e}"}), 500
+    except Exception as e:
+        logger.exception("Gemini 분석 실패: prompt=%r", prompt)
+        return jsonify({"error": f"Gemini 분석 중 오류 발생: {e}"}), 500
+
+    try:
+        sql_query, query_params, plan = compile_plan(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 500
+
+    encoding = wsgi.chart_encoding(chart_format, request.accept_encodings)
+    cache_key = result_cache_key(sql_query, query_params, plan, max_points, downsample,
+                                 chart_format, include_table, encoding)
+    data_version = (await adb_pool.fetchone(DATA_VERSION_QUERY))[0]
+    etag = make_etag(data_version, cache_key)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        chart_body = wsgi.result_cache.get(cache_key, data_version)
+        if chart_body is None:
+            try:
+                rows = await fetch_rows(sql_query, query_params)
+            except Exception as e:
+                logger.exception("차트 쿼리 실행 실패: sql=%s", sql_query)
+                return jsonify({"error": f"데이터베이스 쿼리 실행 중 오류 발생: {e}"}), 500
+            chart_body = await asyncio.to_thread(wsgi.serialize_chart_response, plan, rows, max_points, downsample,
+                                                 chart_format, include_table, encoding)
+            wsgi.result_cache.put(cache_key, data_version, chart_body)
+        response = Response(chart_body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    if chart_format == CHART_FORMAT_COMPACT:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+@quart_app.route('/api/dashboards/<dashboard_id>/render', methods=['POST'])
+async def render_dashboard(dashboard_id):
+    """저장된 레이아웃의 모든 위젯 차트 데이터를 한 번의 요청으로 생성합니다.
+
+    위젯 프롬프트 해석과 합친 쿼리(app.merge_queries)를 모두 동시에 기다립니다.
+    동시 Gemini 호출 수는 LLMClient가 제한합니다.
+    """
+    try:
+        max_points, downsample = wsgi.parse_downsample_options(await request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    layout = await load_layout(dashboard_id)
+    if layout is None:
+        return jsonify({"error": "Dashboard not found"}), 404
+
+    # 1. 중복을 제거한 위젯 프롬프트를 동시에 해석
+    prompts = sorted({item.get('initialPrompt') for item in layout if item.get('initialPrompt')})
+    results = await asyncio.gather(*(get_chart_params(prompt) for prompt in prompts), return_exceptions=True)
+    plans = dict(zip(prompts, results))
+    for prompt, params in plans.items():
+        if isinstance(params, Exception):
+            logger.warning("위젯 프롬프트 해석 실패: prompt=%r error=%s", prompt, params)
+
+    # 2. 필터가 같은 스캔과 같은 SQL은 한 번만 실행
+    planned, query_keys = wsgi.merge_queries(wsgi.compile_widgets(layout, plans))
+    rows = await asyncio.gather(*(fetch_rows(*key) for key in query_keys), return_exceptions=True)
+    query_results = dict(zip(query_keys, rows))
+
+    widgets = await asyncio.to_thread(wsgi.fill_widgets, planned, query_results, max_points, downsample)
+    return jsonify({"widgets": widgets, "queryCount": len(query_results)})
+
+
+@quart_app.route('/api/report', methods=['POST'])
+async def create_report():
+    """대시보드 데이터를 기반으로 분석 보고서를 생성합니다."""
+    if not wsgi.llm_client:
+        return llm_not_ready_response()
+
+    chart_prompt = (await request.get_json()).get('prompt', '')
+    if not chart_prompt:
+        return jsonify({"error": "프롬프트가 필요합니다."}), 400
+
+    try:
+        full_report_prompt = await prepare_report_prompt(chart_prompt)
+        if full_report_prompt is None:
+            return jsonify({"analysis": "분석할 데이터를 찾을 수 없습니다."})
+
+        with metrics.time_stage('llm_report'):
+            report_response = await wsgi.llm_client.agenerate(full_report_prompt)
+        return jsonify({"analysis": report_response.text})
+
+    except Exception as e:
+        logger.exception("보고서 생성 실패: chart_prompt=%r", chart_prompt)
+        return jsonify({"error": f"보고서 생성 중 오류 발생: {e}"}), 500
+
+
+@quart_app.route('/api/dashboards/<dashboard_id>/report', methods=['GET'])
+async def stream_dashboard_report(dashboard_id):
+    """대시보드의 모든 차트 분석을 동시에 생성하고, 완성되는 대로 SSE로 스트리밍합니다. 미리 계산된 최신 분석은 바로 보냅니다."""
+    llm_client = wsgi.llm_client
+    if not llm_client:
+        return llm_not_ready_response()
+
+    layout = await load_layout(dashboard_id)
+    if layout is None:
+        return jsonify({"error": "Dashboard not found"}), 404
+    widgets = [item for item in layout if item.get('initialPrompt')]
+    data_version = (await adb_pool.fetchone(DATA_VERSION_QUERY))[0]
+    entries = precomputed_entries(await adb_pool.fetchall(PRECOMPUTED_QUERY, (dashboard_id,)), data_version)
+    precomputed_messages, pending = wsgi.split_precomputed_reports(widgets, entries)
+
+    events = asyncio.Queue()
+    slots = asyncio.Semaphore(wsgi.REPORT_MAX_WORKERS)
+
+    async def analyze_widget(widget):
+        widget_id = widget.get('i')
+        chart_prompt = widget['initialPrompt']
+        async with slots:
+            try:
+                full_report_prompt = await prepare_report_prompt(chart_prompt)
+                if full_report_prompt is None:
+                    events.put_nowait(("chunk", {"i": widget_id, "text": "분석할 데이터를 찾을 수 없습니다."}))
+                else:
+                    with metrics.time_stage('llm_report'):
+                        async for text in llm_client.astream(full_report_prompt):
+                            events.put_nowait(("chunk", {"i": widget_id, "text": text}))
+                events.put_nowait(("section_end", {"i": widget_id}))
+            except Exception as e:
+                logger.warning("보고서 생성 실패: chart_prompt=%r error=%s", chart_prompt, e)
+                events.put_nowait(("error", {"i": widget_id, "error": f"보고서 생성 중 오류 발생: {e}"}))
+
+    async def generate():
+        yield wsgi.format_sse("sections", [{"i": w.get('i'), "prompt": w['initialPrompt']} for w in widgets])
+        for message in precomputed_messages:
+            yield message
+        tasks = [asyncio.ensure_future(analyze_widget(widget)) for widget in pending]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event, data = await events.get()
+                if event in ("section_end", "error"):
+                    remaining -= 1
+                yield wsgi.format_sse(event, data)
+        finally:
+            for task in tasks:  # 클라이언트가 연결을 끊으면 남은 분석을 취소
+                task.cancel()
+        yield wsgi.format_sse("done", {})
+
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.timeout = None  # 분석이 오래 걸려도 스트림을 끊지 않음
+    return response
+
+
+_async_routes = quart_app.url_map.bind('')
+
+
+def is_async_route(path, method):
+    """Quart 비동기 핸들러가 처리하는 경로인지 확인합니다."""
+    try:
+        _async_routes.match(path, method=method)
+    except HTTPException:
+        return False
+    return True
+
+
+async def application(scope, receive, send):
+    """ASGI 진입점. 비동기 핸들러가 없는 HTTP 요청은 Flask 앱으로 보냅니다."""
+    if scope['type'] == 'http' and not is_async_route(scope['path'], scope['method']):
+        await flask_fallback(scope, receive, send)
+    else:
+        await quart_app(scope, receive, send)
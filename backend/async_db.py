@@ -0,0 +1,90 @@
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+from db import (DB_BUSY_TIMEOUT_SECONDS, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT_SECONDS, DB_PRAGMAS,
+                DB_STATEMENT_CACHE_SIZE, PoolTimeoutError)
+
+
+class AsyncConnectionPool:
+    """db.ConnectionPool의 asyncio 버전 (asgi_app.py에서 사용).
+
+    aiosqlite 연결은 연결마다 전용 스레드에서 쿼리를 실행하므로, 쿼리를 기다리는 동안
+    이벤트 루프가 막히지 않습니다. 설정(PRAGMA, 최대 연결 수, 대기 시간)은 동기 풀과 같습니다.
+    한 이벤트 루프 안에서만 사용합니다.
+    """
+
+    def __init__(self, db_path, max_size=DB_POOL_MAX_SIZE, timeout=DB_POOL_TIMEOUT_SECONDS,
+                 pragmas=DB_PRAGMAS):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self._idle = asyncio.LifoQueue()  # 최근에 쓴 연결(캐시가 따뜻한 연결)을 먼저 재사용
+        self._created = 0
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_SECONDS,
+                                       cached_statements=DB_STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas:
+            await conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    async def acquire(self):
+        """풀에서 연결을 빌립니다. 여유가 없으면 새로 만들거나 반납을 기다립니다."""
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        if self._created < self.max_size:
+            self._created += 1
+            try:
+                return await self._connect()
+            except Exception:
+                self._created -= 1
+                raise
+        try:
+            return await asyncio.wait_for(self._idle.get(), self.timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeoutError(f"{self.timeout:g}초 안에 사용할 수 있는 데이터베이스 연결이 없습니다.") from None
+
+    async def release(self, conn):
+        """연결을 풀에 반납합니다. 끝나지 않은 트랜잭션은 롤백합니다."""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except sqlite3.Error:
+            await conn.close()
+            self._created -= 1
+            return
+        self._idle.put_nowait(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        """async with 문 안에서만 연결을 빌려 쓰는 컨텍스트 매니저."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def fetchall(self, sql, params=()):
+        async with self.connection() as conn:
+            async with conn.execute(sql, tuple(params)) as cursor:
+                return await cursor.fetchall()
+
+    async def fetchone(self, sql, params=()):
+        async with self.connection() as conn:
+            async with conn.execute(sql, tuple(params)) as cursor:
+                return await cursor.fetchone()
+
+    async def close_all(self):
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()
+            self._created -= 1
+
+    def stats(self):
+        return {"size": self._created, "idle": self._idle.qsize(), "max_size": self.max_size}
@@ -0,0 +1,126 @@
+"""동시 읽기 요청과 레이아웃 쓰기가 섞인 상황에서 초당 처리 요청 수를 측정합니다.
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_db_load --rows 200000 --readers 8 --duration 10
+    python -m benchmarks.bench_db_load --journal-mode DELETE   # WAL 미사용 시와 비교
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.datasets import DATASET_PROMPTS, create_dataset, dashboard_layout
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(latencies, errors, duration):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--journal-mode', default='WAL')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        create_dataset(db_path, args.rows)
+        os.environ['DASHBOARD_DB_PATH'] = db_path
+
+        import app
+        from db import DB_PRAGMAS
+        from llm_client import LLMClient
+        from benchmarks.fake_gemini import FakeGeminiModel
+
+        app.db_pool.pragmas = tuple((name, args.journal_mode if name == 'journal_mode' else value)
+                                    for name, value in DB_PRAGMAS)
+        app.db_pool.close_all()
+        app.llm_client = LLMClient(FakeGeminiModel(), rate_per_second=1000, burst=1000)
+
+        # 쿼리 플랜 캐시를 데워 LLM 대신 DB 경로만 측정
+        warm_client = app.app.test_client()
+        for prompt in DATASET_PROMPTS:
+            warm_client.post('/api/chart', json={"prompt": prompt})
+
+        stop = threading.Event()
+        reader_latencies, writer_latencies = [], []
+        errors = {"reader": 0, "writer": 0}
+        lock = threading.Lock()
+
+        def reader(index):
+            client = app.app.test_client()
+            requests = [("GET", '/api/dashboards/1', None)] + [
+                ("POST", '/api/chart', {"prompt": prompt}) for prompt in DATASET_PROMPTS
+            ]
+            n = index
+            while not stop.is_set():
+                method, url, body = requests[n % len(requests)]
+                n += 1
+                started = time.perf_counter()
+                response = client.open(url, method=method, json=body)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if response.status_code == 200:
+                        reader_latencies.append(elapsed)
+                    else:
+                        errors["reader"] += 1
+
+        def writer():
+            client = app.app.test_client()
+            layout = dashboard_layout()
+            n = 0
+            while not stop.is_set():
+                layout[0]["x"] = n % 6  # 드래그를 흉내 내는 위치 변경
+                n += 1
+                started = time.perf_counter()
+                response = client.post('/api/dashboards/1', json={"layout": layout})
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if response.status_code == 200:
+                        writer_latencies.append(elapsed)
+                    else:
+                        errors["writer"] += 1
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+        threads.append(threading.Thread(target=writer))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+        app.db_pool.close_all()
+
+    print(json.dumps({
+        "rows": args.rows,
+        "readers": args.readers,
+        "journal_mode": args.journal_mode,
+        "duration_s": round(duration, 2),
+        "reader": summarize(reader_latencies, errors["reader"], duration),
+        "writer": summarize(writer_latencies, errors["writer"], duration),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
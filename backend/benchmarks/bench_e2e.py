@@ -0,0 +1,240 @@
+"""가짜 Gemini 모델을 붙인 Flask 앱의 주요 API를 데이터셋 크기별로 호출해 지연 시간/처리량/메모리를 측정합니다.
+
+데이터셋 크기마다 별도 프로세스에서 app.py를 불러와, 최대 메모리 사용량(peak RSS)이 크기별로 따로 잡힙니다.
+시나리오마다 먼저 한 명의 사용자가 순서대로 요청한 뒤(sequential), --users명이 동시에 요청합니다(load).
+결과는 JSON으로 출력하며, --baseline으로 이전 결과를 주면 p95 지연 시간이 --max-regression 이상 늘어난
+시나리오를 알리고 종료 코드 1로 끝납니다 (배포 전 성능 회귀 확인용).
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_e2e --sizes 10000,100000,1000000 --output bench.json
+    python -m benchmarks.bench_e2e --cold                      # 플랜/결과 캐시 없이 매번 Gemini 호출과 SQL 실행
+    python -m benchmarks.bench_e2e --baseline bench.json       # 이전 결과와 비교
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_db_load import percentile
+from benchmarks.bench_ingest import peak_rss_mib
+from benchmarks.datasets import DATASET_PROMPTS, create_dataset, dashboard_layout
+
+BENCH_SCENARIOS = ('chart', 'report', 'dashboard_get', 'dashboard_save', 'dashboard_render', 'dashboard_precomputed')
+BENCH_DEFAULT_SIZES = '10000,100000,500000'
+BENCH_MAX_REGRESSION = 0.2  # p95가 기준보다 20% 넘게 늘면 회귀로 판단
+
+
+def scenario_requests(scenario, cold):
+    """시나리오의 n번째 요청 (method, url, json body)을 만드는 함수를 반환합니다.
+
+    cold이면 프롬프트 끝에 요청 번호를 붙여 쿼리 플랜 캐시를 거치지 않게 합니다.
+    (FakeGeminiModel은 프롬프트 안의 CODE 이름으로 플랜을 고르므로 응답은 같습니다.)
+    """
+    def prompt(n):
+        base = DATASET_PROMPTS[n % len(DATASET_PROMPTS)]
+        return f"{base} #{n}" if cold else base
+
+    layout = dashboard_layout()
+    if scenario == 'chart':
+        return lambda n: ('POST', '/api/chart', {"prompt": prompt(n)})
+    if scenario == 'report':
+        return lambda n: ('POST', '/api/report', {"prompt": prompt(n)})
+    if scenario == 'dashboard_get':
+        return lambda n: ('GET', '/api/dashboards/1', None)
+    if scenario == 'dashboard_save':
+        # 드래그를 흉내 내 첫 위젯 위치만 바꿔 저장 (레이아웃 자체는 그대로 유지)
+        return lambda n: ('POST', '/api/dashboards/1',
+                          {"layout": [dict(layout[0], x=n % 6)] + layout[1:]})
+    if scenario == 'dashboard_render':
+        return lambda n: ('POST', '/api/dashboards/1/render', {})
+    if scenario == 'dashboard_precomputed':
+        return lambda n: ('GET', '/api/dashboards/1/precomputed', None)
+    raise ValueError(f"알 수 없는 시나리오입니다: {scenario}")
+
+
+def summarize(latencies, errors, duration):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1) if duration else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def run_sequential(app, make_request, iterations):
+    client = app.test_client()
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for n in range(iterations):
+        method, url, body = make_request(n)
+        request_started = time.perf_counter()
+        response = client.open(url, method=method, json=body)
+        elapsed = time.perf_counter() - request_started
+        if response.status_code == 200:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def run_load(app, make_request, users, duration, counter):
+    """users개의 스레드가 duration초 동안 각자 test client로 요청을 보냅니다."""
+    stop = threading.Event()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def user():
+        client = app.test_client()
+        while not stop.is_set():
+            method, url, body = make_request(next(counter))
+            request_started = time.perf_counter()
+            response = client.open(url, method=method, json=body)
+            elapsed = time.perf_counter() - request_started
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=user) for _ in range(users)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+def run_worker(args):
+    """한 데이터셋(DASHBOARD_DB_PATH)에 대해 모든 시나리오를 실행하고 결과를 JSON 한 줄로 출력합니다."""
+    import app
+    from benchmarks.fake_gemini import FakeGeminiModel
+    from llm_client import LLMClient
+    from result_cache import ResultCache
+
+    # 속도 제한은 풀어 Gemini 지연(--latency)만 반영합니다.
+    fake_model = FakeGeminiModel(latency=args.latency)
+    app.llm_client = LLMClient(fake_model, rate_per_second=1_000_000, burst=1_000_000)
+    if args.cold:
+        app.result_cache = ResultCache(max_bytes=0)  # 어떤 응답도 저장하지 않음
+    app.plan_cache.clear()
+    if 'dashboard_precomputed' in args.scenarios:
+        # 백그라운드 스레드 대신 측정 전에 한 번 미리 계산 (Gemini 호출은 llm_calls에 넣지 않음)
+        app.precompute_scheduler.refresh()
+
+    counter = itertools.count()
+    scenarios = {}
+    for scenario in args.scenarios:
+        make_request = scenario_requests(scenario, args.cold)
+        if not args.cold:
+            # 캐시를 데운 뒤의 정상 상태를 측정 (첫 요청의 Gemini 호출/쿼리는 제외)
+            run_sequential(app.app, make_request, len(DATASET_PROMPTS))
+        calls_before = fake_model.calls
+        scenarios[scenario] = {
+            "sequential": run_sequential(app.app, make_request, args.iterations),
+            "load": run_load(app.app, make_request, args.users, args.duration, counter),
+            "llm_calls": fake_model.calls - calls_before,
+        }
+    app.db_pool.close_all()
+    print(json.dumps({"scenarios": scenarios, "peak_rss_mib": round(peak_rss_mib(), 1)}, ensure_ascii=False))
+
+
+def bench_size(rows, tmp, args):
+    db_path = os.path.join(tmp, f'bench_{rows}.db')
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):  # 마이그레이션 진행 메시지가 JSON 출력에 섞이지 않도록
+        create_dataset(db_path, rows)
+    dataset_seconds = time.perf_counter() - started
+
+    env = dict(os.environ, DASHBOARD_DB_PATH=db_path, DASHBOARD_LOG_LEVEL='WARNING', DASHBOARD_PRECOMPUTE_INTERVAL='0')
+    command = [sys.executable, '-m', 'benchmarks.bench_e2e', '--worker',
+               '--scenarios', ','.join(args.scenarios), '--iterations', str(args.iterations),
+               '--users', str(args.users), '--duration', str(args.duration), '--latency', str(args.latency)]
+    if args.cold:
+        command.append('--cold')
+    completed = subprocess.run(command, env=env, stdout=subprocess.PIPE, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    os.remove(db_path)
+    return {"rows": rows, "dataset_seconds": round(dataset_seconds, 1), **result}
+
+
+def find_regressions(results, baseline, max_regression):
+    """같은 행 수/시나리오/단계의 p95를 기준 결과와 비교해 max_regression 넘게 늘어난 항목을 반환합니다."""
+    previous = {(size['rows'], scenario, phase): stats['p95_ms']
+                for size in baseline['sizes']
+                for scenario, phases in size['scenarios'].items()
+                for phase, stats in phases.items() if isinstance(stats, dict)}
+    regressions = []
+    for size in results['sizes']:
+        for scenario, phases in size['scenarios'].items():
+            for phase, stats in phases.items():
+                before = previous.get((size['rows'], scenario, phase))
+                if not isinstance(stats, dict) or not before:
+                    continue
+                if stats['p95_ms'] > before * (1 + max_regression):
+                    regressions.append({"rows": size['rows'], "scenario": scenario, "phase": phase,
+                                        "baseline_p95_ms": before, "p95_ms": stats['p95_ms']})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=BENCH_DEFAULT_SIZES, help="데이터셋 행 수 목록 (쉼표 구분)")
+    parser.add_argument('--scenarios', default=','.join(BENCH_SCENARIOS))
+    parser.add_argument('--iterations', type=int, default=30, help="시나리오별 순차 요청 수")
+    parser.add_argument('--users', type=int, default=8, help="동시 사용자 수")
+    parser.add_argument('--duration', type=float, default=5.0, help="시나리오별 동시 요청 측정 시간(초)")
+    parser.add_argument('--latency', type=float, default=0.2, help="가짜 Gemini 응답 지연(초)")
+    parser.add_argument('--cold', action='store_true', help="플랜/결과 캐시를 거치지 않고 측정")
+    parser.add_argument('--output', help="결과 JSON을 저장할 파일")
+    parser.add_argument('--baseline', help="비교할 이전 결과 JSON 파일")
+    parser.add_argument('--max-regression', type=float, default=BENCH_MAX_REGRESSION)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    args.scenarios = args.scenarios.split(',')
+    for scenario in args.scenarios:
+        if scenario not in BENCH_SCENARIOS:
+            parser.error(f"알 수 없는 시나리오입니다: {scenario} (가능한 값: {', '.join(BENCH_SCENARIOS)})")
+
+    if args.worker:
+        run_worker(args)
+        return 0
+
+    results = {
+        "settings": {"latency_s": args.latency, "users": args.users, "iterations": args.iterations,
+                     "duration_s": args.duration, "cold": args.cold},
+        "sizes": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(size) for size in args.sizes.split(',')):
+            print(f"{rows}행 데이터셋 측정 중...", file=sys.stderr)
+            results["sizes"].append(bench_size(rows, tmp, args))
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            regressions = find_regressions(results, json.load(baseline_file), args.max_regression)
+        results["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(output + '\n')
+    return exit_code
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+"""POPULATOR 인덱스 마이그레이션 전후의 차트 쿼리 지연 시간을 측정합니다.
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_indexes --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from migrations import migrate
+
+# app.py의 차트 쿼리 빌더가 만드는 대표적인 쿼리들
+BENCH_QUERIES = [
+    ("line_by_code", "SELECT DT_ID, DATA FROM POPULATOR WHERE CODE = ?", ("CODE_007",)),
+    ("line_by_id", "SELECT DT_ID, DATA FROM POPULATOR WHERE ID = ?", ("dataset_0042",)),
+    ("pie_by_code", "SELECT NAME, COUNT(*) as count_value FROM POPULATOR WHERE CODE = ? GROUP BY NAME", ("CODE_007",)),
+]
+
+SEED_CODES = 50
+SEED_IDS = 500
+SEED_NAMES = 40
+SEED_DAYS = 3 * 365
+INDEX_MIGRATION_VERSION = 3  # _populator_indexes
+
+
+def generate_rows(count, seed=42):
+    """재현 가능한 합성 검출 이벤트 행을 생성합니다."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        day = rng.randrange(SEED_DAYS)
+        yield (
+            f"dataset_{rng.randrange(SEED_IDS):04d}",
+            f"user_{rng.randrange(SEED_NAMES):02d}",
+            f"CODE_{rng.randrange(SEED_CODES):03d}",
+            rng.randrange(1, 500),
+            time.strftime('%Y-%m-%d', time.gmtime(1672531200 + day * 86400)),
+            None,
+        )
+
+
+def seed(conn, rows):
+    conn.executemany(
+        "INSERT INTO POPULATOR (ID, NAME, CODE, DATA, DT_ID, DT_DATA) VALUES (?, ?, ?, ?, ?, ?)",
+        generate_rows(rows),
+    )
+    conn.commit()
+
+
+def measure(conn, repeat):
+    """쿼리별 지연 시간(ms)의 중앙값과 최솟값을 측정합니다."""
+    results = {}
+    for name, sql, params in BENCH_QUERIES:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        plan = " / ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        results[name] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "plan": plan,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        migrate(conn, target_version=INDEX_MIGRATION_VERSION - 1)  # 인덱스 마이그레이션 직전 스키마
+
+        started = time.perf_counter()
+        seed(conn, args.rows)
+        print(f"{args.rows:,}행 삽입: {time.perf_counter() - started:.1f}s")
+
+        before = measure(conn, args.repeat)
+
+        started = time.perf_counter()
+        migrate(conn, target_version=INDEX_MIGRATION_VERSION)
+        print(f"인덱스 마이그레이션: {time.perf_counter() - started:.1f}s")
+
+        after = measure(conn, args.repeat)
+        conn.close()
+
+    print(f"\n{'query':<14}{'before(ms)':>12}{'after(ms)':>12}{'speedup':>10}")
+    for name, _, _ in BENCH_QUERIES:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        print(f"{name:<14}{b:>12.2f}{a:>12.2f}{b / a if a else float('inf'):>9.1f}x")
+
+    print(json.dumps({"rows": args.rows, "before": before, "after": after}, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""대량 적재 처리량(rows/s)과 최대 메모리 사용량을 측정합니다.
+
+입력 CSV는 파일로 만들지 않고 한 줄씩 생성해 흘려보내므로, 최대 메모리 사용량이 행 수와
+관계없이 일정한지(청크 하나 크기) 확인할 수 있습니다.
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_ingest --rows 10000000
+    python -m benchmarks.bench_ingest --rows 1000000 --no-defer-indexes   # 인덱스/트리거 유지 시와 비교
+"""
+import argparse
+import itertools
+import json
+import os
+import resource
+import sqlite3
+import tempfile
+
+from benchmarks.datasets import create_dataset, generate_rows
+from ingest import INGEST_CHUNK_SIZE, INGEST_COLUMNS, ingest_lines
+
+BENCH_DISTINCT_LINES = 100_000
+
+
+def csv_lines(rows, distinct=BENCH_DISTINCT_LINES):
+    """generate_rows()의 합성 행을 CSV 줄로 하나씩 만들어 냅니다.
+
+    난수 생성 비용이 적재 시간에 섞이지 않도록 distinct개의 줄만 미리 만들어 반복합니다.
+    """
+    pool = [",".join("" if value is None else str(value) for value in row) + "\n"
+            for row in generate_rows(min(rows, distinct), seed=7)]
+    header = ",".join(INGEST_COLUMNS) + "\n"
+    return itertools.chain([header], (pool[index % len(pool)] for index in range(rows)))
+
+
+def peak_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KiB 단위
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--existing-rows', type=int, default=100_000, help="적재 전에 미리 넣어 둘 행 수")
+    parser.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE)
+    parser.add_argument('--defer-indexes', action=argparse.BooleanOptionalAction, default=True)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        create_dataset(db_path, args.existing_rows)
+        lines = csv_lines(args.rows)
+        rss_before = peak_rss_mib()
+
+        result = ingest_lines(db_path, lines, 'csv', args.chunk_size, args.defer_indexes)
+
+        conn = sqlite3.connect(db_path)
+        total = conn.execute("SELECT COUNT(*) FROM POPULATOR").fetchone()[0]
+        rollup_rows = conn.execute("SELECT SUM(ROW_COUNT) FROM POPULATOR_ROLLUP WHERE GRAIN = 'day'").fetchone()[0]
+        conn.close()
+        db_mib = os.path.getsize(db_path) / (1024 * 1024)
+
+    if rollup_rows != total:
+        raise AssertionError(f"롤업 행 수({rollup_rows})가 POPULATOR 행 수({total})와 다릅니다.")
+
+    print(f"{result['rows']:,}행 적재: {result['seconds']:.1f}s ({result['rows_per_second']:,} rows/s)")
+    print(json.dumps({
+        **result,
+        "chunk_size": args.chunk_size,
+        "total_rows": total,
+        "db_mib": round(db_mib, 1),
+        "peak_rss_mib_before": round(rss_before, 1),
+        "peak_rss_mib_after": round(peak_rss_mib(), 1),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
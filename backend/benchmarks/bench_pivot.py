@@ -0,0 +1,73 @@
+"""3D 차트 시리즈 피벗: 기존 중첩 루프 방식과 pivot_series의 처리 시간을 비교합니다.
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_pivot --rows 100 1000 5000 20000 100000
+"""
+import argparse
+import json
+import random
+import time
+
+from pivot import pivot_series
+
+
+def legacy_pivot(rows, x_col, y_col, group_col):
+    """user-007 이전 generate_chart의 3D 분기 (카테고리 × 그룹마다 전체 행을 훑음)."""
+    categories = sorted(list(set([row[x_col] for row in rows])))
+    groups = sorted(list(set([row[group_col] for row in rows])))
+    series = []
+    for group in groups:
+        data = []
+        for category in categories:
+            value = next((row[y_col] for row in rows if row[x_col] == category and row[group_col] == group), 0)
+            data.append(value)
+        series.append({"name": group, "data": data})
+    return categories, series
+
+
+def make_rows(count, seed=7):
+    """하루 단위 카테고리와 10개 그룹을 가진 행 (카테고리 수는 행 수에 비례)."""
+    rng = random.Random(seed)
+    n_days = max(1, count // 20)
+    return [
+        {"DT_ID": f"day_{rng.randrange(n_days):05d}", "CODE": f"group_{rng.randrange(10)}",
+         "DATA": rng.randrange(1, 500)}
+        for _ in range(count)
+    ]
+
+
+def time_call(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 5000, 20000, 100000])
+    parser.add_argument('--legacy-max-rows', type=int, default=20000,
+                        help="이보다 큰 입력에서는 기존 방식을 측정하지 않습니다 (너무 느림)")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rows':>8}{'legacy(ms)':>14}{'pivot sum(ms)':>15}{'pivot avg(ms)':>15}{'speedup':>10}")
+    for count in args.rows:
+        rows = make_rows(count)
+        pivot_ms = time_call(pivot_series, rows, "DT_ID", "DATA", "CODE", "sum")
+        avg_ms = time_call(pivot_series, rows, "DT_ID", "DATA", "CODE", "avg")
+        legacy_ms = None
+        if count <= args.legacy_max_rows:
+            legacy_ms = time_call(legacy_pivot, rows, "DT_ID", "DATA", "CODE", repeat=1)
+        speedup = f"{legacy_ms / pivot_ms:.0f}x" if legacy_ms else "-"
+        legacy_text = f"{legacy_ms:.1f}" if legacy_ms else "skipped"
+        print(f"{count:>8}{legacy_text:>14}{pivot_ms:>15.2f}{avg_ms:>15.2f}{speedup:>10}")
+        results.append({"rows": count, "legacy_ms": legacy_ms, "pivot_sum_ms": pivot_ms, "pivot_avg_ms": avg_ms})
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
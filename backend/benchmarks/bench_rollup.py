@@ -0,0 +1,75 @@
+"""같은 차트 플랜을 원본 POPULATOR 집계와 롤업 테이블로 각각 답할 때의 지연 시간을 비교합니다.
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_rollup --rows 1000000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_indexes import generate_rows
+from migrations import migrate
+from query_plan import compile_plan
+
+BENCH_PLANS = [
+    ("monthly_sum", {"chart_type": "line", "x_axis": "DT_ID", "y_axis": "DATA", "time_grain": "month",
+                     "aggregate": "sum", "filters": {"CODE": "CODE_007"}}),
+    ("daily_max", {"chart_type": "bar", "x_axis": "DT_ID", "y_axis": "DATA", "time_grain": "day",
+                   "aggregate": "max", "filters": {"CODE": "CODE_007"}}),
+    ("daily_all_codes", {"chart_type": "line", "x_axis": "DT_ID", "y_axis": "COUNT", "time_grain": "day",
+                         "aggregate": "count"}),
+    ("pie_by_code", {"chart_type": "pie", "x_axis": "NAME", "y_axis": "COUNT", "filters": {"CODE": "CODE_007"}}),
+]
+
+
+def time_query(conn, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        migrate(conn)
+
+        # 트리거가 켜진 상태에서 삽입하므로 롤업 유지 비용도 함께 측정됩니다.
+        started = time.perf_counter()
+        conn.executemany(
+            "INSERT INTO POPULATOR (ID, NAME, CODE, DATA, DT_ID, DT_DATA) VALUES (?, ?, ?, ?, ?, ?)",
+            generate_rows(args.rows),
+        )
+        conn.commit()
+        insert_s = time.perf_counter() - started
+        print(f"{args.rows:,}행 삽입 (롤업 트리거 포함): {insert_s:.1f}s")
+        conn.execute("ANALYZE")
+
+        print(f"\n{'plan':<18}{'raw(ms)':>10}{'rollup(ms)':>12}{'speedup':>10}{'buckets':>9}")
+        for name, plan in BENCH_PLANS:
+            raw_ms, raw_rows = time_query(conn, *compile_plan(plan, use_rollup=False)[:2], args.repeat)
+            rollup_ms, rollup_rows = time_query(conn, *compile_plan(plan)[:2], args.repeat)
+            if len(raw_rows) != len(rollup_rows):
+                raise AssertionError(f"{name}: 원본 {len(raw_rows)}행, 롤업 {len(rollup_rows)}행")
+            print(f"{name:<18}{raw_ms:>10.2f}{rollup_ms:>12.2f}{raw_ms / rollup_ms:>9.1f}x{len(rollup_rows):>9}")
+            results.append({"plan": name, "raw_ms": round(raw_ms, 3), "rollup_ms": round(rollup_ms, 3),
+                            "buckets": len(rollup_rows)})
+        conn.close()
+
+    print(json.dumps({"rows": args.rows, "insert_s": round(insert_s, 2), "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
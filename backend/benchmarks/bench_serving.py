@@ -0,0 +1,187 @@
+"""가짜 Gemini(고정 지연)를 붙인 서버에 동시 사용자 수를 늘려 가며 차트 요청을 보내 처리량을 비교합니다.
+
+flask: 기존 개발 서버(app.py, 요청마다 스레드)
+asgi:  운영 모드(asgi_app.py, Hypercorn 워커 1개, Gemini 응답을 await)
+
+각 요청은 서로 다른 프롬프트를 보내 쿼리 플랜 캐시를 거치지 않고 매번 Gemini 호출을 기다리며,
+서버 프로세스의 최대 스레드 수를 함께 기록합니다 (Linux /proc 사용).
+
+사용법 (backend 디렉터리에서):
+    python -m benchmarks.bench_serving --users 1,8,32,128 --latency 0.5
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_db_load import percentile
+from benchmarks.datasets import DATASET_PROMPTS, create_dataset
+
+BENCH_PORT = 5950
+BENCH_MODES = ('flask', 'asgi')
+BENCH_STARTUP_TIMEOUT_SECONDS = 30.0
+
+
+def serve(mode, port, latency, llm_concurrency):
+    """벤치마크용 서버를 현재 프로세스에서 실행합니다. (DASHBOARD_DB_PATH는 호출 전에 설정)"""
+    import app
+    from benchmarks.fake_gemini import FakeGeminiModel
+    from llm_client import LLMClient
+
+    # 속도 제한은 풀고 동시 호출 수만 제한해, 서버가 대기 중인 요청을 어떻게 다루는지만 비교합니다.
+    app.llm_client = LLMClient(FakeGeminiModel(latency=latency), max_workers=llm_concurrency,
+                               rate_per_second=1_000_000, burst=1_000_000)
+    if mode == 'flask':
+        from werkzeug.serving import make_server
+        make_server('127.0.0.1', port, app.app, threaded=True).serve_forever()
+    else:
+        import asyncio
+        from hypercorn.asyncio import serve as hypercorn_serve
+        from hypercorn.config import Config
+        import asgi_app
+
+        config = Config()
+        config.bind = [f'127.0.0.1:{port}']
+        config.backlog = 1024
+        asyncio.run(hypercorn_serve(asgi_app.application, config))
+
+
+def wait_until_ready(port, process):
+    deadline = time.monotonic() + BENCH_STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"서버 프로세스가 종료되었습니다 (exit {process.returncode}).")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/plan-cache')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("서버가 제한 시간 안에 시작되지 않았습니다.")
+
+
+def thread_count(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('Threads:'):
+                return int(line.split()[1])
+    return 0
+
+
+def run_level(port, pid, users, duration, counter):
+    """users명의 사용자가 duration초 동안 차트 요청을 보내고 결과를 집계합니다."""
+    stop = threading.Event()
+    latencies, errors = [], []
+    peak_threads = [thread_count(pid)]
+    lock = threading.Lock()
+
+    def user():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while not stop.is_set():
+            # 플랜 캐시를 거치지 않도록 요청마다 다른 프롬프트 (FakeGeminiModel은 CODE 이름으로 플랜을 고름)
+            n = next(counter)
+            body = json.dumps({"prompt": f"{DATASET_PROMPTS[n % len(DATASET_PROMPTS)]} #{n}"})
+            started = time.perf_counter()
+            try:
+                conn.request('POST', '/api/chart', body, {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+        conn.close()
+
+    def sample_threads():
+        while not stop.wait(0.05):
+            peak_threads[0] = max(peak_threads[0], thread_count(pid))
+
+    threads = [threading.Thread(target=user) for _ in range(users)]
+    sampler = threading.Thread(target=sample_threads)
+    started = time.perf_counter()
+    for thread in threads + [sampler]:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads + [sampler]:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "users": users,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "server_peak_threads": peak_threads[0],
+    }
+
+
+def bench_mode(mode, db_path, args):
+    env = dict(os.environ, DASHBOARD_DB_PATH=db_path)
+    command = [sys.executable, '-m', 'benchmarks.bench_serving', '--serve', mode, '--port', str(args.port),
+               '--latency', str(args.latency), '--llm-concurrency', str(args.llm_concurrency)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(args.port, process)
+        conn = http.client.HTTPConnection('127.0.0.1', args.port)
+        conn.request('DELETE', '/api/plan-cache')  # 앞 모드가 저장한 플랜을 쓰지 않도록
+        conn.getresponse().read()
+        conn.close()
+        counter = itertools.count()
+        levels = []
+        for users in args.users:
+            level = run_level(args.port, process.pid, users, args.duration, counter)
+            print(f"{mode:<6}{users:>7}{level['rps']:>10}{level['p50_ms']:>10}{level['p95_ms']:>10}"
+                  f"{level['server_peak_threads']:>9}{level['errors']:>8}")
+            levels.append(level)
+        return levels
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default=','.join(BENCH_MODES))
+    parser.add_argument('--users', default='1,8,32,128')
+    parser.add_argument('--duration', type=float, default=5.0, help="동시 사용자 수 단계별 측정 시간(초)")
+    parser.add_argument('--latency', type=float, default=0.5, help="가짜 Gemini 응답 지연(초)")
+    parser.add_argument('--llm-concurrency', type=int, default=256, help="서버의 최대 동시 Gemini 호출 수")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--port', type=int, default=BENCH_PORT)
+    parser.add_argument('--serve', choices=BENCH_MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.latency, args.llm_concurrency)
+        return
+
+    args.users = [int(users) for users in args.users.split(',')]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        create_dataset(db_path, args.rows)
+        print(f"{'mode':<6}{'users':>7}{'rps':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'threads':>9}{'errors':>8}")
+        for mode in args.modes.split(','):
+            results[mode] = bench_mode(mode, db_path, args)
+
+    print(json.dumps({"latency_s": args.latency, "llm_concurrency": args.llm_concurrency,
+                      "duration_s": args.duration, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""벤치마크용 합성 POPULATOR 데이터셋과 대시보드를 만듭니다."""
+import random
+import sqlite3
+import time
+
+from dashboards import replace_layout
+from migrations import migrate
+
+# FakeGeminiModel의 쿼리 플랜과 같은 CODE 값을 사용합니다.
+DATASET_PROMPTS = [
+    "월별 검출 유형을 라인 차트로 그려줘",
+    "일별 검출 유형을 막대 차트로 그려줘",
+    "개인정보 접근 사용자 유형을 원 차트로 만들어줘",
+]
+DATASET_CODES = ["월별 검출 유형", "일별 검출 유형", "개인정보 접근 사용자 유형"]
+DATASET_NOISE_CODES = 20   # 대시보드와 관계없는 CODE 수 (필터 선택도를 현실적으로 만들기 위함)
+DATASET_NAMES = ["Admin", "Developer", "Operator", "Manager", "Auditor", "Guest"]
+DATASET_START = 1672531200  # 2023-01-01 UTC
+
+
+def generate_rows(count, seed=42):
+    """재현 가능한 합성 검출 이벤트 행 (ID, NAME, CODE, DATA, DT_ID, DT_DATA)을 생성합니다."""
+    rng = random.Random(seed)
+    codes = DATASET_CODES + [f"CODE_{i:03d}" for i in range(DATASET_NOISE_CODES)]
+    for _ in range(count):
+        code = rng.choice(codes)
+        timestamp = time.gmtime(DATASET_START + rng.randrange(3 * 365) * 86400)
+        dt_id = time.strftime('%Y-%m' if code == "월별 검출 유형" else '%Y-%m-%d', timestamp)
+        yield (
+            f"dataset_{rng.randrange(500):04d}",
+            rng.choice(DATASET_NAMES),
+            code,
+            rng.randrange(1, 500),
+            dt_id,
+            rng.randrange(1, 100),
+        )
+
+
+def dashboard_layout(prompts=DATASET_PROMPTS):
+    return [
+        {"x": (index * 6) % 12, "y": (index // 2) * 8, "w": 6, "h": 8, "i": str(index),
+         "chartId": None, "initialPrompt": prompt}
+        for index, prompt in enumerate(prompts)
+    ]
+
+
+def create_dataset(db_path, rows, seed=42):
+    """db_path에 최신 스키마를 만들고 rows개의 합성 행과 기본 대시보드(ID 1)를 넣습니다."""
+    conn = sqlite3.connect(db_path)
+    try:
+        migrate(conn)
+        conn.executemany(
+            "INSERT INTO POPULATOR (ID, NAME, CODE, DATA, DT_ID, DT_DATA) VALUES (?, ?, ?, ?, ?, ?)",
+            generate_rows(rows, seed),
+        )
+        conn.execute("INSERT OR REPLACE INTO DASHBOARDS (ID, NAME) VALUES (?, ?)", (1, '벤치마크 대시보드'))
+        replace_layout(conn, 1, dashboard_layout())
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import threading
+import time
+
+# 시드 데이터(database.py)의 CODE 값에 맞춘 결정적 쿼리 플랜
+FAKE_CHART_PLANS = [
+    ('개인정보 접근 사용자 유형', {"chart_type": "pie", "x_axis": "NAME", "y_axis": "COUNT",
+                         "filters": {"CODE": "개인정보 접근 사용자 유형"}}),
+    ('일별 검출 유형', {"chart_type": "bar", "x_axis": "DT_ID", "y_axis": "DATA",
+                   "filters": {"CODE": "일별 검출 유형"}, "time_grain": "day", "aggregate": "sum"}),
+    ('월별 검출 유형', {"chart_type": "line", "x_axis": "DT_ID", "y_axis": "DATA",
+                   "filters": {"CODE": "월별 검출 유형"}, "time_grain": "month", "aggregate": "sum"}),
+]
+FAKE_DEFAULT_PLAN = {"chart_type": "line", "x_axis": "DT_ID", "y_axis": "DATA", "dimension": "3D",
+                     "group_by": "CODE"}
+
+
+class FakeResourceExhausted(Exception):
+    """google.api_core.exceptions.ResourceExhausted(429)를 흉내 내는 예외."""
+    code = 429
+
+
+class FakeDeadlineExceeded(Exception):
+    """google.api_core.exceptions.DeadlineExceeded(504)를 흉내 내는 예외."""
+    code = 504
+
+
+def _call_timeout(kwargs):
+    return (kwargs.get('request_options') or {}).get('timeout')
+
+
+class FakeUsage:
+    """GenerateContentResponse.usage_metadata를 흉내 냅니다 (대략 4글자당 토큰 1개)."""
+
+    def __init__(self, prompt, text):
+        self.prompt_token_count = len(prompt) // 4 + 1
+        self.candidates_token_count = len(text) // 4 + 1
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class FakeGeminiModel:
+    """네트워크 없이 GenerativeModel.generate_content(_async)를 흉내 내는 결정적 가짜 모델.
+
+    차트 프롬프트에는 사용자 요청에 포함된 CODE 이름으로 고정된 쿼리 플랜을,
+    보고서 프롬프트에는 고정된 Markdown을 돌려줍니다. latency로 응답 지연을,
+    fail_first로 처음 몇 번의 호출을 429 오류로 만들 수 있습니다.
+    실제 SDK처럼 request_options의 timeout보다 latency가 길면 timeout만큼 기다린 뒤 504 오류를 냅니다.
+    """
+
+    def __init__(self, latency=0.0, fail_first=0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt):
+        if 'Analysis Report:' in prompt:
+            return "## 분석 요약\n\n- 전반적으로 증가 추세입니다.\n- 특이한 이상치는 발견되지 않았습니다.\n"
+
+        user_request = prompt.rsplit('User Request:', 1)[-1]
+        for code, plan in FAKE_CHART_PLANS:
+            if code in user_request:
+                return "```json\n" + json.dumps(plan, ensure_ascii=False) + "\n```"
+        return json.dumps(FAKE_DEFAULT_PLAN, ensure_ascii=False)
+
+    def _begin_call(self, prompt):
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+        if call_number <= self.fail_first:
+            raise FakeResourceExhausted("429 Resource has been exhausted (fake)")
+        return self._respond(prompt)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        text = self._begin_call(prompt)
+        if stream:
+            return self._stream(text, FakeUsage(prompt, text))
+        timeout = _call_timeout(kwargs)
+        if timeout is not None and self.latency > timeout:
+            time.sleep(timeout)
+            raise FakeDeadlineExceeded("504 Deadline Exceeded (fake)")
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResponse(text, FakeUsage(prompt, text))
+
+    def _stream(self, text, usage):
+        """줄 단위 조각으로 나눠 latency를 조각들에 고르게 나눠 돌려줍니다."""
+        chunks = text.splitlines(keepends=True)
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield FakeResponse(chunk, usage)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        text = self._begin_call(prompt)
+        if stream:
+            return self._astream(text, FakeUsage(prompt, text))
+        timeout = _call_timeout(kwargs)
+        if timeout is not None and self.latency > timeout:
+            await asyncio.sleep(timeout)
+            raise FakeDeadlineExceeded("504 Deadline Exceeded (fake)")
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return FakeResponse(text, FakeUsage(prompt, text))
+
+    async def _astream(self, text, usage):
+        chunks = text.splitlines(keepends=True)
+        for chunk in chunks:
+            if self.latency:
+                await asyncio.sleep(self.latency / len(chunks))
+            yield FakeResponse(chunk, usage)
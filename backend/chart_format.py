@@ -0,0 +1,75 @@
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성: 없으면 표준 json으로 직렬화
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성: 없으면 gzip만 사용
+    brotli = None
+
+# --- 차트 응답 형식 설정 ---
+# default: 기존 형식 (ApexCharts 옵션 + 행 단위 tableData.items)
+# compact: 테이블을 열 단위 배열로 보내고 반복되는 문자열은 사전 인코딩, 응답 본문은 압축
+CHART_FORMAT_DEFAULT = 'default'
+CHART_FORMAT_COMPACT = 'compact'
+CHART_FORMATS = (CHART_FORMAT_DEFAULT, CHART_FORMAT_COMPACT)
+
+# 고유 값 비율이 이 값 이하인 문자열 열만 사전 인코딩 (고유 값이 많으면 인덱스 배열이 오히려 커짐)
+COMPACT_DICTIONARY_MAX_RATIO = 0.5
+COMPACT_GZIP_LEVEL = 5
+COMPACT_BROTLI_QUALITY = 5
+
+
+def encode_columns(rows):
+    """행 목록을 열 단위 테이블로 바꿉니다.
+
+    반환 형식: {"headers": [...], "columns": [[...], ...], "dictionaries": {열 이름: [고유 값, ...]}}
+    dictionaries에 있는 열의 값은 그 목록의 인덱스입니다 (NULL은 null 그대로).
+    """
+    if not rows:
+        return {"headers": [], "columns": [], "dictionaries": {}}
+
+    headers = list(rows[0].keys())
+    columns = [list(column) for column in zip(*rows)]
+    dictionaries = {}
+    for index, (name, values) in enumerate(zip(headers, columns)):
+        if not all(value is None or isinstance(value, str) for value in values):
+            continue
+        codes = {}
+        for value in values:
+            if value is not None and value not in codes:
+                codes[value] = len(codes)
+        if len(codes) > len(values) * COMPACT_DICTIONARY_MAX_RATIO:
+            continue
+        dictionaries[name] = list(codes)
+        columns[index] = [None if value is None else codes[value] for value in values]
+    return {"headers": headers, "columns": columns, "dictionaries": dictionaries}
+
+
+def fast_dumps(obj):
+    """JSON 바이트로 직렬화합니다. orjson이 설치되어 있으면 orjson을 사용합니다."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def choose_encoding(accept_encodings):
+    """요청의 Accept-Encoding(werkzeug Accept 객체)에서 사용할 압축 방식을 고릅니다. 없으면 None."""
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    return accept_encodings.best_match(available)
+
+
+def compress(body, encoding):
+    """본문을 encoding('br'/'gzip')으로 압축합니다. encoding이 None이면 그대로 반환합니다.
+
+    압축된 본문을 결과 캐시에 그대로 저장하므로, 같은 입력이면 항상 같은 바이트가 나오도록 gzip 헤더의 시각은 0으로 둡니다.
+    """
+    if encoding is None:
+        return body
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPACT_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPACT_GZIP_LEVEL, mtime=0)
@@ -0,0 +1,182 @@
+import json
+import sqlite3
+
+# --- 대시보드 위젯 저장 ---
+# 레이아웃을 JSON 한 덩어리 대신 위젯마다 DASHBOARD_WIDGETS 한 행으로 저장합니다.
+# 자주 바뀌는 위치/크기와 기본 속성은 열로, 그 밖의 속성은 EXTRA(JSON)에 둡니다.
+# 행마다 VERSION이 있어, 오래된 버전을 기준으로 한 수정은 LayoutConflictError(409)가 됩니다.
+# 아래 함수들은 트랜잭션을 직접 열거나 커밋하지 않습니다 (호출하는 쪽에서 BEGIN IMMEDIATE/COMMIT).
+
+# (위젯 키, 열 이름)
+WIDGET_COLUMNS = (('x', 'X'), ('y', 'Y'), ('w', 'W'), ('h', 'H'),
+                  ('chartId', 'CHART_ID'), ('initialPrompt', 'INITIAL_PROMPT'))
+WIDGET_OPERATIONS = ('add', 'update', 'remove')
+WIDGET_MAX_OPERATIONS = 500
+WIDGET_RESERVED_KEYS = ('i', 'version')
+
+WIDGETS_QUERY = ("SELECT WIDGET_ID, X, Y, W, H, CHART_ID, INITIAL_PROMPT, EXTRA, VERSION "
+                 "FROM DASHBOARD_WIDGETS WHERE DASHBOARD_ID = ? ORDER BY POSITION")
+WIDGET_QUERY = ("SELECT WIDGET_ID, X, Y, W, H, CHART_ID, INITIAL_PROMPT, EXTRA, VERSION, POSITION "
+                "FROM DASHBOARD_WIDGETS WHERE DASHBOARD_ID = ? AND WIDGET_ID = ?")
+DASHBOARD_EXISTS_QUERY = "SELECT 1 FROM DASHBOARDS WHERE ID = ?"
+
+_COLUMN_NAMES = ', '.join(column for _, column in WIDGET_COLUMNS)
+_INSERT_SQL = (f"INSERT INTO DASHBOARD_WIDGETS (DASHBOARD_ID, WIDGET_ID, POSITION, {_COLUMN_NAMES}, EXTRA, VERSION) "
+               f"VALUES (?, ?, ?, {', '.join('?' for _ in WIDGET_COLUMNS)}, ?, 1)")
+_UPDATE_SQL = (f"UPDATE DASHBOARD_WIDGETS SET POSITION = ?, "
+               f"{', '.join(f'{column} = ?' for _, column in WIDGET_COLUMNS)}, EXTRA = ?, VERSION = VERSION + 1 "
+               f"WHERE DASHBOARD_ID = ? AND WIDGET_ID = ?")
+
+
+class LayoutConflictError(Exception):
+    """수정하려는 위젯이 요청의 버전 이후에 다른 곳에서 바뀌었거나 삭제된 경우.
+
+    conflicts는 {"i", "version", "widget"} 목록으로, 저장된 현재 상태(삭제되었으면 None)를 담습니다.
+    """
+
+    def __init__(self, conflicts):
+        super().__init__(f"{len(conflicts)}개 위젯이 다른 곳에서 먼저 수정되었습니다.")
+        self.conflicts = conflicts
+
+
+def widget_from_row(row):
+    widget = json.loads(row['EXTRA']) if row['EXTRA'] else {}
+    widget['i'] = row['WIDGET_ID']
+    for key, column in WIDGET_COLUMNS:
+        widget[key] = row[column]
+    widget['version'] = row['VERSION']
+    return widget
+
+
+def rows_to_layout(rows):
+    return [widget_from_row(row) for row in rows]
+
+
+def load_layout(conn, dashboard_id):
+    """대시보드의 위젯 목록(각 위젯에 version 포함)을 반환합니다. 대시보드가 없으면 None."""
+    rows = conn.execute(WIDGETS_QUERY, (dashboard_id,)).fetchall()
+    if not rows and conn.execute(DASHBOARD_EXISTS_QUERY, (dashboard_id,)).fetchone() is None:
+        return None
+    return rows_to_layout(rows)
+
+
+def _widget_id(value, where):
+    if isinstance(value, bool) or not isinstance(value, (str, int)) or value == '':
+        raise ValueError(f"{where}: 위젯 'i'는 비어 있지 않은 문자열이어야 합니다.")
+    return str(value)
+
+
+def _widget_values(widget):
+    """위젯 dict를 열 값 튜플과 EXTRA JSON 문자열로 나눕니다."""
+    columns = tuple(widget.get(key) for key, _ in WIDGET_COLUMNS)
+    known = {key for key, _ in WIDGET_COLUMNS}.union(WIDGET_RESERVED_KEYS)
+    extra = {key: value for key, value in widget.items() if key not in known}
+    return columns, json.dumps(extra, ensure_ascii=False, sort_keys=True) if extra else None
+
+
+def replace_layout(conn, dashboard_id, layout):
+    """레이아웃 전체를 저장합니다 (기존 POST 방식). 버전 검사 없이 덮어쓰되, 바뀐 위젯만 갱신하고 버전을 올립니다."""
+    if not isinstance(layout, list) or not all(isinstance(widget, dict) for widget in layout):
+        raise ValueError("'layout'은 위젯 객체의 배열이어야 합니다.")
+    widgets = [(_widget_id(widget.get('i'), f"layout[{index}]"), widget) for index, widget in enumerate(layout)]
+    if len({widget_id for widget_id, _ in widgets}) != len(widgets):
+        raise ValueError("'layout'에 같은 'i'를 가진 위젯이 여러 개 있습니다.")
+
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row  # 마이그레이션처럼 row_factory가 없는 연결에서도 호출됨
+    existing = {row['WIDGET_ID']: row for row in cursor.execute(
+        "SELECT WIDGET_ID, POSITION, X, Y, W, H, CHART_ID, INITIAL_PROMPT, EXTRA FROM DASHBOARD_WIDGETS "
+        "WHERE DASHBOARD_ID = ?", (dashboard_id,))}
+    kept = {widget_id for widget_id, _ in widgets}
+    conn.executemany("DELETE FROM DASHBOARD_WIDGETS WHERE DASHBOARD_ID = ? AND WIDGET_ID = ?",
+                     [(dashboard_id, widget_id) for widget_id in existing if widget_id not in kept])
+
+    for position, (widget_id, widget) in enumerate(widgets):
+        columns, extra = _widget_values(widget)
+        row = existing.get(widget_id)
+        if row is None:
+            conn.execute(_INSERT_SQL, (dashboard_id, widget_id, position, *columns, extra))
+        elif (*(row[column] for _, column in WIDGET_COLUMNS), row['EXTRA']) != (*columns, extra):
+            conn.execute(_UPDATE_SQL, (position, *columns, extra, dashboard_id, widget_id))
+        elif row['POSITION'] != position:
+            # 순서만 바뀐 위젯은 내용이 같으므로 버전을 올리지 않습니다.
+            conn.execute("UPDATE DASHBOARD_WIDGETS SET POSITION = ? WHERE DASHBOARD_ID = ? AND WIDGET_ID = ?",
+                         (position, dashboard_id, widget_id))
+
+
+def _validate_operation(index, operation):
+    where = f"operations[{index}]"
+    if not isinstance(operation, dict) or operation.get('op') not in WIDGET_OPERATIONS:
+        raise ValueError(f"{where}: 'op'는 {', '.join(WIDGET_OPERATIONS)} 중 하나여야 합니다.")
+    if operation['op'] == 'add':
+        widget = operation.get('widget')
+        if not isinstance(widget, dict):
+            raise ValueError(f"{where}: 'add'에는 'widget' 객체가 필요합니다.")
+        return 'add', _widget_id(widget.get('i'), where), widget
+
+    version = operation.get('version')
+    if isinstance(version, bool) or not isinstance(version, int):
+        raise ValueError(f"{where}: '{operation['op']}'에는 정수 'version'이 필요합니다.")
+    widget_id = _widget_id(operation.get('i'), where)
+    if operation['op'] == 'remove':
+        return 'remove', widget_id, version
+    changes = operation.get('changes')
+    if not isinstance(changes, dict) or any(key in WIDGET_RESERVED_KEYS for key in changes):
+        raise ValueError(f"{where}: 'update'에는 'i'/'version'을 제외한 'changes' 객체가 필요합니다.")
+    return 'update', widget_id, (version, changes)
+
+
+def _conflict(conn, dashboard_id, widget_id):
+    row = conn.execute(WIDGET_QUERY, (dashboard_id, widget_id)).fetchone()
+    return {"i": widget_id, "version": row['VERSION'] if row else None,
+            "widget": widget_from_row(row) if row else None}
+
+
+def apply_operations(conn, dashboard_id, operations):
+    """위젯 단위 변경(add/update/remove)을 적용하고, 바뀐 위젯의 새 버전 목록 [{"i", "version"}]을 반환합니다.
+
+    update/remove는 요청의 version이 저장된 버전과 같을 때만 적용합니다. 하나라도 충돌하면 나머지도
+    적용하지 않도록 LayoutConflictError를 던지므로, 호출하는 쪽에서 트랜잭션을 롤백해야 합니다.
+    대시보드가 없으면 None을 반환합니다.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("'operations'는 비어 있지 않은 배열이어야 합니다.")
+    if len(operations) > WIDGET_MAX_OPERATIONS:
+        raise ValueError(f"'operations'는 한 번에 {WIDGET_MAX_OPERATIONS}개까지 보낼 수 있습니다.")
+    parsed = [_validate_operation(index, operation) for index, operation in enumerate(operations)]
+    if conn.execute(DASHBOARD_EXISTS_QUERY, (dashboard_id,)).fetchone() is None:
+        return None
+
+    results, conflicts = [], []
+    for op, widget_id, argument in parsed:
+        if op == 'add':
+            if conn.execute(WIDGET_QUERY, (dashboard_id, widget_id)).fetchone() is not None:
+                conflicts.append(_conflict(conn, dashboard_id, widget_id))
+                continue
+            position = conn.execute("SELECT COALESCE(MAX(POSITION), -1) + 1 FROM DASHBOARD_WIDGETS "
+                                    "WHERE DASHBOARD_ID = ?", (dashboard_id,)).fetchone()[0]
+            columns, extra = _widget_values(argument)
+            conn.execute(_INSERT_SQL, (dashboard_id, widget_id, position, *columns, extra))
+            results.append({"i": widget_id, "version": 1})
+        elif op == 'remove':
+            deleted = conn.execute("DELETE FROM DASHBOARD_WIDGETS WHERE DASHBOARD_ID = ? AND WIDGET_ID = ? "
+                                   "AND VERSION = ?", (dashboard_id, widget_id, argument)).rowcount
+            if deleted:
+                results.append({"i": widget_id, "version": None})
+            else:
+                conflicts.append(_conflict(conn, dashboard_id, widget_id))
+        else:
+            version, changes = argument
+            row = conn.execute(WIDGET_QUERY, (dashboard_id, widget_id)).fetchone()
+            if row is None or row['VERSION'] != version:
+                conflicts.append(_conflict(conn, dashboard_id, widget_id))
+                continue
+            widget = widget_from_row(row)
+            widget.update(changes)
+            columns, extra = _widget_values(widget)
+            conn.execute(_UPDATE_SQL, (row['POSITION'], *columns, extra, dashboard_id, widget_id))
+            results.append({"i": widget_id, "version": version + 1})
+
+    if conflicts:
+        raise LayoutConflictError(conflicts)
+    return results
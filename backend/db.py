@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# --- SQLite 연결 풀 설정 ---
+DB_POOL_MAX_SIZE = 8                 # 풀이 유지할 최대 연결 수
+DB_POOL_TIMEOUT_SECONDS = 10.0       # 빈 연결을 기다리는 최대 시간
+DB_BUSY_TIMEOUT_SECONDS = 5.0        # 잠금 충돌 시 대기 시간
+DB_STATEMENT_CACHE_SIZE = 256        # 연결별로 재사용할 준비된 문장(prepared statement) 수
+
+# 연결을 만들 때마다 적용하는 PRAGMA
+DB_PRAGMAS = (
+    ("journal_mode", "WAL"),         # 쓰기가 읽기를 막지 않도록
+    ("synchronous", "NORMAL"),       # WAL 모드에서는 NORMAL로도 손상 없이 안전
+    ("mmap_size", 256 * 1024 * 1024),
+    ("cache_size", -64 * 1024),      # 음수는 KiB 단위 (64MiB)
+    ("temp_store", "MEMORY"),
+)
+
+
+class PoolTimeoutError(Exception):
+    """제한 시간 안에 사용할 수 있는 연결이 없을 때 발생합니다."""
+
+
+class _Waiter:
+    """연결을 기다리는 스레드 하나의 자리. 반납된 연결(또는 새로 만들 권한)을 직접 넘겨받습니다."""
+
+    __slots__ = ('conn',)
+
+    def __init__(self):
+        self.conn = None
+
+
+# 연결 대신 넘겨주는 "새 연결을 만들어도 된다"는 표시 (닫힌 연결의 자리가 비었을 때)
+_CREATE = object()
+
+
+class ConnectionPool:
+    """스레드 간에 공유하는 SQLite 연결 풀.
+
+    연결은 한 번에 한 스레드만 빌려 쓰므로 check_same_thread=False로 열어 재사용합니다.
+    오래 살아 있는 연결은 sqlite3 모듈의 문장 캐시 덕분에 같은 SQL을 다시 준비하지 않습니다.
+    연결이 모두 사용 중이면 기다리는 순서(FIFO)대로 넘겨주므로, 새로 온 요청이 먼저 기다리던 요청을 앞지르지 않습니다.
+    """
+
+    def __init__(self, db_path, max_size=DB_POOL_MAX_SIZE, timeout=DB_POOL_TIMEOUT_SECONDS,
+                 pragmas=DB_PRAGMAS):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self._idle = []  # 최근에 쓴 연결(캐시가 따뜻한 연결)을 먼저 재사용 (스택)
+        self._waiters = deque()  # 연결을 기다리는 _Waiter, 먼저 온 순서
+        self._created = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_SECONDS, check_same_thread=False,
+                               cached_statements=DB_STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self):
+        """풀에서 연결을 빌립니다. 여유가 없으면 새로 만들거나, 먼저 기다리던 스레드 다음 차례로 반납을 기다립니다."""
+        deadline = time.monotonic() + self.timeout
+        with self._available:
+            if not self._waiters and self._idle:
+                return self._idle.pop()
+            if not self._waiters and self._created < self.max_size:
+                self._created += 1
+                conn = _CREATE
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+                while waiter.conn is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.remove(waiter)
+                        raise PoolTimeoutError(f"{self.timeout:g}초 안에 사용할 수 있는 데이터베이스 연결이 없습니다.")
+                    self._available.wait(remaining)
+                conn = waiter.conn
+        if conn is not _CREATE:
+            return conn
+        try:
+            return self._connect()
+        except Exception:
+            self._discard_slot()
+            raise
+
+    def _hand_over(self, conn):
+        """가장 오래 기다린 스레드에 conn을 넘깁니다. 기다리는 스레드가 없으면 False. (lock 보유 상태에서 호출)"""
+        if not self._waiters:
+            return False
+        self._waiters.popleft().conn = conn
+        self._available.notify_all()
+        return True
+
+    def _discard_slot(self):
+        """연결 하나가 닫혀 자리가 비었습니다. 기다리는 스레드가 있으면 새 연결을 만들게 합니다."""
+        with self._available:
+            if not self._hand_over(_CREATE):
+                self._created -= 1
+
+    def release(self, conn):
+        """연결을 풀에 반납합니다. 끝나지 않은 트랜잭션은 롤백합니다."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            self._discard_slot()
+            return
+        with self._available:
+            if not self._hand_over(conn):
+                self._idle.append(conn)
+
+    @contextmanager
+    def connection(self):
+        """with 문 안에서만 연결을 빌려 쓰는 컨텍스트 매니저."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {"size": self._created, "idle": len(self._idle), "waiting": len(self._waiters),
+                    "max_size": self.max_size}
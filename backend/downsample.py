@@ -0,0 +1,90 @@
+import numpy as np
+
+# 시계열 차트 다운샘플링 방식
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+DOWNSAMPLE_DEFAULT_METHOD = 'lttb'
+DOWNSAMPLE_MIN_POINTS = 3
+
+
+def x_positions(xs):
+    """DT_ID 같은 x축 값을 수치 좌표로 바꿉니다.
+
+    'YYYY-MM', 'YYYY-MM-DD' 형식이면 일 단위 날짜 간격을, 날짜가 아니면 순번을 사용합니다.
+    """
+    try:
+        return np.array(xs, dtype='datetime64[D]').astype(np.float64)
+    except (TypeError, ValueError):
+        return np.arange(len(xs), dtype=np.float64)
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets로 남길 점의 인덱스를 고릅니다. x는 오름차순이어야 합니다."""
+    n = len(x)
+    if threshold >= n or threshold < DOWNSAMPLE_MIN_POINTS:
+        return np.arange(n)
+
+    # 첫 점과 마지막 점은 항상 남기고, 나머지를 threshold - 2개의 구간으로 나눕니다.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 다음 구간의 평균점 (마지막 구간은 마지막 점)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # 이전에 고른 점, 다음 구간 평균점과 이루는 삼각형 넓이가 가장 큰 점을 고릅니다.
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(y, threshold):
+    """구간마다 최솟값과 최댓값 점을 남깁니다. 급격한 스파이크를 놓치지 않는 방식입니다.
+
+    LTTB처럼 첫 점과 마지막 점은 항상 남기고, 그 사이를 (threshold - 2) // 2개의 구간으로 나눕니다.
+    """
+    n = len(y)
+    if threshold >= n or threshold < DOWNSAMPLE_MIN_POINTS:
+        return np.arange(n)
+
+    selected = [0, n - 1]
+    n_buckets = (threshold - 2) // 2
+    if n_buckets == 0:
+        # 남은 자리가 하나뿐이면 가운데 점들 중 평균에서 가장 먼 점 하나만 남깁니다.
+        interior = y[1:n - 1]
+        selected.append(1 + int(np.argmax(np.abs(interior - interior.mean()))))
+        return np.unique(np.array(selected, dtype=np.int64))
+
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        selected.append(start + int(np.argmin(bucket)))
+        selected.append(start + int(np.argmax(bucket)))
+    return np.unique(np.array(selected, dtype=np.int64))  # 순서 유지 + 같은 점 중복 제거
+
+
+def downsample_indices(xs, ys, max_points, method=DOWNSAMPLE_DEFAULT_METHOD):
+    """x축 순서로 정렬한 뒤 max_points개 이하로 줄인 원래 행 인덱스 목록을 반환합니다."""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"지원하지 않는 다운샘플링 방식입니다: {method} (가능한 값: {', '.join(DOWNSAMPLE_METHODS)})")
+
+    x = x_positions(xs)
+    order = np.argsort(x, kind='stable')
+    x = x[order]
+    y = np.nan_to_num(np.array([np.nan if v is None else v for v in ys], dtype=np.float64)[order])
+
+    if method == 'lttb':
+        picked = lttb_indices(x, y, max_points)
+    else:
+        picked = minmax_indices(y, max_points)
+    return order[picked].tolist()
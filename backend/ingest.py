@@ -0,0 +1,240 @@
+"""POPULATOR 대량 적재: CSV/NDJSON 파일을 고정 크기 청크로 읽어 트랜잭션 단위로 삽입합니다.
+
+사용법 (backend 디렉터리에서):
+    python ingest.py detections.csv
+    python ingest.py detections.ndjson.gz --defer-indexes
+"""
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from db import DB_BUSY_TIMEOUT_SECONDS
+from migrations import migrate_database, restore_deferred_objects
+
+# --- 대량 적재 설정 ---
+INGEST_COLUMNS = ('ID', 'NAME', 'CODE', 'DATA', 'DT_ID', 'DT_DATA')
+INGEST_NUMERIC_COLUMNS = ('DATA', 'DT_DATA')
+INGEST_FORMATS = ('csv', 'ndjson')
+INGEST_CHUNK_SIZE = 10_000                 # 한 트랜잭션에 넣는 행 수
+INGEST_DEFER_MIN_BYTES = 64 * 1024 * 1024  # 이보다 큰 입력은 인덱스/롤업 갱신을 적재 후로 미룸
+
+# 적재 전용 연결에만 적용하는 PRAGMA (서비스 연결의 DB_PRAGMAS와 별개)
+INGEST_PRAGMAS = (
+    ("journal_mode", "WAL"),               # 서비스 연결과 같은 모드를 명시 (DB 파일에 유지되는 설정)
+    ("synchronous", "NORMAL"),             # WAL에서는 체크포인트 때만 fsync하므로 빠르고, 전원이 나가도
+                                           # 마지막으로 커밋한 청크만 잃을 수 있을 뿐 DB는 손상되지 않음
+    ("cache_size", -64 * 1024),            # 64MiB
+    ("temp_store", "FILE"),                # 인덱스 재생성 시 정렬용 임시 데이터가 메모리를 채우지 않도록
+)
+
+_NUMERIC_INDEXES = tuple(INGEST_COLUMNS.index(column) for column in INGEST_NUMERIC_COLUMNS)
+_INSERT_SQL = f"INSERT INTO POPULATOR ({', '.join(INGEST_COLUMNS)}) VALUES ({', '.join('?' for _ in INGEST_COLUMNS)})"
+
+# 인덱스/트리거를 내렸다 다시 만드는 적재는 동시에 하나만 실행합니다.
+_ingest_lock = threading.Lock()
+
+
+def detect_format(filename):
+    """파일 이름의 확장자로 형식을 추정합니다. 알 수 없으면 None."""
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def _number(value, column, line_number):
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{line_number}행: '{column}' 값이 숫자가 아닙니다: {value}") from None
+
+
+def _convert(values, line_number):
+    """INGEST_COLUMNS 순서의 값 목록을 검증해 INSERT용 튜플로 바꿉니다. 빈 문자열은 NULL입니다."""
+    values = [None if value == '' else value for value in values]
+    if values[0] is None:
+        raise ValueError(f"{line_number}행: 'ID' 값이 필요합니다.")
+    for index in _NUMERIC_INDEXES:
+        if isinstance(values[index], str):
+            values[index] = _number(values[index], INGEST_COLUMNS[index], line_number)
+    return tuple(values)
+
+
+def _check_columns(columns, line_label):
+    unknown = [column for column in columns if column not in INGEST_COLUMNS]
+    if unknown:
+        raise ValueError(f"{line_label}: 알 수 없는 컬럼입니다: {', '.join(unknown)} (가능한 값: {', '.join(INGEST_COLUMNS)})")
+
+
+def iter_csv_rows(lines):
+    """헤더의 컬럼 순서를 한 번만 해석하고, 이후 행은 위치로 INGEST_COLUMNS 순서에 맞춥니다."""
+    reader = csv.reader(lines)
+    header = [name.strip().upper() for name in next(reader, [])]
+    _check_columns(header, "CSV 헤더")
+    if 'ID' not in header:
+        raise ValueError("CSV 헤더에 'ID' 컬럼이 필요합니다.")
+    width = len(header)
+    positions = [header.index(column) if column in header else None for column in INGEST_COLUMNS]
+    for row in reader:
+        if len(row) != width:
+            if not row:
+                continue
+            raise ValueError(f"{reader.line_num}행: 값이 {len(row)}개입니다. 헤더의 컬럼 수({width})와 같아야 합니다.")
+        yield _convert([None if position is None else row[position] for position in positions], reader.line_num)
+
+
+def iter_ndjson_rows(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{line_number}행: JSON 형식이 올바르지 않습니다: {e.msg}") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"{line_number}행: 각 줄은 JSON 객체여야 합니다.")
+        record = {str(key).strip().upper(): value for key, value in record.items()}
+        _check_columns(record, f"{line_number}행")
+        yield _convert([record.get(column) for column in INGEST_COLUMNS], line_number)
+
+
+def iter_chunks(lines, fmt, chunk_size=INGEST_CHUNK_SIZE):
+    """텍스트 줄 이터러블을 chunk_size개씩의 INSERT 튜플 목록으로 나눕니다. 메모리에는 한 청크만 둡니다."""
+    if fmt not in INGEST_FORMATS:
+        raise ValueError(f"'format'은 {', '.join(INGEST_FORMATS)} 중 하나여야 합니다.")
+    rows = iter_csv_rows(lines) if fmt == 'csv' else iter_ndjson_rows(lines)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _drop_deferred_objects(conn):
+    """POPULATOR의 인덱스와 트리거(롤업, 데이터 버전)를 지웁니다.
+
+    지우기 전에 CREATE 문을 같은 트랜잭션에서 INGEST_DEFERRED에 기록하므로, 적재 도중 프로세스가
+    죽어도 다음 마이그레이션(서버 시작, ingest.py 실행)에서 restore_deferred_objects가 다시 만듭니다.
+    """
+    objects = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE tbl_name = 'POPULATOR' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    ).fetchall()
+    dropped_at = time.time()
+    for object_type, name, sql in objects:
+        conn.execute("INSERT OR REPLACE INTO INGEST_DEFERRED (NAME, TYPE, SQL, DROPPED_AT) VALUES (?, ?, ?, ?)",
+                     (name, object_type, sql, dropped_at))
+        conn.execute(f"DROP {object_type.upper()} {name}")
+
+
+def ingest_lines(db_path, lines, fmt, chunk_size=INGEST_CHUNK_SIZE, defer_indexes=False):
+    """텍스트 줄 이터러블(파일, 요청 스트림 등)을 POPULATOR에 적재하고 처리 결과를 반환합니다.
+
+    청크마다 하나의 트랜잭션으로 커밋하므로, 중간에 잘못된 행을 만나면 그 앞 청크까지는 남고
+    ValueError가 발생합니다 (예외의 rows 속성에 커밋된 행 수). defer_indexes=True면 적재 동안
+    POPULATOR 인덱스와 롤업 트리거를 내렸다가 끝난 뒤 한 번에 다시 만들고 롤업을 재계산합니다.
+    """
+    conn = sqlite3.connect(db_path, timeout=DB_BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    for name, value in INGEST_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+
+    rows = 0
+    started = time.perf_counter()
+    deferred = False
+    lock = _ingest_lock if defer_indexes else None
+    if lock:
+        lock.acquire()
+    try:
+        if defer_indexes:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _drop_deferred_objects(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            deferred = True
+
+        try:
+            for chunk in iter_chunks(lines, fmt, chunk_size):
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(_INSERT_SQL, chunk)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                rows += len(chunk)
+        except ValueError as e:
+            e.rows = rows
+            raise
+        finally:
+            if deferred:
+                restore_deferred_objects(conn)
+    finally:
+        if lock:
+            lock.release()
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds > 0 else rows,
+        "deferred_indexes": bool(defer_indexes),
+    }
+
+
+def open_text(path):
+    """적재할 파일을 텍스트 모드로 엽니다. .gz 파일은 압축을 풀며 읽습니다."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8-sig', newline='')
+    return open(path, 'r', encoding='utf-8-sig', newline='')
+
+
+def text_stream(binary_stream):
+    """요청 본문 같은 바이너리 스트림을 줄 단위로 읽을 수 있는 텍스트 스트림으로 감쌉니다."""
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV/NDJSON 파일을 POPULATOR에 대량 적재합니다.")
+    parser.add_argument('path', help="적재할 파일 (.csv, .ndjson, .jsonl, 각각 .gz 가능)")
+    parser.add_argument('--format', choices=INGEST_FORMATS, help="파일 형식 (기본값: 확장자로 추정)")
+    parser.add_argument('--db', default=os.getenv('DASHBOARD_DB_PATH', 'database.db'))
+    parser.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE)
+    parser.add_argument('--defer-indexes', action=argparse.BooleanOptionalAction, default=None,
+                        help=f"인덱스/롤업 갱신을 적재 후로 미룸 (기본값: 파일이 {INGEST_DEFER_MIN_BYTES // (1024 * 1024)}MiB 이상이면 사용)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("파일 형식을 알 수 없습니다. --format으로 지정해주세요.")
+    defer_indexes = args.defer_indexes
+    if defer_indexes is None:
+        defer_indexes = os.path.getsize(args.path) >= INGEST_DEFER_MIN_BYTES
+
+    migrate_database(args.db)
+    with open_text(args.path) as lines:
+        try:
+            result = ingest_lines(args.db, lines, fmt, args.chunk_size, defer_indexes)
+        except ValueError as e:
+            raise SystemExit(f"적재 실패 ({e.rows:,}행까지 커밋됨): {e}")
+    print(f"{result['rows']:,}행 적재 완료: {result['seconds']:.1f}s ({result['rows_per_second']:,} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# --- LLM 호출 설정 ---
+LLM_MAX_WORKERS = 4            # 동시에 진행할 수 있는 Gemini 호출 수 (일반 호출과 스트리밍 호출 각각)
+LLM_RATE_PER_SECOND = 2.0      # 초당 허용 호출 수 (토큰 버킷 충전 속도)
+LLM_BURST = 4                  # 순간적으로 허용할 최대 호출 수 (토큰 버킷 용량)
+LLM_TIMEOUT_SECONDS = 30.0     # 호출당 기본 마감 시간 (재시도 포함)
+LLM_MAX_RETRIES = 3
+LLM_BACKOFF_BASE_SECONDS = 0.5
+LLM_BACKOFF_MAX_SECONDS = 8.0
+
+# google.api_core 예외 클래스 이름 중 재시도할 가치가 있는 것들
+RETRYABLE_ERROR_NAMES = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable',
+    'InternalServerError', 'DeadlineExceeded', 'BadGateway', 'GatewayTimeout',
+}
+
+
+class LLMTimeoutError(Exception):
+    """마감 시간 안에 LLM 응답을 받지 못했을 때 발생합니다."""
+
+
+def is_retryable_error(error):
+    """429 또는 5xx 계열 오류인지 판단합니다."""
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    code = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+    if callable(code):
+        code = code()
+    try:
+        code = int(code)
+    except (TypeError, ValueError):
+        return False
+    return code == 429 or 500 <= code < 600
+
+
+class TokenBucket:
+    """초당 rate개씩 충전되고 최대 capacity개까지 쌓이는 토큰 버킷."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _take(self):
+        """토큰을 가져왔으면 (0, 현재 시각)을, 아니면 (다음 토큰까지 기다릴 초, 현재 시각)을 반환합니다."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0, now
+            return (1 - self._tokens) / self.rate, now
+
+    def acquire(self, deadline=None):
+        """토큰 하나를 가져옵니다. deadline(monotonic 시각)까지 못 가져오면 False를 반환합니다."""
+        while True:
+            wait, now = self._take()
+            if not wait:
+                return True
+            if deadline is not None and now + wait > deadline:
+                return False
+            self._sleep(wait)
+
+    async def acquire_async(self, deadline=None):
+        """acquire()의 asyncio 버전. 기다리는 동안 이벤트 루프를 막지 않습니다."""
+        while True:
+            wait, now = self._take()
+            if not wait:
+                return True
+            if deadline is not None and now + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class _AsyncCallState:
+    """이벤트 루프마다 따로 두는 비동기 호출 상태 (asyncio 객체는 만든 루프에서만 쓸 수 있으므로)."""
+
+    def __init__(self, max_workers):
+        self.slots = asyncio.Semaphore(max_workers)
+        self.stream_slots = asyncio.Semaphore(max_workers)
+        self.in_flight = {}  # prompt -> asyncio.Task
+
+
+class LLMClient:
+    """GenerativeModel 호출을 감싸는 공용 클라이언트.
+
+    제한된 스레드 풀에서 호출을 실행하고, 토큰 버킷으로 호출 속도를 제한하며,
+    429/5xx 오류는 지터가 있는 지수 백오프로 재시도합니다. 같은 프롬프트가 동시에
+    요청되면 진행 중인 호출 하나의 결과를 공유합니다(single-flight).
+    model은 generate_content(prompt)를 제공하는 어떤 객체든 될 수 있습니다.
+
+    일반 호출은 max_workers개 스레드 풀에서, 스트리밍 호출은 호출자 스레드에서 _stream_slots(max_workers개)를
+    잡고 실행하므로 두 제한은 따로입니다. 동시에 진행되는 Gemini 호출은 최대 max_workers * 2개(기본 4 + 4)이며,
+    전체 호출 속도는 둘이 공유하는 토큰 버킷이 제한합니다.
+
+    비동기 서버(asgi_app.py)용 agenerate()/astream()은 model.generate_content_async()를
+    await하므로 응답을 기다리는 동안 스레드를 점유하지 않습니다. 동시성 제한, 속도 제한,
+    재시도, single-flight는 동기 메서드와 같은 설정을 따릅니다.
+    """
+
+    def __init__(self, model, max_workers=LLM_MAX_WORKERS, rate_per_second=LLM_RATE_PER_SECOND,
+                 burst=LLM_BURST, timeout=LLM_TIMEOUT_SECONDS, max_retries=LLM_MAX_RETRIES,
+                 backoff_base=LLM_BACKOFF_BASE_SECONDS, backoff_max=LLM_BACKOFF_MAX_SECONDS,
+                 sleep=time.sleep):
+        self.model = model
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._bucket = TokenBucket(rate_per_second, burst, sleep=sleep)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self._stream_slots = threading.BoundedSemaphore(max_workers)  # 스트리밍 호출 동시성 제한
+        self._in_flight = {}  # prompt -> Future
+        self._async_states = weakref.WeakKeyDictionary()  # 이벤트 루프 -> _AsyncCallState
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.deduplicated = 0
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, delay)  # full jitter
+
+    @staticmethod
+    def _request_options(deadline):
+        """SDK 호출에 넘길 request_options. 남은 시간을 timeout으로 넘겨, 응답 없는 호출이 마감 뒤까지 스레드를 붙잡지 않게 합니다."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError("Gemini 호출 전에 마감 시간을 초과했습니다.")
+        return {'timeout': remaining}
+
+    def _give_up(self, attempt, error, deadline):
+        """재시도하지 않을 오류를 처리합니다. 마감 시간이 지났으면 LLMTimeoutError로 바꿉니다."""
+        if time.monotonic() >= deadline:
+            raise LLMTimeoutError(f"Gemini 응답을 마감 시간 안에 받지 못했습니다: {type(error).__name__}: {error}") from error
+        raise error
+
+    def _call_with_retries(self, prompt, deadline, **kwargs):
+        attempt = 0
+        while True:
+            if not self._bucket.acquire(deadline):
+                raise LLMTimeoutError("Gemini 호출 속도 제한 대기 중 마감 시간을 초과했습니다.")
+            request_options = self._request_options(deadline)
+            with self._lock:
+                self.calls += 1
+            try:
+                return self.model.generate_content(prompt, request_options=request_options, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, deadline)
+                if delay is None:
+                    self._give_up(attempt, e, deadline)
+                self._sleep(delay)
+                attempt += 1
+
+    def _retry_delay(self, attempt, error, deadline):
+        """재시도할 오류이고 마감 전에 다시 시도할 수 있으면 기다릴 시간(초)을, 아니면 None을 반환합니다."""
+        if attempt >= self.max_retries or not is_retryable_error(error):
+            return None
+        delay = self._backoff(attempt)
+        if time.monotonic() + delay > deadline:
+            return None
+        logger.warning("Gemini 호출 재시도 (%d/%d): %s: %s", attempt + 1, self.max_retries, type(error).__name__, error)
+        with self._lock:
+            self.retries += 1
+        return delay
+
+    def _generate_once(self, prompt, deadline):
+        response = self._call_with_retries(prompt, deadline)
+        metrics.record_usage(response)
+        return response
+
+    def submit(self, prompt, timeout=None):
+        """프롬프트 호출을 예약하고 응답 객체를 돌려줄 Future를 반환합니다."""
+        with self._lock:
+            future = self._in_flight.get(prompt)
+            if future is not None:
+                self.deduplicated += 1
+                return future
+            deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+            # 호출자의 컨텍스트(지표의 엔드포인트 레이블)를 작업 스레드로 넘깁니다.
+            future = self._executor.submit(contextvars.copy_context().run, self._generate_once, prompt, deadline)
+            self._in_flight[prompt] = future
+        future.add_done_callback(lambda f: self._forget(prompt, f))
+        return future
+
+    def _forget(self, prompt, future):
+        with self._lock:
+            if self._in_flight.get(prompt) is future:
+                del self._in_flight[prompt]
+
+    def generate(self, prompt, timeout=None):
+        """프롬프트를 실행하고 응답 객체를 반환합니다. 마감 시간을 넘기면 LLMTimeoutError."""
+        timeout = timeout if timeout is not None else self.timeout
+        future = self.submit(prompt, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # 마감을 넘긴 호출에 뒤따라 온 요청이 붙지 않도록 진행 중 목록에서 뺍니다.
+            # (작업 스레드의 호출도 request_options의 timeout으로 곧 끝납니다.)
+            self._forget(prompt, future)
+            raise LLMTimeoutError(f"Gemini 응답이 {timeout:g}초 안에 도착하지 않았습니다.") from None
+
+    def stream(self, prompt, timeout=None):
+        """응답 텍스트 조각을 생성되는 대로 돌려주는 제너레이터.
+
+        호출자 스레드에서 실행되며, 재시도는 첫 응답을 받기 전까지만 합니다.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.monotonic() + timeout
+        if not self._stream_slots.acquire(timeout=timeout):
+            raise LLMTimeoutError("Gemini 스트리밍 호출 대기 중 마감 시간을 초과했습니다.")
+        try:
+            response = self._call_with_retries(prompt, deadline, stream=True)
+            chunk = None
+            for chunk in response:
+                if time.monotonic() > deadline:
+                    raise LLMTimeoutError(f"Gemini 스트리밍 응답이 {timeout:g}초 안에 끝나지 않았습니다.")
+                text = chunk.text
+                if text:
+                    yield text
+            metrics.record_usage(chunk)  # 마지막 조각에 전체 토큰 수가 담깁니다.
+        finally:
+            self._stream_slots.release()
+
+    # --- asyncio 버전 (asgi_app.py) ---
+
+    def _async_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._async_states.get(loop)
+        if state is None:
+            state = self._async_states[loop] = _AsyncCallState(self.max_workers)
+        return state
+
+    async def _acall_with_retries(self, prompt, deadline, **kwargs):
+        attempt = 0
+        while True:
+            if not await self._bucket.acquire_async(deadline):
+                raise LLMTimeoutError("Gemini 호출 속도 제한 대기 중 마감 시간을 초과했습니다.")
+            request_options = self._request_options(deadline)
+            with self._lock:
+                self.calls += 1
+            try:
+                return await self.model.generate_content_async(prompt, request_options=request_options, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, deadline)
+                if delay is None:
+                    self._give_up(attempt, e, deadline)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _acall_limited(self, state, prompt, deadline):
+        async with state.slots:
+            response = await self._acall_with_retries(prompt, deadline)
+        metrics.record_usage(response)
+        return response
+
+    async def agenerate(self, prompt, timeout=None):
+        """generate()의 asyncio 버전. 응답을 기다리는 동안 스레드를 점유하지 않습니다."""
+        timeout = timeout if timeout is not None else self.timeout
+        state = self._async_state()
+        task = state.in_flight.get(prompt)
+        if task is not None:
+            with self._lock:
+                self.deduplicated += 1
+        else:
+            deadline = time.monotonic() + timeout
+            task = asyncio.ensure_future(asyncio.wait_for(self._acall_limited(state, prompt, deadline), timeout))
+            state.in_flight[prompt] = task
+            task.add_done_callback(lambda t: self._forget_task(state, prompt, t))
+        try:
+            # 기다리던 요청 하나가 취소되어도(클라이언트 연결 종료 등) 같은 호출을 공유하는 다른 요청은 계속 기다립니다.
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError(f"Gemini 응답이 {timeout:g}초 안에 도착하지 않았습니다.") from None
+
+    def _forget_task(self, state, prompt, task):
+        if state.in_flight.get(prompt) is task:
+            del state.in_flight[prompt]
+        if not task.cancelled():
+            task.exception()  # 기다리던 요청이 모두 떠난 뒤 실패해도 경고가 남지 않도록 결과를 회수
+
+    async def astream(self, prompt, timeout=None):
+        """stream()의 asyncio 버전인 비동기 제너레이터. 재시도는 첫 응답을 받기 전까지만 합니다."""
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.monotonic() + timeout
+        state = self._async_state()
+        try:
+            await asyncio.wait_for(state.stream_slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError("Gemini 스트리밍 호출 대기 중 마감 시간을 초과했습니다.") from None
+        try:
+            response = await self._acall_with_retries(prompt, deadline, stream=True)
+            chunk = None
+            async for chunk in response:
+                if time.monotonic() > deadline:
+                    raise LLMTimeoutError(f"Gemini 스트리밍 응답이 {timeout:g}초 안에 끝나지 않았습니다.")
+                text = chunk.text
+                if text:
+                    yield text
+            metrics.record_usage(chunk)
+        finally:
+            state.stream_slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "deduplicated": self.deduplicated,
+                "in_flight": len(self._in_flight) + sum(len(state.in_flight)
+                                                        for state in list(self._async_states.values())),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
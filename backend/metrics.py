@@ -0,0 +1,143 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# --- 계측 설정 ---
+# 지연 시간 히스토그램 버킷 상한(초). SQL/직렬화(ms 단위)부터 LLM 호출(수 초)까지 덮습니다.
+METRICS_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PREFIX = 'dashboard'
+
+# 현재 요청의 엔드포인트 이름. 요청 시작 시 설정되며, 단계별 측정과 토큰 수의 레이블로 쓰입니다.
+# 작업 스레드로 넘긴 작업에도 레이블이 붙도록 contextvars.copy_context()로 전달합니다.
+current_endpoint = contextvars.ContextVar('metrics_endpoint', default='none')
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 의미)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """프로세스 내 지연 시간 히스토그램과 카운터 모음. render()는 Prometheus 텍스트 형식을 반환합니다.
+
+    지표 이름마다 (레이블 이름, 값) 튜플을 키로 값을 모읍니다. 다중 워커(serve.py)에서는
+    워커 프로세스마다 따로 집계됩니다.
+    """
+
+    def __init__(self, prefix=METRICS_PREFIX, buckets=METRICS_LATENCY_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._histograms = {}  # name -> {labels: Histogram}
+        self._counters = {}    # name -> {labels: value}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    @contextmanager
+    def time_stage(self, stage):
+        """with 블록의 실행 시간을 현재 엔드포인트의 stage 단계로 기록합니다."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_duration_seconds', time.perf_counter() - started,
+                         endpoint=current_endpoint.get(), stage=stage)
+
+    def record_usage(self, response):
+        """Gemini 응답의 usage_metadata(프롬프트/응답 토큰 수)를 현재 엔드포인트에 더합니다."""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        endpoint = current_endpoint.get()
+        for kind, field in (('prompt', 'prompt_token_count'), ('output', 'candidates_token_count')):
+            count = getattr(usage, field, None)
+            if count:
+                self.inc('llm_tokens_total', count, endpoint=endpoint, kind=kind)
+
+    def render(self, extra=()):
+        """Prometheus 텍스트 형식(0.0.4)으로 모든 지표를 반환합니다.
+
+        extra는 (이름, 타입, 설명, 값) 튜플 목록으로, 캐시 통계처럼 다른 객체가 가진 값을 함께 내보낼 때 씁니다.
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                full_name = f'{self.prefix}_{name}'
+                self._header(lines, full_name, name, 'histogram')
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{full_name}_bucket{_label_text(key + (("le", le),))} {cumulative}')
+                    lines.append(f'{full_name}_sum{_label_text(key)} {histogram.sum:.6f}')
+                    lines.append(f'{full_name}_count{_label_text(key)} {histogram.count}')
+            for name, series in sorted(self._counters.items()):
+                full_name = f'{self.prefix}_{name}'
+                self._header(lines, full_name, name, 'counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{full_name}{_label_text(key)} {value}')
+        for name, metric_type, help_text, value in extra:
+            full_name = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {metric_type}')
+            lines.append(f'{full_name} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines, full_name, name, metric_type):
+        if name in self._help:
+            lines.append(f'# HELP {full_name} {self._help[name]}')
+        lines.append(f'# TYPE {full_name} {metric_type}')
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+# 모든 모듈이 공유하는 지표 저장소
+metrics = Metrics()
+metrics.describe('stage_duration_seconds', "요청 처리 단계별 소요 시간 (llm_plan, plan_parse, sql, build_series, serialize, summarize, llm_report)")
+metrics.describe('request_duration_seconds', "엔드포인트별 요청 처리 시간 (스트리밍 응답은 헤더 전송까지)")
+metrics.describe('requests_total', "엔드포인트/상태 코드별 요청 수")
+metrics.describe('llm_tokens_total', "엔드포인트별 Gemini 토큰 사용량 (kind=prompt|output)")
@@ -0,0 +1,369 @@
+import importlib
+import json
+import logging
+import sqlite3
+
+# --- 스키마 마이그레이션 ---
+# 적용된 마지막 버전은 PRAGMA user_version에 기록됩니다.
+# 이미 배포된 마이그레이션은 수정하지 말고, 변경이 필요하면 새 버전을 추가합니다.
+
+# 서버 프로세스에서도 실행되므로 print 대신 로거로 남깁니다 (CLI는 __main__에서 로깅을 설정).
+logger = logging.getLogger('dashboard.migrations')
+
+
+def _sibling(name):
+    """migrations.py와 같은 디렉터리의 모듈(rollup, dashboards 등)을 불러옵니다.
+
+    backend 디렉터리에서 `migrations`로 불러와도, 프로젝트 루트의 database.py가 `backend.migrations`로
+    불러와도 같은 모듈을 찾도록 이 모듈의 패키지 이름을 따라갑니다. 마이그레이션 함수 안에서만 부르므로
+    모듈을 불러오는 시점에는 다른 backend 모듈이 필요 없습니다.
+    """
+    package = __name__.rpartition('.')[0]
+    return importlib.import_module(f"{package}.{name}" if package else name)
+
+
+def _initial_schema(conn):
+    """기본 테이블(POPULATOR, DASHBOARDS, PLAN_CACHE)을 생성합니다. 기존 DB에서는 아무것도 바꾸지 않습니다."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS POPULATOR (
+        ID TEXT NOT NULL,
+        NAME TEXT,
+        CODE TEXT,
+        DATA REAL,
+        DT_ID TEXT,
+        DT_DATA REAL,
+        CREATE_DATE TEXT DEFAULT (datetime('now', 'localtime'))
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS DASHBOARDS (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        NAME TEXT NOT NULL,
+        LAYOUT TEXT
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS PLAN_CACHE (
+        CACHE_KEY TEXT PRIMARY KEY,
+        TEMPLATE_HASH TEXT NOT NULL,
+        PROMPT TEXT NOT NULL,
+        PARAMS TEXT NOT NULL,
+        CREATED_AT REAL NOT NULL,
+        LAST_USED_AT REAL NOT NULL
+    )
+    """)
+
+
+def _typed_populator(conn):
+    """POPULATOR에 정수 기본 키(ROW_ID)를 추가하고 컬럼 타입을 정리해 테이블을 재구성합니다.
+
+    ROW_ID는 rowid의 별칭이므로 VACUUM 후에도 바뀌지 않아 페이지네이션 커서로 쓸 수 있습니다.
+    예전 DB에서 TEXT로 만들어진 DATA 컬럼은 REAL 친화도로 바뀌며, 숫자가 아닌 값은 그대로 보존됩니다.
+    """
+    conn.execute("""
+    CREATE TABLE POPULATOR_NEW (
+        ROW_ID INTEGER PRIMARY KEY,
+        ID TEXT NOT NULL,
+        NAME TEXT,
+        CODE TEXT,
+        DATA REAL,
+        DT_ID TEXT,
+        DT_DATA REAL,
+        CREATE_DATE TEXT DEFAULT (datetime('now', 'localtime'))
+    )
+    """)
+    conn.execute("""
+    INSERT INTO POPULATOR_NEW (ROW_ID, ID, NAME, CODE, DATA, DT_ID, DT_DATA, CREATE_DATE)
+    SELECT rowid, ID, NAME, CODE, DATA, DT_ID, DT_DATA, CREATE_DATE FROM POPULATOR
+    """)
+    conn.execute("DROP TABLE POPULATOR")
+    conn.execute("ALTER TABLE POPULATOR_NEW RENAME TO POPULATOR")
+
+
+def _populator_indexes(conn):
+    """차트 쿼리(WHERE CODE/ID = ? ... GROUP BY)를 위한 커버링 인덱스를 생성합니다."""
+    # 라인/바 차트: SELECT DT_ID, DATA ... WHERE CODE = ? / WHERE ID = ?
+    conn.execute("CREATE INDEX IF NOT EXISTS IDX_POPULATOR_CODE_DT ON POPULATOR (CODE, DT_ID, DATA)")
+    conn.execute("CREATE INDEX IF NOT EXISTS IDX_POPULATOR_ID_DT ON POPULATOR (ID, DT_ID, DATA)")
+    # 파이/도넛 차트: SELECT NAME, COUNT(*) ... WHERE CODE = ? GROUP BY NAME
+    conn.execute("CREATE INDEX IF NOT EXISTS IDX_POPULATOR_CODE_NAME ON POPULATOR (CODE, NAME)")
+    conn.execute("ANALYZE POPULATOR")
+
+
+def _rollup_add_sql(grain, length):
+    """NEW 행을 (GRAIN, CODE, BUCKET) 롤업 행에 더하는 트리거 문장. 롤업 행이 없으면 먼저 만듭니다."""
+    key = f"GRAIN = '{grain}' AND CODE IS NEW.CODE AND BUCKET IS substr(NEW.DT_ID, 1, {length})"
+    return f"""
+        INSERT INTO POPULATOR_ROLLUP (GRAIN, CODE, BUCKET, ROW_COUNT, DATA_COUNT, DATA_SUM)
+        SELECT '{grain}', NEW.CODE, substr(NEW.DT_ID, 1, {length}), 0, 0, 0
+        WHERE NOT EXISTS (SELECT 1 FROM POPULATOR_ROLLUP WHERE {key});
+        UPDATE POPULATOR_ROLLUP SET
+            ROW_COUNT = ROW_COUNT + 1,
+            DATA_COUNT = DATA_COUNT + (NEW.DATA IS NOT NULL),
+            DATA_SUM = DATA_SUM + IFNULL(NEW.DATA, 0),
+            DATA_MIN = COALESCE(min(DATA_MIN, NEW.DATA), DATA_MIN, NEW.DATA),
+            DATA_MAX = COALESCE(max(DATA_MAX, NEW.DATA), DATA_MAX, NEW.DATA)
+        WHERE {key};"""
+
+
+def _rollup_remove_sql(grain, length):
+    """OLD 행을 롤업에서 빼는 트리거 문장. 최솟값/최댓값이 빠진 경우에만 해당 버킷을 다시 계산합니다."""
+    key = f"GRAIN = '{grain}' AND CODE IS OLD.CODE AND BUCKET IS substr(OLD.DT_ID, 1, {length})"
+    bucket_rows = f"FROM POPULATOR WHERE CODE IS OLD.CODE AND substr(DT_ID, 1, {length}) IS substr(OLD.DT_ID, 1, {length})"
+    return f"""
+        UPDATE POPULATOR_ROLLUP SET
+            ROW_COUNT = ROW_COUNT - 1,
+            DATA_COUNT = DATA_COUNT - (OLD.DATA IS NOT NULL),
+            DATA_SUM = DATA_SUM - IFNULL(OLD.DATA, 0)
+        WHERE {key};
+        DELETE FROM POPULATOR_ROLLUP WHERE {key} AND ROW_COUNT <= 0;
+        UPDATE POPULATOR_ROLLUP SET
+            DATA_MIN = (SELECT MIN(DATA) {bucket_rows}),
+            DATA_MAX = (SELECT MAX(DATA) {bucket_rows})
+        WHERE {key} AND OLD.DATA IS NOT NULL AND (DATA_MIN IS OLD.DATA OR DATA_MAX IS OLD.DATA);"""
+
+
+_NAME_ROLLUP_ADD_SQL = """
+        INSERT INTO POPULATOR_NAME_ROLLUP (CODE, NAME, ROW_COUNT)
+        SELECT NEW.CODE, NEW.NAME, 0
+        WHERE NOT EXISTS (SELECT 1 FROM POPULATOR_NAME_ROLLUP WHERE CODE IS NEW.CODE AND NAME IS NEW.NAME);
+        UPDATE POPULATOR_NAME_ROLLUP SET ROW_COUNT = ROW_COUNT + 1 WHERE CODE IS NEW.CODE AND NAME IS NEW.NAME;"""
+
+_NAME_ROLLUP_REMOVE_SQL = """
+        UPDATE POPULATOR_NAME_ROLLUP SET ROW_COUNT = ROW_COUNT - 1 WHERE CODE IS OLD.CODE AND NAME IS OLD.NAME;
+        DELETE FROM POPULATOR_NAME_ROLLUP WHERE CODE IS OLD.CODE AND NAME IS OLD.NAME AND ROW_COUNT <= 0;"""
+
+
+def _populator_rollups(conn):
+    """일/월 단위 롤업 테이블과 이를 갱신하는 POPULATOR 트리거를 만들고 기존 데이터로 채웁니다.
+
+    CODE/NAME/BUCKET에는 NULL이 올 수 있어 기본 키 대신 일반 인덱스를 두고 IS로 비교합니다.
+    """
+    conn.execute("""
+    CREATE TABLE POPULATOR_ROLLUP (
+        GRAIN TEXT NOT NULL,
+        CODE TEXT,
+        BUCKET TEXT,
+        ROW_COUNT INTEGER NOT NULL,
+        DATA_COUNT INTEGER NOT NULL,
+        DATA_SUM REAL NOT NULL,
+        DATA_MIN REAL,
+        DATA_MAX REAL
+    )
+    """)
+    # 차트 쿼리가 테이블을 거치지 않도록 집계 컬럼까지 포함한 커버링 인덱스
+    conn.execute("CREATE INDEX IDX_POPULATOR_ROLLUP_KEY ON POPULATOR_ROLLUP "
+                 "(GRAIN, CODE, BUCKET, ROW_COUNT, DATA_COUNT, DATA_SUM, DATA_MIN, DATA_MAX)")
+    conn.execute("""
+    CREATE TABLE POPULATOR_NAME_ROLLUP (
+        CODE TEXT,
+        NAME TEXT,
+        ROW_COUNT INTEGER NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX IDX_POPULATOR_NAME_ROLLUP_KEY ON POPULATOR_NAME_ROLLUP (CODE, NAME, ROW_COUNT)")
+
+    rollup = _sibling('rollup')
+    add_sql = "".join(_rollup_add_sql(grain, length) for grain, length in rollup.ROLLUP_GRAINS.items()) + _NAME_ROLLUP_ADD_SQL
+    remove_sql = ("".join(_rollup_remove_sql(grain, length) for grain, length in rollup.ROLLUP_GRAINS.items())
+                  + _NAME_ROLLUP_REMOVE_SQL)
+    conn.execute(f"CREATE TRIGGER TRG_POPULATOR_ROLLUP_INSERT AFTER INSERT ON POPULATOR BEGIN{add_sql}\n    END")
+    conn.execute(f"CREATE TRIGGER TRG_POPULATOR_ROLLUP_DELETE AFTER DELETE ON POPULATOR BEGIN{remove_sql}\n    END")
+    conn.execute("CREATE TRIGGER TRG_POPULATOR_ROLLUP_UPDATE AFTER UPDATE OF CODE, NAME, DATA, DT_ID ON POPULATOR "
+                 f"BEGIN{remove_sql}{add_sql}\n    END")
+    rollup.rebuild_rollups(conn)
+    conn.execute("ANALYZE POPULATOR_ROLLUP")
+    conn.execute("ANALYZE POPULATOR_NAME_ROLLUP")
+
+
+def _data_version(conn):
+    """POPULATOR에 쓰기가 있을 때마다 1씩 증가하는 DATA_VERSION 카운터와 트리거를 만듭니다.
+
+    차트 결과 캐시(result_cache.py)는 이 값이 바뀌면 저장된 응답을 버립니다.
+    """
+    conn.execute("""
+    CREATE TABLE DATA_VERSION (
+        ID INTEGER PRIMARY KEY CHECK (ID = 1),
+        VERSION INTEGER NOT NULL
+    )
+    """)
+    conn.execute("INSERT INTO DATA_VERSION (ID, VERSION) VALUES (1, 1)")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f"""
+        CREATE TRIGGER TRG_POPULATOR_VERSION_{event} AFTER {event} ON POPULATOR
+        BEGIN
+            UPDATE DATA_VERSION SET VERSION = VERSION + 1 WHERE ID = 1;
+        END
+        """)
+
+
+def _dashboard_widgets(conn):
+    """대시보드 레이아웃(DASHBOARDS.LAYOUT JSON)을 위젯 단위 행(DASHBOARD_WIDGETS)으로 옮기고 LAYOUT을 비웁니다.
+
+    위젯 행마다 VERSION이 있어 위젯 단위 수정과 충돌 감지(PATCH /api/dashboards/<id>/widgets)에 쓰입니다.
+    """
+    conn.execute("""
+    CREATE TABLE DASHBOARD_WIDGETS (
+        DASHBOARD_ID INTEGER NOT NULL,
+        WIDGET_ID TEXT NOT NULL,
+        POSITION INTEGER NOT NULL,
+        X INTEGER,
+        Y INTEGER,
+        W INTEGER,
+        H INTEGER,
+        CHART_ID TEXT,
+        INITIAL_PROMPT TEXT,
+        EXTRA TEXT,
+        VERSION INTEGER NOT NULL DEFAULT 1,
+        PRIMARY KEY (DASHBOARD_ID, WIDGET_ID)
+    ) WITHOUT ROWID
+    """)
+    replace_layout = _sibling('dashboards').replace_layout
+    for dashboard_id, layout in conn.execute("SELECT ID, LAYOUT FROM DASHBOARDS").fetchall():
+        try:
+            widgets = json.loads(layout) if layout else []
+        except ValueError:
+            logger.warning("대시보드 %s: LAYOUT이 올바른 JSON이 아니어서 건너뜁니다.", dashboard_id)
+            continue
+        if not isinstance(widgets, list):
+            widgets = []
+        # 'i'가 없거나 중복된 위젯은 예전 프론트엔드에서도 표시되지 않으므로 버립니다.
+        unique = {}
+        for widget in widgets:
+            if isinstance(widget, dict) and widget.get('i') not in (None, '') and str(widget['i']) not in unique:
+                unique[str(widget['i'])] = widget
+        replace_layout(conn, dashboard_id, list(unique.values()))
+    conn.execute("UPDATE DASHBOARDS SET LAYOUT = NULL")
+
+
+def _precomputed(conn):
+    """위젯 프롬프트별로 미리 계산한 차트 응답/분석 보고서(PRECOMPUTED)와 계산 프로세스 임대(PRECOMPUTE_LEASE)를 만듭니다.
+
+    scheduler.py가 채우며, DATA_VERSION이 현재 데이터 버전과 같은 결과만 최신으로 취급합니다.
+    """
+    conn.execute("""
+    CREATE TABLE PRECOMPUTED (
+        KIND TEXT NOT NULL,
+        PROMPT TEXT NOT NULL,
+        DATA_VERSION INTEGER NOT NULL,
+        RESULT TEXT,
+        ERROR TEXT,
+        COMPUTED_AT REAL NOT NULL,
+        DURATION REAL,
+        PRIMARY KEY (KIND, PROMPT)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE PRECOMPUTE_LEASE (
+        ID INTEGER PRIMARY KEY CHECK (ID = 1),
+        OWNER TEXT,
+        EXPIRES_AT REAL NOT NULL
+    )
+    """)
+    conn.execute("INSERT INTO PRECOMPUTE_LEASE (ID, OWNER, EXPIRES_AT) VALUES (1, NULL, 0)")
+
+
+def _ingest_deferred(conn):
+    """인덱스를 미룬 대량 적재(ingest.py)가 내린 POPULATOR 인덱스/트리거의 CREATE 문을 보관하는 INGEST_DEFERRED를 만듭니다.
+
+    적재가 끝나기 전에 프로세스가 죽으면 여기에 행이 남고, 다음 migrate()에서 restore_deferred_objects로 복구합니다.
+    """
+    conn.execute("""
+    CREATE TABLE INGEST_DEFERRED (
+        NAME TEXT PRIMARY KEY,
+        TYPE TEXT NOT NULL,
+        SQL TEXT NOT NULL,
+        DROPPED_AT REAL NOT NULL
+    )
+    """)
+
+
+MIGRATIONS = [
+    (1, "기본 스키마", _initial_schema),
+    (2, "POPULATOR 정수 기본 키 및 타입 정리", _typed_populator),
+    (3, "POPULATOR 커버링 인덱스", _populator_indexes),
+    (4, "일/월 단위 롤업 테이블과 트리거", _populator_rollups),
+    (5, "데이터 버전 카운터", _data_version),
+    (6, "대시보드 위젯 단위 저장", _dashboard_widgets),
+    (7, "대시보드 미리 계산 결과", _precomputed),
+    (8, "대량 적재 중 내린 인덱스/트리거 기록", _ingest_deferred),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def restore_deferred_objects(conn):
+    """INGEST_DEFERRED에 남은 POPULATOR 인덱스/트리거를 다시 만들고 롤업과 데이터 버전을 갱신합니다.
+
+    이미 있는 객체는 건너뛰고, 기록을 지우는 것까지 한 트랜잭션에서 처리합니다. 트리거가 없는 동안
+    적재된 행은 롤업 재계산에 모두 반영됩니다. conn은 isolation_level=None이어야 하며,
+    복구한 기록 수(없으면 0)를 반환합니다.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        pending = conn.execute("SELECT NAME, SQL FROM INGEST_DEFERRED ORDER BY DROPPED_AT, NAME").fetchall()
+        if pending:
+            existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'POPULATOR'")}
+            for name, sql in pending:
+                if name not in existing:
+                    conn.execute(sql)
+            _sibling('rollup').rebuild_rollups(conn)
+            _sibling('result_cache').bump_data_version(conn)  # 버전 트리거가 없던 동안의 변경을 한 번에 기록
+            conn.execute("DELETE FROM INGEST_DEFERRED")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    if pending:
+        conn.execute("ANALYZE")
+    return len(pending)
+
+
+def migrate(conn, target_version=LATEST_VERSION):
+    """아직 적용되지 않은 마이그레이션을 target_version까지 순서대로 적용합니다.
+
+    마이그레이션마다 하나의 트랜잭션(BEGIN IMMEDIATE)에서 실행하고 user_version을 함께
+    갱신하므로, 여러 프로세스가 동시에 시작해도 같은 마이그레이션이 두 번 적용되지 않습니다.
+    중단된 대량 적재가 내려 둔 인덱스/트리거가 있으면 마지막에 복구합니다.
+    적용한 버전 목록을 반환합니다.
+    """
+    applied = []
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # 트랜잭션을 직접 관리
+    try:
+        for version, description, apply in MIGRATIONS:
+            if version > target_version:
+                break
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if get_schema_version(conn) >= version:
+                    conn.execute("ROLLBACK")
+                    continue
+                logger.info("스키마 마이그레이션 적용 중: v%d %s", version, description)
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+        if get_schema_version(conn) >= 8:
+            restored = restore_deferred_objects(conn)
+            if restored:
+                logger.warning("중단된 대량 적재에서 내려 둔 인덱스/트리거 %d개를 복구했습니다.", restored)
+    finally:
+        conn.isolation_level = previous_isolation
+    return applied
+
+
+def migrate_database(db_path, target_version=LATEST_VERSION):
+    """db_path의 데이터베이스에 마이그레이션을 적용합니다."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return migrate(conn, target_version)
+    finally:
+        conn.close()
@@ -0,0 +1,62 @@
+import numpy as np
+
+# 같은 (카테고리, 그룹) 셀에 여러 행이 있을 때 사용할 수 있는 집계 방식
+PIVOT_AGGREGATES = ('sum', 'avg', 'max', 'min', 'count')
+PIVOT_DEFAULT_AGGREGATE = 'sum'
+
+
+def pivot_series(rows, x_col, y_col, group_col, aggregate=PIVOT_DEFAULT_AGGREGATE):
+    """행 목록을 카테고리 × 그룹 행렬로 한 번에 집계해 ApexCharts 시리즈로 만듭니다.
+
+    행을 한 번만 훑어 각 행의 셀 위치를 계산하고, 셀별 집계는 NumPy로 벡터화합니다.
+    값이 없는 셀은 0, y 값이 NULL인 행은 count를 제외한 집계에서 무시됩니다.
+    (categories, series)를 반환하며 categories와 그룹 이름은 정렬된 순서입니다.
+    """
+    if aggregate not in PIVOT_AGGREGATES:
+        raise ValueError(f"지원하지 않는 집계 방식입니다: {aggregate} (가능한 값: {', '.join(PIVOT_AGGREGATES)})")
+    if not rows:
+        return [], []
+
+    xs, groups, ys = [], [], []
+    for row in rows:
+        xs.append(row[x_col])
+        groups.append(row[group_col])
+        ys.append(row[y_col])
+
+    categories = sorted(set(xs))
+    group_names = sorted(set(groups))
+    category_index = {category: i for i, category in enumerate(categories)}
+    group_index = {group: i for i, group in enumerate(group_names)}
+
+    n_categories = len(categories)
+    n_cells = len(group_names) * n_categories
+    cells = np.fromiter(
+        (group_index[g] * n_categories + category_index[x] for g, x in zip(groups, xs)),
+        dtype=np.int64, count=len(xs),
+    )
+
+    if aggregate == 'count':
+        matrix = np.bincount(cells, minlength=n_cells)
+    else:
+        values = np.array([np.nan if y is None else y for y in ys], dtype=np.float64)
+        valid = ~np.isnan(values)
+        cells, values = cells[valid], values[valid]
+        counts = np.bincount(cells, minlength=n_cells)
+
+        if aggregate in ('sum', 'avg'):
+            matrix = np.bincount(cells, weights=values, minlength=n_cells)
+            if aggregate == 'avg':
+                matrix = np.divide(matrix, counts, out=np.zeros(n_cells), where=counts > 0)
+        else:
+            fill = -np.inf if aggregate == 'max' else np.inf
+            matrix = np.full(n_cells, fill)
+            (np.maximum if aggregate == 'max' else np.minimum).at(matrix, cells, values)
+            matrix[counts == 0] = 0
+
+        # 정수 데이터의 합계/최댓값/최솟값은 정수로 돌려줍니다.
+        if aggregate != 'avg' and all(isinstance(y, int) for y in ys if y is not None):
+            matrix = matrix.astype(np.int64)
+
+    matrix = matrix.reshape(len(group_names), n_categories)
+    series = [{"name": group, "data": matrix[i].tolist()} for i, group in enumerate(group_names)]
+    return categories, series
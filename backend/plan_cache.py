@@ -0,0 +1,160 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# --- 쿼리 플랜 캐시 설정 ---
+PLAN_CACHE_MAX_ENTRIES = 512          # 프로세스 내 LRU 최대 항목 수
+PLAN_CACHE_MAX_ROWS = 10000           # SQLite PLAN_CACHE 테이블 최대 행 수
+PLAN_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+
+def normalize_prompt(prompt):
+    """공백과 대소문자 차이를 없앤 정규화된 프롬프트를 반환합니다."""
+    return " ".join(prompt.split()).lower()
+
+
+class PlanCache:
+    """프롬프트 → 차트 쿼리 플랜(params) 캐시.
+
+    프로세스 내 LRU를 앞단에 두고, 그 뒤에 SQLite PLAN_CACHE 테이블(migrations.py v1)을 둡니다.
+    키는 정규화된 프롬프트와 프롬프트 템플릿 해시로 구성되므로 템플릿이 바뀌면
+    기존 플랜은 자연스럽게 무효화됩니다.
+    """
+
+    def __init__(self, pool, template, max_entries=PLAN_CACHE_MAX_ENTRIES,
+                 max_rows=PLAN_CACHE_MAX_ROWS, ttl_seconds=PLAN_CACHE_TTL_SECONDS):
+        self.pool = pool  # db.ConnectionPool
+        self.template_hash = hashlib.sha256(template.encode('utf-8')).hexdigest()[:16]
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (params, created_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, prompt):
+        raw = f"{self.template_hash}:{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _is_expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key, params, created_at):
+        """LRU에 항목을 추가하고 크기 제한을 넘는 오래된 항목을 제거합니다. (lock 보유 상태에서 호출)"""
+        self._entries[key] = (params, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, prompt):
+        """캐시된 params 딕셔너리를 반환합니다. 없거나 만료되었으면 None."""
+        key = self.make_key(prompt)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                params, created_at = entry
+                if not self._is_expired(created_at, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(json.dumps(params))  # 호출자가 수정해도 캐시는 안전하도록 복사
+                del self._entries[key]
+                self.evictions += 1
+
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT PARAMS, CREATED_AT FROM PLAN_CACHE WHERE CACHE_KEY = ?", (key,)
+            ).fetchone()
+            if row is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            params_json, created_at = row
+            if self._is_expired(created_at, now):
+                conn.execute("DELETE FROM PLAN_CACHE WHERE CACHE_KEY = ?", (key,))
+                conn.commit()
+                with self._lock:
+                    self.evictions += 1
+                    self.misses += 1
+                return None
+            conn.execute("UPDATE PLAN_CACHE SET LAST_USED_AT = ? WHERE CACHE_KEY = ?", (now, key))
+            conn.commit()
+
+        params = json.loads(params_json)
+        with self._lock:
+            self.db_hits += 1
+            self._remember(key, params, created_at)
+        return json.loads(params_json)
+
+    def put(self, prompt, params):
+        """프롬프트에 대한 params를 LRU와 SQLite 양쪽에 저장합니다."""
+        key = self.make_key(prompt)
+        now = time.time()
+        params_json = json.dumps(params, ensure_ascii=False, sort_keys=True)
+
+        with self._lock:
+            self._remember(key, json.loads(params_json), now)
+
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO PLAN_CACHE "
+                "(CACHE_KEY, TEMPLATE_HASH, PROMPT, PARAMS, CREATED_AT, LAST_USED_AT) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.template_hash, normalize_prompt(prompt), params_json, now, now),
+            )
+            self._evict_rows(conn, now)
+            conn.commit()
+
+    def _evict_rows(self, conn, now):
+        """만료된 행과 최대 행 수를 넘는 가장 오래 사용되지 않은 행을 삭제합니다."""
+        removed = 0
+        if self.ttl_seconds is not None:
+            removed += conn.execute(
+                "DELETE FROM PLAN_CACHE WHERE CREATED_AT < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        removed += conn.execute(
+            "DELETE FROM PLAN_CACHE WHERE CACHE_KEY IN ("
+            " SELECT CACHE_KEY FROM PLAN_CACHE ORDER BY LAST_USED_AT DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_rows,),
+        ).rowcount
+        if removed:
+            with self._lock:
+                self.evictions += removed
+
+    def delete(self, prompt):
+        """프롬프트의 캐시 항목을 LRU와 SQLite 양쪽에서 지웁니다."""
+        key = self.make_key(prompt)
+        with self._lock:
+            self._entries.pop(key, None)
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM PLAN_CACHE WHERE CACHE_KEY = ?", (key,))
+            conn.commit()
+
+    def clear(self):
+        """LRU와 SQLite 캐시를 모두 비웁니다."""
+        with self._lock:
+            self._entries.clear()
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM PLAN_CACHE")
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.db_hits + self.misses
+            return {
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.db_hits) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "template_hash": self.template_hash,
+            }
@@ -0,0 +1,265 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from pivot import PIVOT_AGGREGATES, PIVOT_DEFAULT_AGGREGATE
+from rollup import ROLLUP_AGGREGATES, ROLLUP_DEFAULT_AGGREGATE, ROLLUP_GRAINS
+
+# --- 차트 쿼리 플랜 컴파일러 ---
+# Gemini가 만든 플랜(params)을 POPULATOR 스키마로 검증하고, 컬럼 이름은 화이트리스트에서만,
+# 값은 모두 바인딩 파라미터로 넣은 SQL을 만듭니다. 같은 모양의 플랜은 같은 SQL 문자열을 쓰므로
+# SQL은 모양(shape)별로 한 번만 만들고, sqlite3의 문장 캐시도 그대로 재사용됩니다.
+PLAN_COLUMNS = ('ID', 'NAME', 'CODE', 'DATA', 'DT_ID', 'DT_DATA')
+PLAN_CHART_TYPES = ('line', 'bar', 'pie', 'donut')
+PLAN_DIMENSIONS = ('2D', '3D')
+PLAN_RANGE_OPERATORS = {'gte': '>=', 'gt': '>', 'lte': '<=', 'lt': '<'}
+PLAN_RANGE_ALIASES = {'from': 'gte', 'to': 'lte'}
+_RANGE_OPERATOR_NAMES = {operator: name for name, operator in PLAN_RANGE_OPERATORS.items()}
+PLAN_MAX_IN_VALUES = 100
+QUERY_PLAN_CACHE_SIZE = 256
+
+# 롤업 테이블에서 버킷별 값을 다시 합치는 식 (BUCKET으로 GROUP BY)
+ROLLUP_AGGREGATE_SQL = {
+    'sum': "CASE WHEN SUM(DATA_COUNT) > 0 THEN SUM(DATA_SUM) END",
+    'avg': "CASE WHEN SUM(DATA_COUNT) > 0 THEN SUM(DATA_SUM) / SUM(DATA_COUNT) END",
+    'max': "MAX(DATA_MAX)",
+    'min': "MIN(DATA_MIN)",
+    'count': "SUM(ROW_COUNT)",
+}
+
+# 롤업을 쓸 수 없을 때 POPULATOR 원본에서 같은 결과를 내는 식
+# (롤업은 DATA와 행 개수만 가지므로 DT_DATA 등 다른 컬럼의 일/월 단위 집계도 이 식으로 계산합니다.)
+RAW_AGGREGATE_SQL = {
+    'sum': "SUM({column})",
+    'avg': "AVG({column})",
+    'max': "MAX({column})",
+    'min': "MIN({column})",
+    'count': "COUNT(*)",
+}
+ROLLUP_VALUE_COLUMNS = ('DATA', 'COUNT')
+
+CompiledQuery = namedtuple('CompiledQuery', ['sql', 'params', 'plan'])
+
+
+def _column(value, key):
+    """플랜의 컬럼 이름을 정규화하고 화이트리스트로 검증합니다."""
+    column = str(value).strip().strip('"').upper() if value is not None else ''
+    if column not in PLAN_COLUMNS:
+        raise ValueError(f"Gemini 응답의 '{key}' 값이 올바르지 않습니다: {value} (가능한 값: {', '.join(PLAN_COLUMNS)})")
+    return column
+
+
+def _scalar(value, column):
+    if isinstance(value, (str, int, float)):
+        return value
+    raise ValueError(f"Gemini 응답의 '{column}' 필터 값이 올바르지 않습니다: {value}")
+
+
+def normalize_filters(filters):
+    """필터를 (컬럼, 연산자, 값) 목록으로 바꿉니다. 컬럼/연산자 순으로 정렬해 같은 조건은 같은 SQL이 되게 합니다.
+
+    - 값: {"CODE": "A"} → CODE = ?
+    - 목록: {"CODE": ["A", "B"]} → CODE IN (?, ?)
+    - 범위: {"DT_ID": {"gte": "2023-01-01", "lt": "2023-02-01"}} → DT_ID >= ? AND DT_ID < ?
+    - null: {"NAME": null} → NAME IS NULL
+    """
+    if not filters:
+        return []
+    if not isinstance(filters, dict):
+        raise ValueError("Gemini 응답의 'filters' 형식이 올바르지 않습니다. 딕셔너리여야 합니다.")
+
+    conditions = []
+    for key, value in filters.items():
+        column = _column(key, 'filters')
+        if value is None:
+            conditions.append((column, 'IS NULL', None))
+        elif isinstance(value, list):
+            if not 0 < len(value) <= PLAN_MAX_IN_VALUES:
+                raise ValueError(f"Gemini 응답의 '{column}' 필터 목록은 1~{PLAN_MAX_IN_VALUES}개의 값이어야 합니다.")
+            values = tuple(sorted({_scalar(item, column) for item in value}, key=lambda item: (str(type(item)), item)))
+            conditions.append((column, 'IN', values))
+        elif isinstance(value, dict):
+            if not value:
+                raise ValueError(f"Gemini 응답의 '{column}' 범위 필터가 비어 있습니다.")
+            for operator, bound in value.items():
+                operator = PLAN_RANGE_ALIASES.get(str(operator).lower(), str(operator).lower())
+                if operator not in PLAN_RANGE_OPERATORS:
+                    raise ValueError(f"Gemini 응답의 '{column}' 범위 연산자가 올바르지 않습니다: {operator} "
+                                     f"(가능한 값: {', '.join(PLAN_RANGE_OPERATORS)})")
+                conditions.append((column, PLAN_RANGE_OPERATORS[operator], _scalar(bound, column)))
+        else:
+            conditions.append((column, '=', _scalar(value, column)))
+    return sorted(conditions, key=lambda condition: (condition[0], condition[1]))
+
+
+def normalize_plan(params):
+    """Gemini 플랜을 검증해 정규화된 플랜 딕셔너리를 반환합니다. 잘못된 플랜은 ValueError로 알립니다."""
+    if not isinstance(params, dict):
+        raise ValueError("Gemini 응답이 JSON 객체가 아닙니다. 프롬프트를 더 명확하게 작성해주세요.")
+    if 'x_axis' not in params or 'y_axis' not in params:
+        raise ValueError("Gemini 응답에 'x_axis' 또는 'y_axis' 정보가 누락되었습니다. 프롬프트를 더 명확하게 작성해주세요.")
+
+    chart_type = str(params.get('chart_type', '')).lower()
+    if chart_type not in PLAN_CHART_TYPES:
+        raise ValueError(f"Gemini 응답의 'chart_type' 값이 올바르지 않습니다. ({', '.join(PLAN_CHART_TYPES)} 중 하나여야 합니다.)")
+    dimension = str(params.get('dimension') or '2D').upper()
+    if dimension not in PLAN_DIMENSIONS:
+        raise ValueError("Gemini 응답의 'dimension' 값은 '2D' 또는 '3D'여야 합니다.")
+
+    plan = {"chart_type": chart_type, "dimension": dimension, "x_axis": _column(params['x_axis'], 'x_axis'),
+            "filters": normalize_filters(params.get('filters'))}
+    y_axis = str(params['y_axis']).strip().strip('"').upper()
+
+    if chart_type in ('pie', 'donut'):
+        # DT_DATA가 아니면 항목별 개수(COUNT(*))를 그립니다.
+        plan["y_axis"] = 'DT_DATA' if y_axis == 'DT_DATA' else 'COUNT'
+        return plan
+
+    if dimension == '3D':
+        if not params.get('group_by'):
+            raise ValueError("Gemini 응답에 'group_by' 정보가 누락되었습니다. 3D 차트 프롬프트를 더 명확하게 작성해주세요.")
+        aggregate = params.get('aggregate') or PIVOT_DEFAULT_AGGREGATE
+        if aggregate not in PIVOT_AGGREGATES:
+            raise ValueError(f"Gemini 응답의 'aggregate' 값이 올바르지 않습니다. ({', '.join(PIVOT_AGGREGATES)} 중 하나여야 합니다.)")
+        plan.update(y_axis=_column(y_axis, 'y_axis'), group_by=_column(params['group_by'], 'group_by'), aggregate=aggregate)
+        return plan
+
+    if plan["x_axis"] == 'DT_ID' and params.get('time_grain'):
+        if params['time_grain'] not in ROLLUP_GRAINS:
+            raise ValueError(f"Gemini 응답의 'time_grain' 값이 올바르지 않습니다. ({', '.join(ROLLUP_GRAINS)} 중 하나여야 합니다.)")
+        aggregate = params.get('aggregate') or ROLLUP_DEFAULT_AGGREGATE
+        if aggregate not in ROLLUP_AGGREGATES:
+            raise ValueError(f"Gemini 응답의 'aggregate' 값이 올바르지 않습니다. ({', '.join(ROLLUP_AGGREGATES)} 중 하나여야 합니다.)")
+        y_axis = 'COUNT' if aggregate == 'count' else _column(y_axis, 'y_axis')
+        plan.update(y_axis=y_axis, time_grain=params['time_grain'], aggregate=aggregate)
+        return plan
+
+    plan["y_axis"] = _column(y_axis, 'y_axis')
+    return plan
+
+
+def plan_params(plan):
+    """정규화된 플랜을 normalize_plan이 다시 받을 수 있는 Gemini 플랜 형식으로 되돌립니다 (플랜 캐시 저장용).
+
+    normalize_plan(plan_params(plan)) == plan 입니다.
+    """
+    filters = {}
+    for column, operator, value in plan["filters"]:
+        if operator == 'IS NULL':
+            filters[column] = None
+        elif operator == 'IN':
+            filters[column] = list(value)
+        elif operator == '=':
+            filters[column] = value
+        else:
+            filters.setdefault(column, {})[_RANGE_OPERATOR_NAMES[operator]] = value
+    params = {key: value for key, value in plan.items() if key != 'filters'}
+    if filters:
+        params["filters"] = filters
+    return params
+
+
+def _rollup_eligible(filter_shape):
+    """필터가 없거나 CODE의 같음/목록 조건뿐이면 롤업 테이블로 답할 수 있습니다."""
+    return all(column == 'CODE' and operator in ('=', 'IN') for column, operator, _ in filter_shape)
+
+
+def _where_sql(filter_shape):
+    clauses = []
+    for column, operator, size in filter_shape:
+        if operator == 'IS NULL':
+            clauses.append(f"{column} IS NULL")
+        elif operator == 'IN':
+            clauses.append(f"{column} IN ({', '.join('?' for _ in range(size))})")
+        else:
+            clauses.append(f"{column} {operator} ?")
+    return " AND ".join(clauses)
+
+
+@lru_cache(maxsize=QUERY_PLAN_CACHE_SIZE)
+def _compile_sql(shape, rollup):
+    """플랜 모양(값을 뺀 구조)에 대한 SQL 템플릿을 만들어 캐시합니다."""
+    kind, x_axis, y_axis, group_by, aggregate, time_grain, filter_shape = shape
+    where = _where_sql(filter_shape)
+    where_sql = f" WHERE {where}" if where else ""
+
+    if kind == 'pie':
+        if y_axis == 'DT_DATA':
+            return f"SELECT {x_axis}, DT_DATA FROM POPULATOR{where_sql} ORDER BY {x_axis}"
+        if rollup and x_axis in ('NAME', 'CODE'):
+            return f"SELECT {x_axis}, SUM(ROW_COUNT) as count_value FROM POPULATOR_NAME_ROLLUP{where_sql} GROUP BY {x_axis}"
+        return f"SELECT {x_axis}, COUNT(*) as count_value FROM POPULATOR{where_sql} GROUP BY {x_axis}"
+
+    if kind == 'time_series':
+        if rollup:
+            where = "GRAIN = ?" + (f" AND {where}" if where else "")
+            return (f"SELECT BUCKET AS DT_ID, {ROLLUP_AGGREGATE_SQL[aggregate]} AS \"{y_axis}\""
+                    f" FROM POPULATOR_ROLLUP WHERE {where} GROUP BY BUCKET ORDER BY BUCKET")
+        length = ROLLUP_GRAINS[time_grain]
+        return (f"SELECT substr(DT_ID, 1, {length}) AS DT_ID, {RAW_AGGREGATE_SQL[aggregate].format(column=y_axis)} AS \"{y_axis}\""
+                f" FROM POPULATOR{where_sql} GROUP BY 1 ORDER BY 1")
+
+    columns = [x_axis, y_axis] + ([group_by] if group_by else [])
+    return f"SELECT {', '.join(columns)} FROM POPULATOR{where_sql} ORDER BY {x_axis}"
+
+
+def compile_plan(params, use_rollup=True):
+    """Gemini 플랜을 검증해 CompiledQuery(sql, params, plan)로 만듭니다.
+
+    plan은 정규화된 플랜(대문자 컬럼, 기본값이 채워진 aggregate 등)이며 응답 생성에 그대로 씁니다.
+    use_rollup=False면 롤업 테이블 대신 항상 POPULATOR 원본을 조회합니다 (벤치마크 비교용).
+    """
+    plan = normalize_plan(params)
+    if plan["chart_type"] in ('pie', 'donut'):
+        kind = 'pie'
+    elif 'time_grain' in plan:
+        kind = 'time_series'
+    else:
+        kind = 'series'
+
+    filter_shape = _filter_shape(plan["filters"])
+    shape = (kind, plan["x_axis"], plan["y_axis"], plan.get("group_by"), plan.get("aggregate"),
+             plan.get("time_grain"), filter_shape)
+    rollup = use_rollup and _rollup_eligible(filter_shape)
+    if kind == 'time_series' and plan["y_axis"] not in ROLLUP_VALUE_COLUMNS:
+        rollup = False  # 롤업에 없는 컬럼은 POPULATOR 원본에서 버킷별로 집계
+    sql = _compile_sql(shape, rollup)
+
+    bind = [plan["time_grain"]] if kind == 'time_series' and rollup else []  # GRAIN = ?
+    return CompiledQuery(sql, tuple(bind) + _filter_params(plan["filters"]), plan)
+
+
+def _filter_shape(filters):
+    return tuple((column, operator, len(value) if operator == 'IN' else None) for column, operator, value in filters)
+
+
+def _filter_params(filters):
+    bind = []
+    for _, operator, value in filters:
+        if operator == 'IN':
+            bind.extend(value)
+        elif operator != 'IS NULL':
+            bind.append(value)
+    return tuple(bind)
+
+
+def scan_columns(plan):
+    """집계 없이 POPULATOR 행을 x_axis 순으로 읽는 플랜(2D/3D 라인·바, DT_DATA 파이)이면 읽는 컬럼 목록을 반환합니다.
+
+    목록의 첫 컬럼이 x_axis입니다. 롤업이나 GROUP BY로 집계하는 플랜이면 None입니다.
+    """
+    if plan["chart_type"] in ('pie', 'donut'):
+        return [plan["x_axis"], 'DT_DATA'] if plan["y_axis"] == 'DT_DATA' else None
+    if 'time_grain' in plan:
+        return None
+    return [plan["x_axis"], plan["y_axis"]] + ([plan["group_by"]] if plan.get("group_by") else [])
+
+
+def compile_scan(filters, columns):
+    """필터와 x_axis가 같은 원본 행 쿼리 여러 개를 대신하는 POPULATOR 스캔 하나를 (SQL, 매개변수)로 만듭니다.
+
+    filters는 정규화된 플랜의 filters, columns는 x_axis를 첫 컬럼으로 위젯들이 읽는 컬럼을 모두 모은 목록입니다.
+    각 위젯의 쿼리와 같은 순서(x_axis)로 행을 돌려줍니다.
+    """
+    where = _where_sql(_filter_shape(filters))
+    where_sql = f" WHERE {where}" if where else ""
+    return f"SELECT {', '.join(columns)} FROM POPULATOR{where_sql} ORDER BY {columns[0]}", _filter_params(filters)
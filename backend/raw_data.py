@@ -0,0 +1,152 @@
+import base64
+import csv
+import io
+import json
+
+# --- POPULATOR 원본 데이터 조회 설정 ---
+RAW_DATA_COLUMNS = ('ROW_ID', 'ID', 'NAME', 'CODE', 'DATA', 'DT_ID', 'DT_DATA', 'CREATE_DATE')
+RAW_DATA_DEFAULT_COLUMNS = ('ROW_ID', 'ID', 'NAME', 'CODE', 'DATA', 'DT_ID', 'DT_DATA')
+RAW_DATA_FILTER_COLUMNS = ('ID', 'NAME', 'CODE', 'DT_ID')
+RAW_DATA_FORMATS = ('json', 'ndjson', 'csv')
+RAW_DATA_DEFAULT_LIMIT = 100
+RAW_DATA_MAX_LIMIT = 1000
+RAW_DATA_FETCH_SIZE = 500   # 스트리밍 시 한 번에 가져오는 행 수
+
+
+class RawDataQuery:
+    """GET /api/data 요청 인자를 검증하고 키셋 페이지네이션 SQL을 만듭니다.
+
+    정렬은 항상 (sort 컬럼, ROW_ID) 순서이며, 커서는 정렬 컬럼·방향과 직전 페이지 마지막 행의
+    두 값을 담은 불투명한 문자열입니다. 다른 정렬로 만든 커서는 거부합니다.
+    잘못된 인자는 ValueError로 알립니다.
+    """
+
+    def __init__(self, args):
+        self.format = args.get('format', 'json')
+        if self.format not in RAW_DATA_FORMATS:
+            raise ValueError(f"'format'은 {', '.join(RAW_DATA_FORMATS)} 중 하나여야 합니다.")
+
+        columns = args.get('columns')
+        self.columns = tuple(c.strip().upper() for c in columns.split(',') if c.strip()) if columns else RAW_DATA_DEFAULT_COLUMNS
+        unknown = [c for c in self.columns if c not in RAW_DATA_COLUMNS]
+        if unknown or not self.columns:
+            raise ValueError(f"알 수 없는 컬럼입니다: {', '.join(unknown)} (가능한 값: {', '.join(RAW_DATA_COLUMNS)})")
+
+        self.sort = args.get('sort', 'ROW_ID').upper()
+        if self.sort not in RAW_DATA_COLUMNS:
+            raise ValueError(f"'sort'는 {', '.join(RAW_DATA_COLUMNS)} 중 하나여야 합니다.")
+        self.descending = args.get('order', 'asc').lower() == 'desc'
+
+        default_limit = RAW_DATA_DEFAULT_LIMIT if self.format == 'json' else None
+        limit = args.get('limit', default_limit)
+        try:
+            self.limit = int(limit) if limit is not None else None
+        except (TypeError, ValueError):
+            raise ValueError("'limit'은 정수여야 합니다.") from None
+        if self.limit is not None and not 0 < self.limit <= (RAW_DATA_MAX_LIMIT if self.format == 'json' else float('inf')):
+            raise ValueError(f"'limit'은 1~{RAW_DATA_MAX_LIMIT} 사이여야 합니다.")
+
+        self.filters = {column: args[column] for column in RAW_DATA_FILTER_COLUMNS if column in args}
+        self.dt_from = args.get('dt_from')
+        self.dt_to = args.get('dt_to')
+        self.cursor = None
+        if args.get('cursor'):
+            sort, descending, value, row_id = decode_cursor(args['cursor'])
+            if (sort, descending) != (self.sort, self.descending):
+                raise ValueError("'cursor'가 만들어진 정렬(sort/order)과 현재 요청의 정렬이 다릅니다.")
+            self.cursor = value, row_id
+
+    def _keyset_clause(self):
+        """커서 이후의 행만 남기는 조건. NULL 정렬값(ASC에서는 맨 앞, DESC에서는 맨 뒤)도 처리합니다."""
+        value, row_id = self.cursor
+        if self.sort == 'ROW_ID':
+            return ("ROW_ID < ?" if self.descending else "ROW_ID > ?"), [row_id]
+        col = self.sort
+        if self.descending:
+            if value is None:
+                return f"({col} IS NULL AND ROW_ID < ?)", [row_id]
+            return f"({col} < ? OR ({col} = ? AND ROW_ID < ?) OR {col} IS NULL)", [value, value, row_id]
+        if value is None:
+            return f"(({col} IS NULL AND ROW_ID > ?) OR {col} IS NOT NULL)", [row_id]
+        return f"({col} > ? OR ({col} = ? AND ROW_ID > ?))", [value, value, row_id]
+
+    def to_sql(self, extra_row=False):
+        """(sql, params)를 반환합니다. extra_row=True면 다음 페이지 존재 여부 확인용으로 1행 더 가져옵니다."""
+        # 커서 계산을 위해 정렬 컬럼과 ROW_ID는 항상 함께 조회합니다.
+        select = list(dict.fromkeys(self.columns + (self.sort, 'ROW_ID')))
+        where, params = [], []
+        for column, value in self.filters.items():
+            where.append(f"{column} = ?")
+            params.append(value)
+        if self.dt_from:
+            where.append("DT_ID >= ?")
+            params.append(self.dt_from)
+        if self.dt_to:
+            where.append("DT_ID <= ?")
+            params.append(self.dt_to)
+        if self.cursor is not None:
+            clause, clause_params = self._keyset_clause()
+            where.append(clause)
+            params.extend(clause_params)
+
+        direction = "DESC" if self.descending else "ASC"
+        sql = f"SELECT {', '.join(select)} FROM POPULATOR"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if self.sort == 'ROW_ID':
+            sql += f" ORDER BY ROW_ID {direction}"
+        else:
+            sql += f" ORDER BY {self.sort} {direction}, ROW_ID {direction}"
+        if self.limit is not None:
+            sql += " LIMIT ?"
+            params.append(self.limit + 1 if extra_row else self.limit)
+        return sql, params
+
+    def project(self, row):
+        return {column: row[column] for column in self.columns}
+
+    def cursor_for(self, row):
+        return encode_cursor(self.sort, self.descending, row[self.sort], row['ROW_ID'])
+
+
+def encode_cursor(sort, descending, value, row_id):
+    raw = json.dumps([sort, 'desc' if descending else 'asc', value, row_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(token):
+    """(sort, descending, value, row_id)를 반환합니다."""
+    try:
+        sort, order, value, row_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        if order not in ('asc', 'desc'):
+            raise ValueError(order)
+        return sort, order == 'desc', value, int(row_id)
+    except Exception:
+        raise ValueError("'cursor' 값이 올바르지 않습니다.") from None
+
+
+def iter_rows(cursor):
+    """DB 커서에서 RAW_DATA_FETCH_SIZE개씩 가져오며 행을 하나씩 돌려줍니다."""
+    while True:
+        batch = cursor.fetchmany(RAW_DATA_FETCH_SIZE)
+        if not batch:
+            return
+        yield from batch
+
+
+def stream_ndjson(query, cursor):
+    for row in iter_rows(cursor):
+        yield json.dumps(query.project(row), ensure_ascii=False) + "\n"
+
+
+def stream_csv(query, cursor):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(query.columns)
+    for row in iter_rows(cursor):
+        writer.writerow([row[column] for column in query.columns])
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+# --- 차트 결과 캐시 설정 ---
+RESULT_CACHE_MAX_ENTRIES = 1024
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024   # 직렬화된 응답 본문 합계 상한
+
+DATA_VERSION_QUERY = "SELECT VERSION FROM DATA_VERSION WHERE ID = 1"
+
+
+def get_data_version(conn):
+    """POPULATOR가 바뀔 때마다 1씩 증가하는 데이터 버전(DATA_VERSION, migrations.py v5)을 반환합니다."""
+    return conn.execute(DATA_VERSION_QUERY).fetchone()[0]
+
+
+def bump_data_version(conn):
+    """트리거를 거치지 않고 POPULATOR를 바꾼 경우(인덱스를 미룬 대량 적재 등) 직접 버전을 올립니다."""
+    conn.execute("UPDATE DATA_VERSION SET VERSION = VERSION + 1 WHERE ID = 1")
+
+
+def result_cache_key(sql_query, query_params, params, *options):
+    """차트 응답을 결정하는 값들로 캐시 키를 만듭니다.
+
+    SQL에는 x_axis/y_axis/group_by/필터가 이미 들어 있으므로, SQL 밖에서 응답을 바꾸는
+    chart_type, dimension, aggregate와 요청 옵션(max_points, downsample 등)만 더합니다.
+    """
+    canonical = json.dumps(
+        [sql_query, list(query_params), params.get('chart_type'), params.get('dimension'),
+         params.get('aggregate'), list(options)],
+        ensure_ascii=False, separators=(',', ':'),
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def make_etag(data_version, key):
+    return f"{data_version}-{key[:20]}"
+
+
+class ResultCache:
+    """캐시 키 → 직렬화된 차트 응답(JSON 바이트) 프로세스 내 LRU 캐시.
+
+    항목마다 만들 때의 데이터 버전을 함께 저장하고, 조회 시 현재 버전과 다르면 버립니다.
+    따라서 POPULATOR에 쓰기가 일어나면 별도의 무효화 호출 없이 모든 항목이 만료됩니다.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (data_version, body)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def _discard(self, key):
+        """항목을 제거합니다. (lock 보유 상태에서 호출)"""
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def get(self, key, data_version):
+        """현재 데이터 버전으로 만든 응답 본문(bytes)을 반환합니다. 없거나 오래되었으면 None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == data_version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._discard(key)
+                self.stale += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, data_version, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (data_version, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+            }
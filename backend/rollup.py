@@ -0,0 +1,26 @@
+# --- 사전 집계(롤업) 테이블 ---
+# POPULATOR_ROLLUP: (GRAIN, CODE, BUCKET)별 행 수와 DATA의 개수/합계/최솟값/최댓값
+# POPULATOR_NAME_ROLLUP: (CODE, NAME)별 행 수 (파이/도넛 차트의 COUNT(*) GROUP BY NAME)
+# 두 테이블은 마이그레이션 v4의 POPULATOR 트리거가 INSERT/UPDATE/DELETE마다 갱신하며,
+# 차트 쿼리를 롤업으로 바꾸는 일은 query_plan.py가 맡습니다.
+
+# 집계 단위별로 DT_ID에서 잘라 쓰는 앞부분 길이 ('YYYY-MM-DD' / 'YYYY-MM')
+ROLLUP_GRAINS = {'day': 10, 'month': 7}
+ROLLUP_AGGREGATES = ('sum', 'avg', 'max', 'min', 'count')
+ROLLUP_DEFAULT_AGGREGATE = 'sum'
+
+
+def rebuild_rollups(conn):
+    """롤업 테이블을 POPULATOR 전체에서 다시 계산합니다 (마이그레이션, 대량 적재 후 사용)."""
+    conn.execute("DELETE FROM POPULATOR_ROLLUP")
+    conn.execute("DELETE FROM POPULATOR_NAME_ROLLUP")
+    for grain, length in ROLLUP_GRAINS.items():
+        conn.execute(f"""
+        INSERT INTO POPULATOR_ROLLUP (GRAIN, CODE, BUCKET, ROW_COUNT, DATA_COUNT, DATA_SUM, DATA_MIN, DATA_MAX)
+        SELECT ?, CODE, substr(DT_ID, 1, {length}), COUNT(*), COUNT(DATA), TOTAL(DATA), MIN(DATA), MAX(DATA)
+        FROM POPULATOR GROUP BY CODE, substr(DT_ID, 1, {length})
+        """, (grain,))
+    conn.execute("""
+    INSERT INTO POPULATOR_NAME_ROLLUP (CODE, NAME, ROW_COUNT)
+    SELECT CODE, NAME, COUNT(*) FROM POPULATOR GROUP BY CODE, NAME
+    """)
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from metrics import current_endpoint
+from result_cache import get_data_version
+
+# --- 대시보드 미리 계산 설정 ---
+# 저장된 대시보드 위젯 프롬프트의 차트 응답과 분석 보고서를 백그라운드에서 미리 만들어 PRECOMPUTED(migrations.py v7)에 둡니다.
+# 결과마다 계산할 때의 데이터 버전을 함께 저장하므로, 현재 버전과 같으면 최신(fresh)이고 다르면 다음 실행에서 다시 계산합니다.
+PRECOMPUTE_INTERVAL_SECONDS = 300.0
+PRECOMPUTE_LEASE_SECONDS = 600.0        # 한 프로세스만 계산하도록 잡는 임대 시간 (항목마다 연장)
+PRECOMPUTE_LEASE_RETRY_SECONDS = 5.0    # 다른 프로세스가 계산 중일 때 다시 시도하는 간격
+
+PRECOMPUTED_QUERY = ("SELECT KIND, PROMPT, DATA_VERSION, RESULT, ERROR, COMPUTED_AT FROM PRECOMPUTED "
+                     "WHERE PROMPT IN (SELECT INITIAL_PROMPT FROM DASHBOARD_WIDGETS WHERE DASHBOARD_ID = ?)")
+WIDGET_PROMPTS_QUERY = ("SELECT DISTINCT INITIAL_PROMPT FROM DASHBOARD_WIDGETS "
+                        "WHERE INITIAL_PROMPT IS NOT NULL AND INITIAL_PROMPT != '' ORDER BY INITIAL_PROMPT")
+
+logger = logging.getLogger('dashboard.precompute')
+
+
+def precomputed_entries(rows, data_version, now=None):
+    """PRECOMPUTED 행을 {프롬프트: {종류: 항목}}으로 바꿉니다.
+
+    항목의 fresh는 현재 데이터 버전으로 계산했고 마지막 계산이 실패하지 않았는지 여부입니다.
+    마지막 계산이 실패해도 이전에 성공한 결과(result)는 그대로 돌려줍니다.
+    """
+    now = time.time() if now is None else now
+    entries = {}
+    for row in rows:
+        result = row['RESULT']
+        if result is not None and row['KIND'] == 'chart':
+            result = json.loads(result)
+        entries.setdefault(row['PROMPT'], {})[row['KIND']] = {
+            "result": result,
+            "error": row['ERROR'],
+            "computedAt": datetime.fromtimestamp(row['COMPUTED_AT'], timezone.utc).isoformat(timespec='seconds'),
+            "ageSeconds": max(0, int(now - row['COMPUTED_AT'])),
+            "fresh": row['DATA_VERSION'] == data_version and row['ERROR'] is None,
+        }
+    return entries
+
+
+def load_precomputed(conn, dashboard_id):
+    """대시보드 위젯 프롬프트의 미리 계산된 결과를 (현재 데이터 버전, {프롬프트: {종류: 항목}})으로 반환합니다."""
+    data_version = get_data_version(conn)
+    rows = conn.execute(PRECOMPUTED_QUERY, (dashboard_id,)).fetchall()
+    return data_version, precomputed_entries(rows, data_version)
+
+
+class PrecomputeScheduler:
+    """저장된 대시보드 위젯의 차트/분석을 주기적으로(그리고 trigger() 직후) 미리 계산하는 백그라운드 스레드.
+
+    tasks는 종류('chart', 'report') → 프롬프트를 받아 저장할 문자열을 반환하는 함수이며, 적힌 순서대로
+    모든 프롬프트에 대해 실행합니다. 결과가 없거나, 데이터 버전이 바뀌었거나, 마지막 계산이 실패한 항목만
+    다시 계산하므로 데이터가 그대로면 실행 비용은 조회 몇 번뿐입니다.
+    여러 프로세스(serve.py 워커)가 각자 스케줄러를 띄워도 PRECOMPUTE_LEASE 임대를 가진 하나만 계산합니다.
+    """
+
+    def __init__(self, pool, tasks, interval=PRECOMPUTE_INTERVAL_SECONDS, lease_seconds=PRECOMPUTE_LEASE_SECONDS):
+        self.pool = pool  # db.ConnectionPool
+        self.tasks = tasks
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}-{id(self):x}"
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._lock = threading.Lock()
+        self.running = False
+        self.runs = 0
+        self.computed = 0
+        self.errors = 0
+        self.last_run_at = None
+        self.last_run_seconds = None
+
+    def start(self):
+        """백그라운드 스레드를 시작합니다. 시작하자마자 한 번 확인합니다."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='precompute', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def trigger(self):
+        """다음 주기를 기다리지 않고 곧바로 다시 확인하게 합니다. (데이터 적재, 레이아웃 저장 후 호출)"""
+        self._wake.set()
+
+    def _loop(self):
+        current_endpoint.set('precompute')  # 단계별 지표의 endpoint 레이블
+        timeout = 0.0
+        while True:
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stopped:
+                return
+            try:
+                ran = self.refresh() is not None
+            except Exception:
+                logger.exception("미리 계산 실행 실패")
+                ran = True
+            timeout = self.interval if ran else PRECOMPUTE_LEASE_RETRY_SECONDS
+
+    def _acquire_lease(self):
+        """임대를 얻거나 연장합니다. 다른 프로세스가 유효한 임대를 가지고 있으면 False."""
+        now = time.time()
+        with self.pool.connection() as conn:
+            acquired = conn.execute(
+                "UPDATE PRECOMPUTE_LEASE SET OWNER = ?, EXPIRES_AT = ? WHERE ID = 1 AND (OWNER = ? OR EXPIRES_AT < ?)",
+                (self.owner, now + self.lease_seconds, self.owner, now),
+            ).rowcount == 1
+            conn.commit()
+        return acquired
+
+    def _release_lease(self):
+        with self.pool.connection() as conn:
+            conn.execute("UPDATE PRECOMPUTE_LEASE SET OWNER = NULL, EXPIRES_AT = 0 WHERE ID = 1 AND OWNER = ?",
+                         (self.owner,))
+            conn.commit()
+
+    def refresh(self):
+        """모든 위젯 프롬프트를 확인해 필요한 항목을 다시 계산합니다.
+
+        다른 프로세스가 계산 중이면(임대를 얻지 못하면) None을, 아니면 이번 실행의 통계를 반환합니다.
+        """
+        if not self._acquire_lease():
+            return None
+        started = time.perf_counter()
+        computed = errors = 0
+        with self._lock:
+            self.running = True
+        try:
+            with self.pool.connection() as conn:
+                prompts = [row[0] for row in conn.execute(WIDGET_PROMPTS_QUERY)]
+                stored = {(row['KIND'], row['PROMPT']): (row['DATA_VERSION'], row['ERROR'])
+                          for row in conn.execute("SELECT KIND, PROMPT, DATA_VERSION, ERROR FROM PRECOMPUTED")}
+                data_version = get_data_version(conn)
+                # 더 이상 어느 위젯에도 없는 프롬프트의 결과는 지웁니다.
+                conn.execute("DELETE FROM PRECOMPUTED WHERE PROMPT NOT IN (SELECT INITIAL_PROMPT FROM DASHBOARD_WIDGETS "
+                             "WHERE INITIAL_PROMPT IS NOT NULL)")
+                conn.commit()
+
+            for kind, task in self.tasks.items():  # 화면에 먼저 필요한 차트를 모두 만든 뒤 보고서
+                for prompt in prompts:
+                    if stored.get((kind, prompt)) == (data_version, None) or self._stopped:
+                        continue
+                    if not self._acquire_lease():
+                        logger.warning("미리 계산 임대를 잃어 이번 실행을 중단합니다.")
+                        return {"computed": computed, "errors": errors}
+                    if self._compute(kind, prompt, task):
+                        computed += 1
+                    else:
+                        errors += 1
+        finally:
+            self._release_lease()
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.running = False
+                self.runs += 1
+                self.computed += computed
+                self.errors += errors
+                self.last_run_at = time.time()
+                self.last_run_seconds = elapsed
+
+        if computed or errors:
+            logger.info("미리 계산 완료: computed=%d errors=%d seconds=%.2f", computed, errors, elapsed)
+        return {"computed": computed, "errors": errors}
+
+    def _compute(self, kind, prompt, task):
+        """한 항목을 계산해 저장합니다. 실패하면 이전 결과는 남기고 ERROR만 기록합니다. 성공 여부를 반환합니다."""
+        # 계산 전에 읽은 버전을 저장하므로, 계산 중에 데이터가 바뀌면 다음 실행에서 다시 계산됩니다.
+        with self.pool.connection() as conn:
+            data_version = get_data_version(conn)
+        started = time.perf_counter()
+        try:
+            result, error = task(prompt), None
+        except Exception as e:
+            logger.warning("미리 계산 실패: kind=%s prompt=%r error=%s", kind, prompt, e)
+            result, error = None, str(e)
+
+        now = time.time()
+        with self.pool.connection() as conn:
+            if error is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO PRECOMPUTED (KIND, PROMPT, DATA_VERSION, RESULT, ERROR, COMPUTED_AT, DURATION) "
+                    "VALUES (?, ?, ?, ?, NULL, ?, ?)",
+                    (kind, prompt, data_version, result, now, time.perf_counter() - started),
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO PRECOMPUTED (KIND, PROMPT, DATA_VERSION, RESULT, ERROR, COMPUTED_AT) "
+                    "VALUES (?, ?, ?, NULL, ?, ?) ON CONFLICT (KIND, PROMPT) DO UPDATE SET ERROR = excluded.ERROR",
+                    (kind, prompt, data_version, error, now),
+                )
+            conn.commit()
+        return error is None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval_seconds": self.interval,
+                "runs": self.runs,
+                "computed": self.computed,
+                "errors": self.errors,
+                "last_run_at": self.last_run_at,
+                "last_run_seconds": round(self.last_run_seconds, 3) if self.last_run_seconds is not None else None,
+            }
@@ -0,0 +1,41 @@
+"""운영 모드 서버: asgi_app을 Hypercorn 다중 워커 프로세스로 실행합니다.
+
+사용법 (backend 디렉터리에서):
+    python serve.py --workers 4 --bind 0.0.0.0:5000
+
+워커 프로세스마다 결과 캐시와 LLM 호출 제한(llm_client.py의 동시성/속도 설정)을 따로 가지므로,
+Gemini 호출 한도는 워커 수만큼 늘어납니다. 개발 중에는 기존처럼 python app.py를 사용합니다.
+"""
+import argparse
+import os
+
+from hypercorn.config import Config
+from hypercorn.run import run
+
+from migrations import migrate_database
+
+SERVE_DEFAULT_BIND = '127.0.0.1:5000'
+SERVE_DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+SERVE_GRACEFUL_TIMEOUT_SECONDS = 30.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bind', default=SERVE_DEFAULT_BIND)
+    parser.add_argument('--workers', type=int, default=SERVE_DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    # 워커들이 동시에 마이그레이션하지 않도록 시작 전에 한 번 적용합니다.
+    migrate_database(os.getenv('DASHBOARD_DB_PATH', 'database.db'))
+
+    config = Config()
+    config.application_path = 'asgi_app:application'
+    config.bind = [args.bind]
+    config.workers = args.workers
+    config.graceful_timeout = SERVE_GRACEFUL_TIMEOUT_SECONDS
+    config.accesslog = '-'
+    return run(config)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+from collections import namedtuple
+
+import numpy as np
+
+from downsample import x_positions
+
+# --- 보고서 데이터 요약 설정 ---
+# 보고서 프롬프트에는 전체 행 대신 통계 요약과, 토큰 예산 안에 들어가는 표본 행만 넣습니다.
+SUMMARY_TOKEN_BUDGET = 2000         # 요약 + 표본 CSV에 쓸 토큰 수 (대략치)
+SUMMARY_BYTES_PER_TOKEN = 4         # UTF-8 바이트 수로 토큰 수를 추정 (한글 한 글자 ≈ 0.75토큰)
+SUMMARY_ANOMALY_THRESHOLD = 3.5     # 로버스트 z 점수(중앙값/MAD 기준) 이상이면 이상치
+SUMMARY_MAX_ANOMALIES = 5
+SUMMARY_TOP_GROUPS = 10             # 범주/그룹별 합계를 몇 개까지 보여줄지
+SUMMARY_FLAT_TREND_RATIO = 0.05     # 추세선 전체 변화량이 평균의 5% 미만이면 '변화 없음'
+SUMMARY_PROBE_ROWS = 200            # 표본 행 수를 정할 때 평균 줄 길이를 재는 행 수
+
+ReportData = namedtuple('ReportData', ['summary', 'sample_csv', 'sample_rows', 'total_rows'])
+
+
+def _numeric(values):
+    """값 목록을 float 배열로 바꿉니다. NULL은 NaN, 숫자가 아닌 값이 있으면 None."""
+    try:
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+
+
+def _value_column(plan, headers):
+    """차트의 수치 열. 파이/도넛 개수 차트는 count_value 열을 씁니다 (app.build_chart_response와 같은 규칙)."""
+    if plan.get('y_axis') in headers:
+        return plan['y_axis']
+    if 'count_value' in headers:
+        return 'count_value'
+    return None
+
+
+def _fmt(value):
+    return f"{value:.6g}"
+
+
+def _series_stats(labels, values, ordered):
+    """한 시리즈(라벨, 값)의 평균/최고/최저/추세/이상치 요약 줄과, 표본에 꼭 넣을 위치를 반환합니다."""
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return ["- values: all NULL"], []
+    labels = labels[valid]
+    values = values[valid]
+    positions = np.flatnonzero(valid)
+
+    peak, trough = int(np.argmax(values)), int(np.argmin(values))
+    lines = [
+        f"- points: {len(values)}, total: {_fmt(values.sum())}, mean: {_fmt(values.mean())}, "
+        f"median: {_fmt(np.median(values))}, std: {_fmt(values.std())}",
+        f"- peak: {_fmt(values[peak])} at {labels[peak]}; trough: {_fmt(values[trough])} at {labels[trough]}",
+    ]
+
+    if ordered and len(values) >= 2:
+        x = x_positions(labels.tolist())
+        x = x - x[0]
+        slope, _ = np.polyfit(x, values, 1) if x[-1] > 0 else (0.0, 0.0)
+        change = slope * x[-1]
+        if abs(change) < SUMMARY_FLAT_TREND_RATIO * max(abs(values.mean()), 1e-12):
+            direction = "flat"
+        else:
+            direction = "increasing" if change > 0 else "decreasing"
+        lines.append(f"- trend: {direction} (linear fit slope {_fmt(slope)} per day, "
+                     f"fitted change {_fmt(change)} from {labels[0]} to {labels[-1]}; "
+                     f"first {_fmt(values[0])}, last {_fmt(values[-1])})")
+
+    # 중앙값/MAD 기반 로버스트 z 점수 (MAD가 0이면 표준편차 기준)
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    if mad > 0:
+        scores = 0.6745 * (values - median) / mad
+    elif values.std() > 0:
+        scores = (values - values.mean()) / values.std()
+    else:
+        scores = np.zeros_like(values)
+    anomalies = np.flatnonzero(np.abs(scores) >= SUMMARY_ANOMALY_THRESHOLD)
+    if len(anomalies):
+        top = anomalies[np.argsort(-np.abs(scores[anomalies]))][:SUMMARY_MAX_ANOMALIES]
+        listed = ", ".join(f"{labels[i]}={_fmt(values[i])} (z={scores[i]:.1f})" for i in sorted(top))
+        lines.append(f"- anomalies: {len(anomalies)} points with |robust z| >= {SUMMARY_ANOMALY_THRESHOLD}: {listed}")
+    else:
+        lines.append("- anomalies: none detected")
+
+    keep = [peak, trough] + [int(i) for i in anomalies[:SUMMARY_MAX_ANOMALIES]]
+    return lines, [int(positions[i]) for i in keep]
+
+
+def _group_totals(keys, values, title):
+    """키별 합계를 큰 순서로 요약합니다. (np.unique + bincount로 한 번에 집계)"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    weights = np.nan_to_num(values)
+    totals = np.bincount(inverse, weights=weights)
+    counts = np.bincount(inverse)
+    grand_total = totals.sum()
+    order = np.argsort(-totals)[:SUMMARY_TOP_GROUPS]
+    listed = ", ".join(
+        f"{unique[i]}={_fmt(totals[i])}" + (f" ({totals[i] / grand_total:.1%})" if grand_total else "")
+        + f" mean {_fmt(totals[i] / counts[i])}"
+        for i in order
+    )
+    more = f" (+{len(unique) - len(order)} more)" if len(unique) > len(order) else ""
+    return unique, totals, f"- {title} ({len(unique)}): {listed}{more}"
+
+
+def summarize_rows(rows, plan):
+    """쿼리 결과 행의 통계 요약 문자열과 표본에 꼭 넣을 행 위치를 반환합니다."""
+    headers = list(rows[0].keys())
+    x_axis = plan.get('x_axis')
+    group_by = plan.get('group_by') if plan.get('dimension') == '3D' else None
+    value_column = _value_column(plan, headers)
+    lines = [f"- rows: {len(rows)}, columns: {', '.join(headers)}"]
+
+    values = _numeric([row[value_column] for row in rows]) if value_column else None
+    if values is None or x_axis not in headers:
+        lines.append("- (no numeric value column to summarize)")
+        return "\n".join(lines), []
+
+    labels = np.array([row[x_axis] for row in rows], dtype=object)
+    ordered = x_axis == 'DT_ID'
+    keep = []
+
+    if group_by in headers:
+        # 3D: 그룹별 합계와, 그룹을 합친 x축 시리즈를 요약
+        groups = np.array([row[group_by] for row in rows], dtype=object).astype(str)
+        lines.append(_group_totals(groups, values, f"{group_by} totals")[2])
+        unique, totals, _ = _group_totals(labels.astype(str), values, x_axis)
+        lines.append(f"- combined series over {x_axis} (sum of all {group_by}):")
+        series_lines, _ = _series_stats(unique, totals, ordered)
+        lines.extend(series_lines)
+    elif ordered and len(np.unique(labels.astype(str))) < len(labels):
+        # 집계하지 않은 시계열(같은 DT_ID에 여러 행): DT_ID별 합계 시리즈로 요약
+        unique, totals, _ = _group_totals(labels.astype(str), values, x_axis)
+        lines.append(f"- series summed per {x_axis}:")
+        series_lines, _ = _series_stats(unique, totals, ordered)
+        lines.extend(series_lines)
+    else:
+        if ordered:
+            order = np.argsort(labels.astype(str), kind='stable')
+            labels, values = labels[order], values[order]
+        else:
+            order = np.arange(len(rows))
+            lines.append(_group_totals(labels.astype(str), values, f"{x_axis} shares")[2])
+        series_lines, positions = _series_stats(labels, values, ordered)
+        lines.extend(series_lines)
+        keep = [int(order[i]) for i in positions]
+
+    return "\n".join(lines), keep
+
+
+def _csv_line(row):
+    return ",".join(map(str, row))
+
+
+def sample_csv(rows, byte_budget, keep=()):
+    """byte_budget 안에 들어가도록 고르게 뽑은 행(과 keep 위치의 행)을 CSV로 만듭니다. (CSV, 행 수)를 반환합니다.
+
+    전체가 예산 안에 들어가면 모든 행을 원래 순서대로 넣습니다.
+    """
+    header = ",".join(map(str, rows[0].keys()))
+    n = len(rows)
+    probe = np.unique(np.linspace(0, n - 1, min(n, SUMMARY_PROBE_ROWS)).astype(np.int64))
+    average = np.mean([len(_csv_line(rows[i]).encode('utf-8')) + 1 for i in probe])
+    available = byte_budget - len(header.encode('utf-8')) - 1
+
+    count = max(0, min(n, int(available / average)))
+    while True:
+        if count >= n:
+            indices = np.arange(n)
+        else:
+            evenly = np.linspace(0, n - 1, max(count - len(keep), 0)).astype(np.int64)
+            indices = np.unique(np.concatenate([evenly, np.asarray(keep, dtype=np.int64)]))[:max(count, 0)]
+        body = "\n".join(_csv_line(rows[i]) for i in indices)
+        # 줄 길이 추정이 빗나가 예산을 넘으면 비율만큼 줄여 다시 뽑습니다.
+        size = len(body.encode('utf-8'))
+        if size <= available or count == 0:
+            break
+        count = int(count * available / size * 0.95)
+    return header + "\n" + body + ("\n" if body else ""), len(indices) if count else 0
+
+
+def build_report_data(rows, plan, token_budget=SUMMARY_TOKEN_BUDGET):
+    """보고서 프롬프트에 넣을 통계 요약과 토큰 예산에 맞춘 표본 CSV를 만듭니다. rows는 비어 있지 않아야 합니다."""
+    summary, keep = summarize_rows(rows, plan)
+    byte_budget = token_budget * SUMMARY_BYTES_PER_TOKEN - len(summary.encode('utf-8'))
+    csv_text, sampled = sample_csv(rows, byte_budget, keep)
+    return ReportData(summary, csv_text, sampled, len(rows))
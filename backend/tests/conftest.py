@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+# 테스트는 backend 모듈을 `import app`처럼 최상위 이름으로 불러옵니다 (backend 디렉터리에서 실행할 때와 같게).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.py는 불러올 때 DB_PATH에 마이그레이션을 적용하므로, 저장소의 database.db 대신 임시 DB를 쓰게 합니다.
+os.environ['DASHBOARD_DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='dashboard-test-'), 'database.db')
+os.environ['DASHBOARD_PRECOMPUTE_INTERVAL'] = '0'
+os.environ.pop('GOOGLE_API_KEY', None)
+
+import pytest  # noqa: E402
+
+from benchmarks.fake_gemini import FakeGeminiModel  # noqa: E402
+from llm_client import LLMClient  # noqa: E402
+
+TEST_TABLES = ('POPULATOR', 'DASHBOARD_WIDGETS', 'DASHBOARDS', 'PRECOMPUTED', 'PLAN_CACHE')
+
+
+@pytest.fixture
+def dashboard_app():
+    """빈 테이블과 빈 캐시, 가짜 Gemini 모델(app.llm_client.model)을 쓰는 app 모듈."""
+    import app
+
+    with app.db_pool.connection() as conn:
+        for table in TEST_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+    app.plan_cache.clear()
+    app.result_cache.clear()
+    previous_client = app.llm_client
+    app.llm_client = LLMClient(FakeGeminiModel(), rate_per_second=1000, burst=1000)
+    try:
+        yield app
+    finally:
+        app.llm_client.shutdown()
+        app.llm_client = previous_client
+
+
+@pytest.fixture
+def client(dashboard_app):
+    return dashboard_app.app.test_client()
+
+
+@pytest.fixture
+def insert_rows(dashboard_app):
+    """POPULATOR에 (ID, NAME, CODE, DATA, DT_ID, DT_DATA) 행을 넣는 함수."""
+    def insert(rows):
+        with dashboard_app.db_pool.connection() as conn:
+            conn.executemany("INSERT INTO POPULATOR (ID, NAME, CODE, DATA, DT_ID, DT_DATA) VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+    return insert
+
+
+@pytest.fixture
+def create_dashboard(dashboard_app):
+    """ID가 1인 대시보드를 만들고 위젯 목록을 저장하는 함수."""
+    from dashboards import replace_layout
+
+    def create(layout, dashboard_id=1):
+        with dashboard_app.db_pool.connection() as conn:
+            conn.execute("INSERT INTO DASHBOARDS (ID, NAME) VALUES (?, ?)", (dashboard_id, f"대시보드 {dashboard_id}"))
+            replace_layout(conn, dashboard_id, layout)
+            conn.commit()
+    return create
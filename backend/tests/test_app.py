@@ -0,0 +1,170 @@
+import json
+
+from benchmarks.fake_gemini import FakeGeminiModel
+from llm_client import LLMClient
+from query_plan import normalize_plan
+
+VALID_PLAN = {"chart_type": "Line", "x_axis": "dt_id", "y_axis": "DATA", "filters": {"CODE": ["B", "A"]}}
+
+
+class FixedPlanModel(FakeGeminiModel):
+    """모든 차트 프롬프트에 같은 플랜을 돌려주는 가짜 모델."""
+
+    def __init__(self, plan):
+        super().__init__()
+        self.plan = plan
+
+    def _respond(self, prompt):
+        return json.dumps(self.plan)
+
+
+def _use_model(dashboard_app, model):
+    dashboard_app.llm_client.shutdown()
+    dashboard_app.llm_client = LLMClient(model, rate_per_second=1000, burst=1000)
+
+
+def test_rejected_plan_is_not_cached(dashboard_app, client):
+    model = FixedPlanModel({"chart_type": "line", "x_axis": "DT_ID; DROP TABLE X", "y_axis": "DATA"})
+    _use_model(dashboard_app, model)
+
+    for _ in range(3):
+        response = client.post('/api/chart', json={"prompt": "잘못된 플랜"})
+        assert response.status_code == 500
+        assert "x_axis" in response.get_json()["error"]
+
+    assert model.calls == 3  # 매번 Gemini에 다시 물음
+    assert dashboard_app.plan_cache.get("잘못된 플랜") is None
+
+
+def test_valid_plan_is_cached_normalized(dashboard_app, client):
+    model = FixedPlanModel(VALID_PLAN)
+    _use_model(dashboard_app, model)
+
+    for _ in range(2):
+        assert client.post('/api/chart', json={"prompt": "유효한 플랜"}).status_code == 200
+
+    assert model.calls == 1
+    cached = dashboard_app.plan_cache.get("유효한 플랜")
+    assert cached == {"chart_type": "line", "dimension": "2D", "x_axis": "DT_ID", "y_axis": "DATA",
+                      "filters": {"CODE": ["A", "B"]}}
+    assert normalize_plan(cached) == normalize_plan(VALID_PLAN)
+
+
+def test_invalid_cached_plan_is_replaced(dashboard_app, client):
+    dashboard_app.plan_cache.put("예전 플랜", {"chart_type": "radar", "x_axis": "DT_ID", "y_axis": "DATA"})
+    model = FixedPlanModel(VALID_PLAN)
+    _use_model(dashboard_app, model)
+
+    assert client.post('/api/chart', json={"prompt": "예전 플랜"}).status_code == 200
+    assert model.calls == 1
+    assert dashboard_app.plan_cache.get("예전 플랜")["chart_type"] == 'line'
+
+
+class PromptPlanModel(FakeGeminiModel):
+    """사용자 요청 문자열 → 플랜 딕셔너리로 응답하는 가짜 모델."""
+
+    def __init__(self, plans):
+        super().__init__()
+        self.plans = plans
+
+    def _respond(self, prompt):
+        user_request = prompt.rsplit('User Request: "', 1)[-1].split('JSON Output:', 1)[0].strip()
+        return json.dumps(self.plans[user_request])
+
+
+RENDER_PLANS = {
+    "라인": {"chart_type": "line", "x_axis": "DT_ID", "y_axis": "DATA", "filters": {"CODE": "A"}},
+    "3D": {"chart_type": "bar", "dimension": "3D", "x_axis": "DT_ID", "y_axis": "DT_DATA", "group_by": "NAME",
+           "filters": {"CODE": "A"}},
+    "파이": {"chart_type": "pie", "x_axis": "NAME", "y_axis": "DT_DATA", "filters": {"CODE": "A"}},
+    "월별": {"chart_type": "line", "x_axis": "DT_ID", "y_axis": "DATA", "time_grain": "month", "filters": {"CODE": "A"}},
+    "다른 필터": {"chart_type": "line", "x_axis": "DT_ID", "y_axis": "DATA", "filters": {"CODE": "B"}},
+}
+
+
+def test_render_merges_widgets_with_the_same_filter(dashboard_app, client, insert_rows, create_dashboard):
+    _use_model(dashboard_app, PromptPlanModel(RENDER_PLANS))
+    insert_rows([
+        ('1', 'x', 'A', 1.0, '2024-01-01', 10.0),
+        ('2', 'y', 'A', 2.0, '2024-01-02', 20.0),
+        ('3', 'z', 'A', 3.0, '2024-02-01', 30.0),
+        ('4', 'x', 'B', 4.0, '2024-02-01', 40.0),
+    ])
+    create_dashboard([{"i": str(number), "x": 0, "y": number, "w": 6, "h": 8, "initialPrompt": prompt}
+                      for number, prompt in enumerate(RENDER_PLANS)])
+
+    response = client.post('/api/dashboards/1/render', json={})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    # CODE = 'A'를 DT_ID 순으로 읽는 라인/3D는 스캔 하나, 파이(NAME 순)와 롤업(월별), CODE = 'B'는 각자 하나
+    assert body["queryCount"] == 4
+    for widget, prompt in zip(body["widgets"], RENDER_PLANS):
+        chart = client.post('/api/chart', json={"prompt": prompt}).get_json()
+        assert "error" not in widget
+        assert widget["chartOptions"] == chart["chartOptions"]
+        assert widget["series"] == chart["series"]
+        assert widget["tableData"] == chart["tableData"]
+
+
+def test_data_cursor_pages_through_sorted_rows(client, insert_rows):
+    # 같은 DATA 값(동점)과 NULL 정렬값이 섞여 있어도 빠짐없이, 중복 없이 페이지가 이어져야 함
+    insert_rows([(f"id{i}", "n", "A", [5, 1, None, 5, 3, 1, None][i], "2023-01-01", "2023-01-01") for i in range(7)])
+
+    for order in ('asc', 'desc'):
+        seen, cursor = [], None
+        while True:
+            query = f"/api/data?sort=DATA&order={order}&limit=2" + (f"&cursor={cursor}" if cursor else "")
+            body = client.get(query).get_json()
+            seen.extend((row["DATA"], row["ROW_ID"]) for row in body["items"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+        expected = sorted(seen, key=lambda r: (r[0] is not None, r[0] or 0, r[1]), reverse=order == 'desc')
+        assert seen == expected
+        assert len({row_id for _, row_id in seen}) == 7
+
+
+def test_data_cursor_rejects_a_different_sort(client, insert_rows):
+    insert_rows([(f"id{i}", "n", "A", i, "2023-01-01", "2023-01-01") for i in range(3)])
+    cursor = client.get("/api/data?sort=DATA&limit=1").get_json()["next_cursor"]
+
+    assert client.get(f"/api/data?sort=DATA&limit=1&cursor={cursor}").status_code == 200
+    for query in ("sort=DT_ID", "sort=DATA&order=desc", ""):
+        response = client.get(f"/api/data?{query}&limit=1&cursor={cursor}")
+        assert response.status_code == 400
+        assert "cursor" in response.get_json()["error"]
+
+
+def test_missing_api_key_is_logged_without_traceback(dashboard_app, client, monkeypatch, caplog):
+    monkeypatch.setattr(dashboard_app, 'llm_client', None)
+
+    response = client.post('/api/chart', json={"prompt": "키 없음"})
+
+    assert response.status_code == 500
+    assert "GOOGLE_API_KEY" in response.get_json()["error"]
+    records = [record for record in caplog.records if record.name == 'dashboard']
+    assert [record.levelname for record in records] == ['ERROR']
+    assert records[0].exc_info is None
+
+
+def test_chart_etag_revalidates_and_data_changes_invalidate(dashboard_app, client, insert_rows):
+    insert_rows([("1", "x", "A", 1, "2023-01-01", "2023-01-01")])
+    _use_model(dashboard_app, FixedPlanModel(VALID_PLAN))
+    before = dashboard_app.result_cache.stats()  # 카운터는 clear()로 초기화되지 않음
+
+    first = client.post('/api/chart', json={"prompt": "캐시"})
+    etag = first.headers['ETag']
+    not_modified = client.post('/api/chart', json={"prompt": "캐시"}, headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+    assert client.post('/api/chart', json={"prompt": "캐시"}).data == first.data
+    assert dashboard_app.result_cache.stats()["hits"] == before["hits"] + 1
+
+    insert_rows([("2", "x", "A", 2, "2023-01-02", "2023-01-02")])  # 트리거가 DATA_VERSION을 올림
+
+    changed = client.post('/api/chart', json={"prompt": "캐시"}, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()["series"] != first.get_json()["series"]
+    assert dashboard_app.result_cache.stats()["stale"] == before["stale"] + 1
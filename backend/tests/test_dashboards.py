@@ -0,0 +1,86 @@
+import json
+import sqlite3
+
+from migrations import migrate
+
+LAYOUT = [
+    {"i": "a", "x": 0, "y": 0, "w": 6, "h": 4, "chartId": "c1", "initialPrompt": "월별 라인"},
+    {"i": "b", "x": 6, "y": 0, "w": 6, "h": 4, "chartId": "c2", "initialPrompt": "일별 막대", "color": "red"},
+]
+
+
+def _versions(client):
+    return {widget["i"]: widget["version"] for widget in client.get('/api/dashboards/1').get_json()["layout"]}
+
+
+def _stored_rows(dashboard_app):
+    with dashboard_app.db_pool.connection() as conn:
+        return [tuple(row) for row in conn.execute("SELECT * FROM DASHBOARD_WIDGETS ORDER BY WIDGET_ID")]
+
+
+def test_stale_version_rejects_the_whole_batch(dashboard_app, client, create_dashboard):
+    create_dashboard(LAYOUT)
+    response = client.patch('/api/dashboards/1/widgets', json={"operations": [
+        {"op": "update", "i": "a", "version": 1, "changes": {"x": 2}},
+    ]})
+    assert response.get_json()["widgets"] == [{"i": "a", "version": 2}]
+    before = _stored_rows(dashboard_app)
+
+    # 앞의 두 변경은 유효하지만, 오래된 버전(1)으로 보낸 'a' 수정 때문에 모두 적용되지 않아야 함
+    response = client.patch('/api/dashboards/1/widgets', json={"operations": [
+        {"op": "update", "i": "b", "version": 1, "changes": {"h": 8}},
+        {"op": "add", "widget": {"i": "c", "x": 0, "y": 4, "w": 4, "h": 4}},
+        {"op": "update", "i": "a", "version": 1, "changes": {"x": 4}},
+    ]})
+
+    assert response.status_code == 409
+    conflicts = response.get_json()["conflicts"]
+    assert [(conflict["i"], conflict["version"], conflict["widget"]["x"]) for conflict in conflicts] == [("a", 2, 2)]
+    assert _stored_rows(dashboard_app) == before
+
+
+def test_removed_widget_conflicts_with_null_state(client, create_dashboard):
+    create_dashboard(LAYOUT)
+    assert client.patch('/api/dashboards/1/widgets', json={"operations": [
+        {"op": "remove", "i": "b", "version": 1}]}).status_code == 200
+
+    response = client.patch('/api/dashboards/1/widgets', json={"operations": [
+        {"op": "update", "i": "b", "version": 1, "changes": {"x": 0}}]})
+
+    assert response.status_code == 409
+    assert response.get_json()["conflicts"] == [{"i": "b", "version": None, "widget": None}]
+
+
+def test_reordering_or_resaving_keeps_versions(client, create_dashboard):
+    create_dashboard(LAYOUT)
+
+    client.post('/api/dashboards/1', json={"layout": LAYOUT[::-1]})
+    assert [widget["i"] for widget in client.get('/api/dashboards/1').get_json()["layout"]] == ["b", "a"]
+    assert _versions(client) == {"a": 1, "b": 1}
+
+    # GET이 돌려준 version이 들어 있는 레이아웃을 그대로 다시 저장해도 바뀐 것이 없음
+    client.post('/api/dashboards/1', json={"layout": client.get('/api/dashboards/1').get_json()["layout"]})
+    assert _versions(client) == {"a": 1, "b": 1}
+
+    moved = [dict(LAYOUT[0], x=3), LAYOUT[1]]
+    client.post('/api/dashboards/1', json={"layout": moved})
+    assert _versions(client) == {"a": 2, "b": 1}
+
+
+def test_v6_moves_layout_json_into_widget_rows(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'database.db'))
+    migrate(conn, target_version=5)
+    layout = LAYOUT + [{"i": "a", "x": 9}, {"x": 1}, "not a widget"]  # 중복 'i', 'i' 없음, 객체 아님은 버림
+    conn.executemany("INSERT INTO DASHBOARDS (ID, NAME, LAYOUT) VALUES (?, ?, ?)",
+                     [(1, "정상", json.dumps(layout)), (2, "깨짐", "{not json"), (3, "빈", None)])
+    conn.commit()
+
+    assert migrate(conn)[0] == 6
+
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM DASHBOARD_WIDGETS ORDER BY DASHBOARD_ID, POSITION").fetchall()
+    assert [(row["DASHBOARD_ID"], row["WIDGET_ID"], row["POSITION"], row["X"], row["VERSION"]) for row in rows] == [
+        (1, "a", 0, 0, 1), (1, "b", 1, 6, 1)]
+    assert json.loads(rows[1]["EXTRA"]) == {"color": "red"}
+    assert rows[0]["INITIAL_PROMPT"] == "월별 라인"
+    assert conn.execute("SELECT COUNT(*) FROM DASHBOARDS WHERE LAYOUT IS NOT NULL").fetchone()[0] == 0
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from downsample import downsample_indices, lttb_indices, minmax_indices
+
+
+def _signal(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=np.float64), rng.normal(size=n).cumsum()
+
+
+@pytest.mark.parametrize('threshold', [3, 4, 5, 10, 99])
+def test_lttb_keeps_endpoints_within_max_points(threshold):
+    x, y = _signal(100)
+    picked = lttb_indices(x, y, threshold)
+
+    assert len(picked) == threshold
+    assert picked[0] == 0 and picked[-1] == 99
+    assert np.all(np.diff(picked) > 0)
+
+
+@pytest.mark.parametrize('threshold', [3, 4, 5, 10, 99])
+def test_minmax_keeps_endpoints_within_max_points(threshold):
+    _, y = _signal(100)
+    picked = minmax_indices(y, threshold)
+
+    assert len(picked) <= threshold
+    assert picked[0] == 0 and picked[-1] == 99
+    assert np.all(np.diff(picked) > 0)
+
+
+def test_minmax_keeps_each_buckets_extremes():
+    # 가운데 100개 점이 10개씩 10개 구간으로 나뉘도록 (threshold - 2) // 2 = 10
+    _, y = _signal(102, seed=1)
+    y[37] = 50.0    # 스파이크
+    y[81] = -50.0
+    picked = set(minmax_indices(y, 22).tolist())
+
+    for start in range(1, 101, 10):
+        bucket = y[start:start + 10]
+        assert start + int(np.argmin(bucket)) in picked
+        assert start + int(np.argmax(bucket)) in picked
+    assert {37, 81} <= picked
+
+
+def test_short_series_is_returned_unchanged():
+    x, y = _signal(5)
+    assert lttb_indices(x, y, 5).tolist() == [0, 1, 2, 3, 4]
+    assert minmax_indices(y, 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_downsample_indices_sorts_by_date_and_maps_back_to_rows():
+    xs = ["2023-01-03", "2023-01-01", "2023-01-05", "2023-01-02", "2023-01-04"]
+    ys = [3, 1, 5, None, 4]
+
+    picked = downsample_indices(xs, ys, 3, 'minmax')
+
+    assert picked[0] == 1 and picked[-1] == 2   # 가장 이른 날짜와 가장 늦은 날짜의 원래 행
+    assert len(picked) <= 3
+    with pytest.raises(ValueError):
+        downsample_indices(xs, ys, 3, 'average')
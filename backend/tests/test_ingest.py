@@ -0,0 +1,77 @@
+import sqlite3
+
+from ingest import _drop_deferred_objects, ingest_lines
+from migrations import migrate
+
+CSV_LINES = [
+    "ID,NAME,CODE,DATA,DT_ID,DT_DATA\n",
+    "1,A,월별 검출 유형,1,2024-01-03,10\n",
+    "2,B,월별 검출 유형,2,2024-01-20,5\n",
+]
+
+
+def _populator_objects(conn):
+    return sorted(row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE tbl_name = 'POPULATOR' AND type IN ('index', 'trigger')"))
+
+
+def _rollup_rows(conn):
+    return conn.execute("SELECT SUM(ROW_COUNT) FROM POPULATOR_ROLLUP WHERE GRAIN = 'month'").fetchone()[0]
+
+
+def test_deferred_ingest_restores_objects(tmp_path):
+    db_path = str(tmp_path / 'database.db')
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    objects = _populator_objects(conn)
+
+    result = ingest_lines(db_path, CSV_LINES, 'csv', defer_indexes=True)
+
+    assert result["rows"] == 2
+    assert _populator_objects(conn) == objects
+    assert _rollup_rows(conn) == 2
+    assert conn.execute("SELECT COUNT(*) FROM INGEST_DEFERRED").fetchone()[0] == 0
+
+
+def test_migrate_restores_objects_dropped_by_interrupted_ingest(tmp_path):
+    db_path = str(tmp_path / 'database.db')
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    migrate(conn)
+    objects = _populator_objects(conn)
+    version = conn.execute("SELECT VERSION FROM DATA_VERSION").fetchone()[0]
+
+    # 인덱스/트리거를 내리고 적재하던 중 프로세스가 죽은 상태
+    conn.execute("BEGIN IMMEDIATE")
+    _drop_deferred_objects(conn)
+    conn.execute("COMMIT")
+    conn.execute("INSERT INTO POPULATOR (ID, CODE, DATA, DT_ID) VALUES ('1', '월별 검출 유형', 1, '2024-01-03')")
+    assert _populator_objects(conn) == []
+
+    migrate(conn)
+
+    assert _populator_objects(conn) == objects
+    assert _rollup_rows(conn) == 1
+    assert conn.execute("SELECT VERSION FROM DATA_VERSION").fetchone()[0] > version
+    assert conn.execute("SELECT COUNT(*) FROM INGEST_DEFERRED").fetchone()[0] == 0
+
+
+def test_ingest_uses_wal_journal(tmp_path):
+    # 새 DB(기본 rollback 저널)에 적재해도 WAL로 바뀌어 있어야 synchronous=NORMAL이 안전함
+    db_path = str(tmp_path / 'database.db')
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+    conn.close()
+
+    ingest_lines(db_path, CSV_LINES, 'csv')
+
+    assert sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_migrate_logs_instead_of_printing(tmp_path, capsys, caplog):
+    caplog.set_level('INFO', logger='dashboard.migrations')
+
+    migrate(sqlite3.connect(str(tmp_path / 'database.db')))
+
+    assert capsys.readouterr().out == ''
+    assert any("v1" in record.getMessage() for record in caplog.records if record.name == 'dashboard.migrations')
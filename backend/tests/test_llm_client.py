@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from benchmarks.fake_gemini import FakeGeminiModel, FakeResponse
+from llm_client import LLMClient, LLMTimeoutError, TokenBucket
+
+CHART_PROMPT = "User Request: 월별 검출 유형"
+
+
+class FakeServerError(Exception):
+    code = 503
+
+
+class FakeBadRequest(Exception):
+    code = 400
+
+
+class FailingModel(FakeGeminiModel):
+    """처음 failures번의 호출에서 error를 내는 가짜 모델."""
+
+    def __init__(self, error, failures):
+        super().__init__()
+        self.error = error
+        self.failures = failures
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+        if call_number <= self.failures:
+            raise self.error("fake")
+        return FakeResponse("ok")
+
+
+class BrokenStreamModel(FakeGeminiModel):
+    """첫 조각을 보낸 뒤 503 오류로 끊기는 스트리밍 응답."""
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+        def chunks():
+            yield FakeResponse("첫 조각\n")
+            raise FakeServerError("stream broken")
+        return chunks()
+
+
+def _client(model, **kwargs):
+    sleeps = []
+    kwargs.setdefault('rate_per_second', 1000)
+    kwargs.setdefault('burst', 1000)
+    client = LLMClient(model, backoff_base=0.01, backoff_max=0.05, sleep=sleeps.append, **kwargs)
+    return client, sleeps
+
+
+def test_retries_429_with_backoff():
+    model = FakeGeminiModel(fail_first=2)
+    client, sleeps = _client(model)
+
+    response = client.generate(CHART_PROMPT)
+
+    assert '"chart_type"' in response.text
+    assert model.calls == 3
+    assert client.stats()["retries"] == 2
+    assert len(sleeps) == 2
+    assert all(0 <= delay <= 0.05 for delay in sleeps)
+
+
+def test_retries_5xx_up_to_max_retries():
+    model = FailingModel(FakeServerError, failures=10)
+    client, sleeps = _client(model, max_retries=3)
+
+    with pytest.raises(FakeServerError):
+        client.generate(CHART_PROMPT)
+
+    assert model.calls == 4  # 첫 호출 + 재시도 3번
+    assert len(sleeps) == 3
+
+
+def test_does_not_retry_client_errors():
+    model = FailingModel(FakeBadRequest, failures=1)
+    client, sleeps = _client(model)
+
+    with pytest.raises(FakeBadRequest):
+        client.generate(CHART_PROMPT)
+
+    assert model.calls == 1
+    assert sleeps == []
+
+
+def test_missed_deadline_raises_timeout():
+    client = LLMClient(FakeGeminiModel(latency=2.0), rate_per_second=1000, burst=1000)
+
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        client.generate(CHART_PROMPT, timeout=0.1)
+
+    assert time.monotonic() - started < 1.0
+    assert client.stats()["in_flight"] == 0
+
+
+def test_identical_in_flight_prompts_share_one_call():
+    model = FakeGeminiModel(latency=0.2)
+    client = LLMClient(model, rate_per_second=1000, burst=1000)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(client.generate(CHART_PROMPT).text)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model.calls == 1
+    assert len(set(results)) == 1 and len(results) == 5
+    assert client.stats()["deduplicated"] == 4
+
+
+def test_async_identical_prompts_share_one_call():
+    model = FakeGeminiModel(latency=0.1)
+    client = LLMClient(model, rate_per_second=1000, burst=1000)
+
+    async def run():
+        return await asyncio.gather(*(client.agenerate(CHART_PROMPT) for _ in range(3)))
+
+    responses = asyncio.run(run())
+
+    assert model.calls == 1
+    assert len({response.text for response in responses}) == 1
+
+
+def test_token_bucket_throttles_after_burst():
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+
+    for _ in range(4):
+        assert bucket.acquire()
+
+    assert now[0] == pytest.approx(1.0)  # 버스트 2개 뒤에는 초당 2개
+    assert not bucket.acquire(deadline=now[0] + 0.1)
+
+
+def test_client_calls_are_rate_limited():
+    model = FakeGeminiModel()
+    client = LLMClient(model, rate_per_second=20, burst=1)
+
+    started = time.monotonic()
+    for number in range(4):
+        client.generate(f"{CHART_PROMPT} {number}")
+
+    assert time.monotonic() - started >= 0.14  # 버스트 1개 뒤 3번은 0.05초씩 기다림
+    assert model.calls == 4
+
+
+def test_stream_retries_before_first_chunk():
+    model = FakeGeminiModel(fail_first=1)
+    client, sleeps = _client(model)
+
+    text = "".join(client.stream("Analysis Report:"))
+
+    assert "분석 요약" in text
+    assert model.calls == 2
+    assert len(sleeps) == 1
+
+
+def test_stream_does_not_retry_after_first_chunk():
+    model = BrokenStreamModel()
+    client, sleeps = _client(model)
+    received = []
+
+    with pytest.raises(FakeServerError):
+        for chunk in client.stream("Analysis Report:"):
+            received.append(chunk)
+
+    assert received == ["첫 조각\n"]
+    assert model.calls == 1
+    assert sleeps == []
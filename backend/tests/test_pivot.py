@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from pivot import PIVOT_AGGREGATES, pivot_series
+
+
+def _rows(seed=0, n=200):
+    rng = random.Random(seed)
+    return [{"DT_ID": f"2023-01-{rng.randint(1, 9):02d}", "CODE": rng.choice("ABC"),
+             "DATA": None if rng.random() < 0.1 else rng.randint(-20, 20)} for _ in range(n)]
+
+
+def _expected(rows, aggregate):
+    """pivot_series와 같은 결과를 단순한 파이썬 반복문으로 계산합니다."""
+    categories = sorted({row["DT_ID"] for row in rows})
+    groups = sorted({row["CODE"] for row in rows})
+    series = []
+    for group in groups:
+        data = []
+        for category in categories:
+            cell = [row["DATA"] for row in rows if row["CODE"] == group and row["DT_ID"] == category]
+            values = [value for value in cell if value is not None]
+            if aggregate == 'count':
+                data.append(len(cell))
+            elif not values:
+                data.append(0)
+            elif aggregate == 'sum':
+                data.append(sum(values))
+            elif aggregate == 'avg':
+                data.append(sum(values) / len(values))
+            else:
+                data.append(max(values) if aggregate == 'max' else min(values))
+        series.append({"name": group, "data": data})
+    return categories, series
+
+
+@pytest.mark.parametrize('aggregate', PIVOT_AGGREGATES)
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_pivot_matches_a_python_loop(aggregate, seed):
+    rows = _rows(seed)
+    categories, series = pivot_series(rows, "DT_ID", "DATA", "CODE", aggregate)
+
+    expected_categories, expected_series = _expected(rows, aggregate)
+    assert categories == expected_categories
+    assert [s["name"] for s in series] == [s["name"] for s in expected_series]
+    for actual, expected in zip(series, expected_series):
+        assert actual["data"] == pytest.approx(expected["data"])
+        if aggregate != 'avg':
+            assert all(isinstance(value, int) for value in actual["data"])
+
+
+def test_empty_cells_and_float_data():
+    rows = [{"x": "a", "g": "G1", "y": 1.5}, {"x": "b", "g": "G2", "y": 2.5}, {"x": "b", "g": "G2", "y": None}]
+
+    categories, series = pivot_series(rows, "x", "y", "g", 'max')
+
+    assert categories == ["a", "b"]
+    assert series == [{"name": "G1", "data": [1.5, 0]}, {"name": "G2", "data": [0, 2.5]}]
+    assert pivot_series(rows, "x", "y", "g", 'count')[1][1]["data"] == [0, 2]
+    assert pivot_series([], "x", "y", "g") == ([], [])
+    with pytest.raises(ValueError):
+        pivot_series(rows, "x", "y", "g", 'median')
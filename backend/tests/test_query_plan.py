@@ -0,0 +1,64 @@
+import sqlite3
+
+from migrations import migrate
+from query_plan import compile_plan, normalize_plan, plan_params
+
+MONTHLY_DT_DATA_PLAN = {
+    "chart_type": "line",
+    "x_axis": "DT_ID",
+    "y_axis": "DT_DATA",
+    "time_grain": "month",
+    "aggregate": "sum",
+    "filters": {"CODE": "월별 검출 유형"},
+}
+
+
+def _populated_db():
+    conn = sqlite3.connect(':memory:')
+    migrate(conn)  # 빈 DB에 최신 스키마를 만든 뒤 적재하면 트리거가 롤업을 채웁니다.
+    conn.executemany(
+        "INSERT INTO POPULATOR (ID, NAME, CODE, DATA, DT_ID, DT_DATA) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ('1', 'A', '월별 검출 유형', 1.0, '2024-01-03', 10.0),
+            ('2', 'B', '월별 검출 유형', 2.0, '2024-01-20', 5.0),
+            ('3', 'A', '월별 검출 유형', 3.0, '2024-02-01', 7.0),
+            ('4', 'A', '일별 검출 유형', 4.0, '2024-02-01', 100.0),
+        ],
+    )
+    conn.commit()
+    return conn
+
+
+def test_time_grain_with_non_data_y_axis_reads_populator():
+    query = compile_plan(MONTHLY_DT_DATA_PLAN)
+
+    assert query.plan["y_axis"] == 'DT_DATA'
+    assert "FROM POPULATOR " in query.sql
+    assert "SUM(DT_DATA)" in query.sql
+    assert "substr(DT_ID, 1, 7)" in query.sql
+    assert query.params == ('월별 검출 유형',)  # 롤업의 GRAIN 바인딩 없음
+
+    conn = _populated_db()
+    rows = conn.execute(query.sql, query.params).fetchall()
+    assert rows == [('2024-01', 15.0), ('2024-02', 7.0)]
+
+
+def test_time_grain_with_data_y_axis_uses_rollup():
+    plan = dict(MONTHLY_DT_DATA_PLAN, y_axis='DATA')
+    query = compile_plan(plan)
+
+    assert "FROM POPULATOR_ROLLUP" in query.sql
+    assert query.params == ('month', '월별 검출 유형')
+
+    conn = _populated_db()
+    rows = conn.execute(query.sql, query.params).fetchall()
+    assert rows == [('2024-01', 3.0), ('2024-02', 3.0)]
+
+
+def test_plan_params_round_trips_normalized_plan():
+    plan = normalize_plan({"chart_type": "bar", "dimension": "3d", "x_axis": "dt_id", "y_axis": "data",
+                           "group_by": "name", "aggregate": "avg",
+                           "filters": {"CODE": ["B", "A"], "DT_ID": {"from": "2024-01-01", "lt": "2024-02-01"},
+                                       "NAME": None}})
+
+    assert normalize_plan(plan_params(plan)) == plan
@@ -0,0 +1,42 @@
+from result_cache import ResultCache, make_etag, result_cache_key
+
+
+def test_entry_from_an_older_data_version_is_dropped():
+    cache = ResultCache()
+    cache.put('k', 1, b'body')
+
+    assert cache.get('k', 1) == b'body'
+    assert cache.get('k', 2) is None
+    assert cache.get('k', 1) is None  # 오래된 항목은 조회 시 지워짐
+    assert cache.stats()["stale"] == 1
+    assert cache.stats()["bytes"] == 0
+
+
+def test_byte_limit_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=10)
+    cache.put('a', 1, b'aaaa')
+    cache.put('b', 1, b'bbbb')
+    cache.get('a', 1)            # b가 가장 오래 쓰이지 않은 항목이 됨
+    cache.put('c', 1, b'cccc')
+
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == b'aaaa'
+    assert cache.get('c', 1) == b'cccc'
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 8
+
+
+def test_body_larger_than_the_limit_is_not_cached():
+    cache = ResultCache(max_bytes=10)
+    cache.put('a', 1, b'aaaa')
+    cache.put('big', 1, b'x' * 11)
+
+    assert cache.get('big', 1) is None
+    assert cache.get('a', 1) == b'aaaa'
+
+
+def test_etag_changes_with_data_version():
+    key = result_cache_key("SELECT 1", (), {"chart_type": "line"}, 100)
+
+    assert make_etag(1, key) != make_etag(2, key)
+    assert result_cache_key("SELECT 1", (), {"chart_type": "bar"}, 100) != key
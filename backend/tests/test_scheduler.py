@@ -0,0 +1,141 @@
+import time
+
+import pytest
+
+from scheduler import PrecomputeScheduler
+
+PROMPTS = ("월별 검출 유형 라인", "일별 검출 유형 막대")
+ROWS = [("1", "x", "월별 검출 유형", 1, "2023-01-01", "2023-01-01"),
+        ("2", "y", "일별 검출 유형", 2, "2023-01-02", "2023-01-02")]
+
+
+@pytest.fixture(autouse=True)
+def free_lease(dashboard_app):
+    with dashboard_app.db_pool.connection() as conn:
+        conn.execute("UPDATE PRECOMPUTE_LEASE SET OWNER = NULL, EXPIRES_AT = 0")
+        conn.commit()
+
+
+class RecordingTasks:
+    """app의 미리 계산 함수(가짜 Gemini 모델 사용)를 감싸 호출을 기록하고, 지정한 항목을 한 번 실패시킵니다."""
+
+    def __init__(self, app):
+        self.app = app
+        self.calls = []
+        self.fail_once = set()
+
+    def _run(self, kind, task, prompt):
+        self.calls.append((kind, prompt))
+        if (kind, prompt) in self.fail_once:
+            self.fail_once.discard((kind, prompt))
+            raise RuntimeError("일시적 오류")
+        return task(prompt)
+
+    def tasks(self):
+        return {'chart': lambda prompt: self._run('chart', self.app.precompute_chart, prompt),
+                'report': lambda prompt: self._run('report', self.app.precompute_report, prompt)}
+
+
+def _layout(*prompts):
+    return [{"i": str(index), "x": 0, "y": index, "w": 6, "h": 4, "initialPrompt": prompt}
+            for index, prompt in enumerate(prompts)]
+
+
+def _expire_lease(app):
+    with app.db_pool.connection() as conn:
+        conn.execute("UPDATE PRECOMPUTE_LEASE SET EXPIRES_AT = ?", (time.time() - 1,))
+        conn.commit()
+
+
+def test_lease_is_held_by_one_scheduler_until_it_expires(dashboard_app, create_dashboard):
+    create_dashboard(_layout(PROMPTS[0]))
+    first, second = RecordingTasks(dashboard_app), RecordingTasks(dashboard_app)
+    scheduler_a = PrecomputeScheduler(dashboard_app.db_pool, first.tasks(), interval=0)
+    scheduler_b = PrecomputeScheduler(dashboard_app.db_pool, second.tasks(), interval=0)
+
+    assert scheduler_a._acquire_lease()       # A가 계산 중인 상태
+    assert scheduler_b.refresh() is None      # B는 기다림
+    assert second.calls == []
+
+    _expire_lease(dashboard_app)              # A가 연장하지 못하고 멈춘 경우
+    assert scheduler_b.refresh() == {"computed": 2, "errors": 0}
+
+    # refresh가 끝나면 임대를 놓으므로 A가 바로 다시 얻을 수 있음
+    assert scheduler_a.refresh() == {"computed": 0, "errors": 0}
+
+
+def test_scheduler_stops_when_another_takes_the_lease(dashboard_app, create_dashboard):
+    create_dashboard(_layout(*PROMPTS))
+    scheduler_b = PrecomputeScheduler(dashboard_app.db_pool, {}, interval=0)
+    calls = []
+
+    def chart(prompt):
+        calls.append(prompt)
+        _expire_lease(dashboard_app)
+        assert scheduler_b._acquire_lease()   # 첫 항목을 계산하는 동안 B가 만료된 임대를 가져감
+        return dashboard_app.precompute_chart(prompt)
+
+    scheduler_a = PrecomputeScheduler(dashboard_app.db_pool, {'chart': chart}, interval=0)
+
+    assert scheduler_a.refresh() == {"computed": 1, "errors": 0}
+    assert len(calls) == 1
+    assert not scheduler_a._acquire_lease()   # B의 임대는 A가 끝날 때 풀리지 않음
+
+
+def test_only_missing_stale_or_failed_entries_are_recomputed(dashboard_app, create_dashboard, insert_rows):
+    insert_rows(ROWS)
+    create_dashboard(_layout(*PROMPTS))
+    recorder = RecordingTasks(dashboard_app)
+    scheduler = PrecomputeScheduler(dashboard_app.db_pool, recorder.tasks(), interval=0)
+    recorder.fail_once.add(('report', PROMPTS[1]))
+
+    assert scheduler.refresh() == {"computed": 3, "errors": 1}
+    recorder.calls.clear()
+
+    # 실패한 항목만 다시 계산
+    assert scheduler.refresh() == {"computed": 1, "errors": 0}
+    assert recorder.calls == [('report', PROMPTS[1])]
+    recorder.calls.clear()
+
+    assert scheduler.refresh() == {"computed": 0, "errors": 0}
+    assert recorder.calls == []
+
+    # 새 위젯 프롬프트(결과 없음)만 계산
+    create_dashboard(_layout(*PROMPTS, "개인정보 접근 사용자 유형 파이"), dashboard_id=2)
+    scheduler.refresh()
+    assert sorted(recorder.calls) == [('chart', "개인정보 접근 사용자 유형 파이"),
+                                      ('report', "개인정보 접근 사용자 유형 파이")]
+    recorder.calls.clear()
+
+    # 데이터가 바뀌면 모두 다시 계산
+    insert_rows([("3", "x", "월별 검출 유형", 5, "2023-02-01", "2023-02-01")])
+    assert scheduler.refresh() == {"computed": 6, "errors": 0}
+    assert len(recorder.calls) == 6
+
+
+def test_precomputed_endpoint_reports_freshness(dashboard_app, client, create_dashboard, insert_rows):
+    insert_rows(ROWS)
+    create_dashboard(_layout(*PROMPTS))
+    recorder = RecordingTasks(dashboard_app)
+    scheduler = PrecomputeScheduler(dashboard_app.db_pool, recorder.tasks(), interval=0)
+
+    widgets = client.get('/api/dashboards/1/precomputed').get_json()["widgets"]
+    assert [widget["chart"] for widget in widgets] == [None, None]
+
+    scheduler.refresh()
+    widgets = client.get('/api/dashboards/1/precomputed').get_json()["widgets"]
+    assert all(widget["chart"]["fresh"] and widget["report"]["fresh"] for widget in widgets)
+    chart = widgets[0]["chart"]["result"]
+
+    insert_rows([("3", "x", "월별 검출 유형", 5, "2023-02-01", "2023-02-01")])
+    widgets = client.get('/api/dashboards/1/precomputed').get_json()["widgets"]
+    assert not any(widget["chart"]["fresh"] for widget in widgets)
+    assert widgets[0]["chart"]["result"] == chart  # 오래된 결과도 그대로 돌려줌
+
+    recorder.fail_once.add(('chart', PROMPTS[0]))
+    scheduler.refresh()
+    widgets = client.get('/api/dashboards/1/precomputed').get_json()["widgets"]
+    assert widgets[0]["chart"]["fresh"] is False
+    assert widgets[0]["chart"]["error"] == "일시적 오류"
+    assert widgets[0]["chart"]["result"] == chart
+    assert widgets[1]["chart"]["fresh"] is True
@@ -1,39 +1,27 @@
+import logging
 import sqlite3
-import json
+
+from backend.migrations import migrate
 
 # --- 데이터베이스 설정 ---
 DB_PATH = 'backend/database.db'
 
 def create_database():
-    """데이터베이스와 테이블을 생성하고 초기 데이터를 삽입합니다."""
+    """스키마 마이그레이션을 적용하고, POPULATOR가 비어 있으면 초기 데이터를 삽입합니다.
+
+    기존 테이블을 삭제하지 않으므로 여러 번 실행해도 안전합니다. 처음부터 다시 만들려면
+    데이터베이스 파일을 삭제한 뒤 실행하세요.
+    """
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
-    print("기존 테이블 삭제 중...")
-    cursor.execute("DROP TABLE IF EXISTS POPULATOR")
-    cursor.execute("DROP TABLE IF EXISTS DASHBOARDS")
-
-    print("'POPULATOR' 테이블 생성 중...")
-    cursor.execute("""
-    CREATE TABLE POPULATOR (
-        ID TEXT NOT NULL,
-        NAME TEXT,
-        CODE TEXT,
-        DATA REAL,
-        DT_ID TEXT,
-        DT_DATA REAL,
-        CREATE_DATE TEXT DEFAULT (datetime('now', 'localtime'))
-    )
-    """)
-
-    print("'DASHBOARDS' 테이블 생성 중...")
-    cursor.execute("""
-    CREATE TABLE DASHBOARDS (
-        ID INTEGER PRIMARY KEY AUTOINCREMENT,
-        NAME TEXT NOT NULL,
-        LAYOUT TEXT
-    )
-    """)
+    print("스키마 마이그레이션 적용 중...")
+    migrate(conn)
+
+    if cursor.execute("SELECT COUNT(*) FROM POPULATOR").fetchone()[0] > 0:
+        conn.close()
+        print(f"\n데이터베이스 '{DB_PATH}'에 이미 데이터가 있어 예시 데이터 삽입을 건너뜁니다.")
+        return
 
     # --- 예시 데이터 삽입 ---
 
@@ -70,12 +58,9 @@ def create_database():
     cursor.executemany("INSERT INTO POPULATOR (ID, NAME, CODE, DATA, DT_ID, DT_DATA) VALUES (?, ?, ?, ?, ?, ?)", daily_detection_data)
     cursor.executemany("INSERT INTO POPULATOR (ID, NAME, CODE, DATA, DT_ID, DT_DATA) VALUES (?, ?, ?, ?, ?, ?)", user_access_data)
 
-    # 초기 대시보드 레이아웃을 빈 배열로 설정
-    initial_layout = []
-
+    # 초기 대시보드는 위젯 없이 생성 (위젯은 DASHBOARD_WIDGETS에 저장)
     print("'DASHBOARDS' 테이블에 데이터 삽입 중...")
-    cursor.execute("INSERT INTO DASHBOARDS (ID, NAME, LAYOUT) VALUES (?, ?, ?)",
-                   (1, '기본 대시보드', json.dumps(initial_layout)))
+    cursor.execute("INSERT OR IGNORE INTO DASHBOARDS (ID, NAME) VALUES (?, ?)", (1, '기본 대시보드'))
 
     conn.commit()
     conn.close()
@@ -88,4 +73,5 @@ def create_database():
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     create_database()